@@ -0,0 +1,133 @@
+"""
+Two-level cache for small, hot, rarely-changing lookups.
+
+- Request memo: a dict that lives for one request (RequestMemoMiddleware),
+  so repeated lookups in the same request cost nothing at all.
+- Shared cache: Django's default cache with versioned keys. Writers bump a
+  per-object version instead of deleting keys, so every process misses on
+  its next read without having to know which keys exist. That needs a
+  cache all processes share; with a per-process one (LocMemCache) values
+  expire after CACHE_LOCAL_TIMEOUT seconds instead.
+"""
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 300
+# Backends that live inside one process: other processes' bumps never reach them
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+_request_memo = ContextVar('request_memo', default=None)
+
+
+# -----------------------------
+# Request Memo
+# -----------------------------
+class RequestMemoMiddleware:
+    """Gives each request its own memo dict for memoized() lookups."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_memo.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _request_memo.reset(token)
+
+
+# -----------------------------
+# Timeouts
+# -----------------------------
+def is_shared_cache():
+    return not isinstance(caches['default'], PROCESS_LOCAL_BACKENDS)
+
+
+def cache_timeout(timeout=DEFAULT_TIMEOUT):
+    """
+    timeout for a cached value, capped at CACHE_LOCAL_TIMEOUT when the
+    cache is per process, so changes made by other processes show up
+    within that many seconds.
+    """
+    if is_shared_cache():
+        return timeout
+    local = settings.CACHE_LOCAL_TIMEOUT
+    return local if timeout is None else min(timeout, local)
+
+
+# -----------------------------
+# Versioned Keys
+# -----------------------------
+def _version_key(namespace, ident):
+    return f"{namespace}:version:{ident}"
+
+
+def get_version(namespace, ident):
+    memo = _request_memo.get()
+    key = _version_key(namespace, ident)
+    if memo is not None and key in memo:
+        return memo[key]
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock, not 1: if the version key was evicted, values
+        # cached under older versions must not become reachable again.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    if memo is not None:
+        memo[key] = version
+    return version
+
+
+def bump_version(namespace, ident):
+    """
+    Invalidates every cached value for (namespace, ident). Bumps once now,
+    so the rest of this request/transaction reads fresh data, and again on
+    commit, so a reader that cached the pre-commit row under the new
+    version is invalidated too.
+    """
+    _bump(namespace, ident)
+    transaction.on_commit(lambda: _bump(namespace, ident))
+
+
+def _bump(namespace, ident):
+    key = _version_key(namespace, ident)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+    memo = _request_memo.get()
+    if memo is not None:
+        prefix = f"{namespace}:{ident}:"
+        for memo_key in [k for k in memo if k == key or k.startswith(prefix)]:
+            del memo[memo_key]
+
+
+# -----------------------------
+# Cached Lookups
+# -----------------------------
+def memoized(namespace, ident, loader, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns loader() for (namespace, ident), checking the request memo,
+    then the shared cache under the current version, then calling loader.
+    loader must return a picklable value (not None). timeout is capped by
+    cache_timeout() on a per-process cache.
+    """
+    key = f"{namespace}:{ident}:v{get_version(namespace, ident)}"
+    memo = _request_memo.get()
+    if memo is not None and key in memo:
+        return memo[key]
+
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, cache_timeout(timeout))
+    if memo is not None:
+        memo[key] = value
+    return value
@@ -0,0 +1,227 @@
+"""
+Exact money amounts as integer minor units.
+
+- Money: integer arithmetic, rounding and commission percentages, used
+  wherever amounts are computed (commission_amount, withdraw_view).
+- percent_of_many: Money.percent for many amounts at one rate, as NumPy
+  int64 vector math when it is installed and the products fit in int64.
+- MoneyField: stores Money as a BigIntegerField. Only
+  UserWithdrawal.amount (8 places) is stored this way so far; wallet,
+  commission and ledger columns are still DecimalField(decimal_places=2)
+  and convert at the boundary with Money.from_decimal / to_decimal.
+"""
+from decimal import Decimal
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils.functional import cached_property
+
+try:
+    import numpy as np
+except ImportError:  # optional: batch helpers fall back to plain Python
+    np = None
+
+FIAT_PLACES = 2     # wallet and commission amounts: cents
+CRYPTO_PLACES = 8   # withdrawal amounts
+
+
+# -----------------------------
+# Integer Rounding
+# -----------------------------
+def div_round_half_even(numerator, denominator):
+    """numerator / denominator rounded half-even (Decimal's default), in integers."""
+    quotient, remainder = divmod(numerator, denominator)
+    if 2 * remainder > denominator or (2 * remainder == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def decimal_ratio(value):
+    """An exact Decimal as (integer, power-of-ten denominator): 5.25 -> (525, 100)."""
+    value = Decimal(value)
+    exponent = value.as_tuple().exponent
+    if exponent >= 0:
+        return int(value), 1
+    return int(value.scaleb(-exponent)), 10 ** -exponent
+
+
+# -----------------------------
+# Money
+# -----------------------------
+class Money:
+    """
+    An exact amount held as integer minor units at `places` decimal places
+    (cents by default). Arithmetic stays in integers; convert with
+    to_decimal() at Decimal boundaries (DecimalFields, F() updates).
+    Floats are refused.
+    """
+    __slots__ = ('minor', 'places')
+
+    def __init__(self, minor=0, places=FIAT_PLACES):
+        if not isinstance(minor, int) or isinstance(minor, bool):
+            raise TypeError(f"Money needs integer minor units, got {minor!r}")
+        self.minor = minor
+        self.places = places
+
+    @classmethod
+    def from_decimal(cls, value, places=FIAT_PLACES, rounded=False):
+        """
+        Money from a Decimal, str or int in major units. Extra decimal
+        places raise ValueError unless rounded=True (half-even).
+        """
+        if isinstance(value, Money):
+            return value.to_places(places, rounded=rounded)
+        if isinstance(value, float):
+            raise TypeError("Floats are not exact; pass a Decimal or str")
+        numerator, denominator = decimal_ratio(value)
+        scale = 10 ** places
+        if (numerator * scale) % denominator and not rounded:
+            raise ValueError(f"{value} has more than {places} decimal places")
+        return cls(div_round_half_even(numerator * scale, denominator), places)
+
+    def to_decimal(self):
+        return Decimal(self.minor).scaleb(-self.places)
+
+    def to_places(self, places, rounded=False):
+        """The same amount at another precision (exact, or rounded half-even)."""
+        if places >= self.places:
+            return Money(self.minor * 10 ** (places - self.places), places)
+        factor = 10 ** (self.places - places)
+        if self.minor % factor and not rounded:
+            raise ValueError(f"{self} does not fit in {places} decimal places")
+        return Money(div_round_half_even(self.minor, factor), places)
+
+    def percent(self, rate):
+        """rate percent of this amount, rounded half-even to the minor unit."""
+        numerator, denominator = decimal_ratio(rate)
+        return Money(div_round_half_even(self.minor * numerator, denominator * 100), self.places)
+
+    def _aligned(self, other):
+        if not isinstance(other, Money):
+            return None
+        places = max(self.places, other.places)
+        return self.to_places(places).minor, other.to_places(places).minor, places
+
+    def __add__(self, other):
+        aligned = self._aligned(other)
+        if aligned is None:
+            return NotImplemented
+        return Money(aligned[0] + aligned[1], aligned[2])
+
+    def __sub__(self, other):
+        aligned = self._aligned(other)
+        if aligned is None:
+            return NotImplemented
+        return Money(aligned[0] - aligned[1], aligned[2])
+
+    def __neg__(self):
+        return Money(-self.minor, self.places)
+
+    def __eq__(self, other):
+        aligned = self._aligned(other)
+        return NotImplemented if aligned is None else aligned[0] == aligned[1]
+
+    def __lt__(self, other):
+        aligned = self._aligned(other)
+        return NotImplemented if aligned is None else aligned[0] < aligned[1]
+
+    def __le__(self, other):
+        aligned = self._aligned(other)
+        return NotImplemented if aligned is None else aligned[0] <= aligned[1]
+
+    def __gt__(self, other):
+        aligned = self._aligned(other)
+        return NotImplemented if aligned is None else aligned[0] > aligned[1]
+
+    def __ge__(self, other):
+        aligned = self._aligned(other)
+        return NotImplemented if aligned is None else aligned[0] >= aligned[1]
+
+    def __hash__(self):
+        return hash(self.to_decimal())
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+# -----------------------------
+# Batch Helpers
+# -----------------------------
+INT64_MAX = 2 ** 63 - 1
+
+
+def percent_of_many(minors, rate):
+    """
+    rate percent of many amounts (integer minor units, one precision),
+    rounded half-even: the same results as Money.percent one by one, as
+    NumPy int64 vector math when available. Falls back to Python integers
+    (exact at any size) when an amount * rate could overflow int64.
+    Returns a list of ints.
+    """
+    minors = list(minors)
+    numerator, denominator = decimal_ratio(rate)
+    denominator *= 100
+    largest = max((abs(minor) for minor in minors), default=0)
+    if np is None or largest * abs(numerator) > INT64_MAX or 2 * denominator > INT64_MAX:
+        return [div_round_half_even(minor * numerator, denominator) for minor in minors]
+
+    scaled = np.asarray(minors, dtype=np.int64) * np.int64(numerator)
+    quotient, remainder = np.divmod(scaled, denominator)
+    round_up = (2 * remainder > denominator) | ((2 * remainder == denominator) & (quotient % 2 == 1))
+    return (quotient + round_up).tolist()
+
+
+# -----------------------------
+# Model Field
+# -----------------------------
+class MoneyField(models.BigIntegerField):
+    """
+    Stores Money as integer minor units at `places` decimal places. Reads
+    give Money; writes and lookups take Money or Decimal/str major units.
+    """
+    description = "Money as integer minor units"
+
+    def __init__(self, *args, places=FIAT_PLACES, **kwargs):
+        self.places = places
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.places != FIAT_PLACES:
+            kwargs['places'] = self.places
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else Money(int(value), self.places)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        try:
+            return Money.from_decimal(value, self.places)
+        except (TypeError, ValueError, ArithmeticError):
+            raise ValidationError(f"Enter an amount with at most {self.places} decimal places.")
+
+    def get_prep_value(self, value):
+        if value is None or hasattr(value, 'resolve_expression'):
+            return value
+        return Money.from_decimal(value, self.places).minor
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return '' if value is None else str(value)
+
+    @cached_property
+    def validators(self):
+        # Not the integer range validators: values are Money, not ints
+        return [*self.default_validators, *self._validators]
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{'form_class': forms.DecimalField, 'decimal_places': self.places, **kwargs})
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
     'stoppoints',
     'chat',
     'language',
+    'jobs',
+    'archive',
 ]
 
 MIDDLEWARE = [
@@ -55,8 +58,24 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'AmazonProject.cache_utils.RequestMemoMiddleware',
 ]
 
+# Shared cache behind AmazonProject.cache_utils. With several processes
+# (web workers, run_worker, management commands) set DJANGO_CACHE_BACKEND
+# and DJANGO_CACHE_LOCATION to a shared cache, e.g.
+# django.core.cache.backends.redis.RedisCache and redis://127.0.0.1:6379/1,
+# so version bumps reach every process at once. The LocMemCache default is
+# per process: cache_utils then caps cached values at CACHE_LOCAL_TIMEOUT
+# seconds, since bumps made elsewhere never reach it.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'amazonproject'),
+    }
+}
+CACHE_LOCAL_TIMEOUT = 10
+
 ROOT_URLCONF = 'AmazonProject.urls'
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATES = [
@@ -87,6 +106,15 @@ DATABASES = {
     }
 }
 
+# Archived task/commission history lives in this DATABASES alias. Add e.g. an
+# 'archive' database above and point this at it to move cold rows out of the
+# main database (then run: manage.py migrate archive --database=archive).
+ARCHIVE_DATABASE = 'default'
+DATABASE_ROUTERS = ['archive.routers.ArchiveRouter']
+
+# Business days of task/commission history kept in the hot tables
+ARCHIVE_HORIZON_DAYS = 90
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,6 +164,9 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # URL to access media in templates and browser
 MEDIA_URL = '/media/'
 
+# Largest voucher upload accepted; bigger uploads are cut off mid-stream
+VOUCHER_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+
 # Ensure login_required redirects to the project's login view
 LOGIN_URL = '/accounts/userlogin/'
 # Default redirect after login
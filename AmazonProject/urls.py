@@ -1,5 +1,5 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -11,8 +11,18 @@ urlpatterns = [
     path('stoppoints/', include('stoppoints.urls')),
     path('wallet/', include('wallet.urls', namespace='wallet')),
     path("commission/", include("commission.urls")),
+    path('archive/', include('archive.urls', namespace='archive')),
 
 ]
 
 if settings.DEBUG:
+    from products.views import serve_image_variant
+
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>products/variants/.*)$' % settings.MEDIA_URL.lstrip('/'),
+            serve_image_variant,
+            {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,14 @@
+from accounts.models import CustomUser
+from jobs.registry import job
+
+
+# -----------------------------
+# User Deletion Job
+# -----------------------------
+@job('accounts.delete_user')
+def delete_user_job(user_id):
+    """
+    Deletes a regular user and everything that cascades from them.
+    Referrals are kept (referred_by is SET_NULL).
+    """
+    CustomUser.objects.filter(pk=user_id, role='user').delete()
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from balance.models import RechargeRequest
+from commission.models import Commission
+from products.models import UserProductTask, current_business_day
+from stoppoints.models import StopPoint
+
+
+def hot_queries(user_id):
+    """
+    (label, queryset, index names that serve it) for each hot filter path.
+    Values are placeholders: the plan depends on the shape, not the user.
+    """
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return [
+        (
+            'Commission: today by type',
+            Commission.objects.filter(user_id=user_id, commission_type='self', created_at__gte=today),
+            ['commission_user_type_date_idx'],
+        ),
+        (
+            'Commission: referral idempotency check',
+            Commission.objects.filter(
+                user_id=user_id, product_name='Product 1', commission_type='referral', triggered_by_id=user_id
+            ),
+            ['commission_user_product_idx'],
+        ),
+        (
+            "UserProductTask: today's pending task",
+            UserProductTask.objects.filter(
+                user_id=user_id, business_day=current_business_day(), task_number=1, is_completed=False
+            ),
+            ['task_user_day_number_idx'],
+        ),
+        (
+            'UserProductTask: product already assigned',
+            UserProductTask.objects.filter(user_id=user_id, product_id=1),
+            ['task_user_product_idx'],
+        ),
+        (
+            'RechargeRequest: pending per user',
+            RechargeRequest.objects.filter(user_id=user_id, status='pending'),
+            ['recharge_user_status_idx'],
+        ),
+        (
+            'StopPoint: next pending point',
+            StopPoint.objects.filter(user_id=user_id, point__gte=1, status='pending').order_by('point'),
+            ['stoppoint_user_status_idx'],
+        ),
+        (
+            'StopPoint: next after last cleared',
+            StopPoint.objects.filter(user_id=user_id, order__gt=0).order_by('order'),
+            ['stoppoint_user_order_idx'],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Print query plans (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL) for the hot filter paths, '
+        'with and without their composite indexes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=1, help='User id to plug into the filters')
+        parser.add_argument('--analyze', action='store_true', help='Run EXPLAIN ANALYZE (PostgreSQL only)')
+
+    def handle(self, *args, **options):
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+
+        for label, queryset, index_names in hot_queries(options['user']):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {label} =="))
+            self.stdout.write("-- without composite index --")
+            self.stdout.write(self.plan_without(queryset, index_names, explain_options))
+            self.stdout.write("-- with composite index --")
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
+
+    def plan_without(self, queryset, index_names, explain_options):
+        """
+        Drops the indexes inside a transaction, explains, then rolls back.
+        SQLite and PostgreSQL both roll back DDL; on backends that don't
+        (MySQL) the "without" plan is skipped rather than dropping indexes.
+        """
+        if not connection.features.can_rollback_ddl:
+            return "(skipped: this database cannot roll back DROP INDEX)"
+
+        drop_sql = connection.SchemaEditorClass.sql_delete_index
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in index_names:
+                    cursor.execute(drop_sql % {'name': connection.ops.quote_name(name), 'table': table})
+            plan = queryset.explain(**explain_options)
+            transaction.set_rollback(True)
+        return plan
@@ -0,0 +1,154 @@
+from decimal import Decimal
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import DecimalField, Exists, F, OuterRef, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import CustomUser
+from balance.models import RechargeRequest
+from stoppoints.models import StopPoint, StopPointProgress
+from wallet.models import UserWithdrawal
+
+DEFAULT_DAILY_TASK_LIMIT = 60
+USER_PAGE_SIZE = 50
+MAX_USER_PAGE_SIZE = 200
+
+# Filter name -> subquery a regular user must match
+USER_LIST_FILTERS = {
+    'has_pending_recharge': lambda: RechargeRequest.objects.filter(user=OuterRef('pk'), status='pending'),
+    'stopped': lambda: StopPointProgress.objects.filter(user=OuterRef('pk'), is_stopped=True),
+    'pending_withdrawal': lambda: UserWithdrawal.objects.filter(user=OuterRef('pk'), status='PENDING'),
+}
+
+
+# -----------------------------
+# User List Search / Filters
+# -----------------------------
+def filter_regular_users(params, users=None):
+    """
+    Applies server-side search and filters from request params:
+    - q: username/phone prefix or exact referral code
+    - has_pending_recharge, stopped, pending_withdrawal: flags ("1"/"on")
+    """
+    if users is None:
+        users = CustomUser.objects.filter(role='user')
+
+    q = (params.get('q') or '').strip()
+    if q:
+        users = users.filter(
+            Q(username__istartswith=q) | Q(phone__startswith=q) | Q(referral_code__iexact=q)
+        )
+
+    for name, subquery in USER_LIST_FILTERS.items():
+        if params.get(name) in ('1', 'on', 'true'):
+            users = users.filter(Exists(subquery()))
+    return users
+
+
+# -----------------------------
+# Keyset Pagination
+# -----------------------------
+def paginate_users(users, after=None, before=None, limit=USER_PAGE_SIZE):
+    """
+    Keyset (cursor) pagination over user id. Each page reads at most
+    limit + 1 rows no matter how many users exist, unlike OFFSET paging.
+
+    Returns a dict with the page's users and the cursors for the
+    neighbouring pages (None when there is no such page).
+    """
+    after, before = _parse_cursor(after), _parse_cursor(before)
+    limit = max(1, min(_parse_cursor(limit) or USER_PAGE_SIZE, MAX_USER_PAGE_SIZE))
+
+    if before is not None:
+        rows = list(users.filter(id__lt=before).order_by('-id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_prev, has_next = has_more, True
+    else:
+        if after is not None:
+            users = users.filter(id__gt=after)
+        rows = list(users.order_by('id')[:limit + 1])
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        has_prev = after is not None
+
+    return {
+        'users': rows,
+        'next_cursor': rows[-1].id if rows and has_next else None,
+        'prev_cursor': rows[0].id if rows and has_prev else None,
+    }
+
+
+def _parse_cursor(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+# -----------------------------
+# Admin Dashboard Data
+# -----------------------------
+def admin_dashboard_queryset(users=None):
+    """
+    Regular users with everything the admin dashboard renders, loaded in a
+    fixed number of queries regardless of how many users are on the page:
+    - 1 query for users + referrer, commission setting, wallets and total
+      commission (live rows plus the archived summary)
+    - 1 query each for stop points, pending recharges (+ vouchers) and withdrawals
+    """
+    if users is None:
+        users = CustomUser.objects.filter(role='user')
+
+    return (
+        users
+        .select_related('referred_by', 'commission_setting', 'userwalletaddress', 'wallet')
+        .annotate(
+            total_commission=Coalesce(
+                Sum('commissions__amount'),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ) + Coalesce(
+                F('archive_summary__self_commission_total') + F('archive_summary__referral_commission_total'),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
+        )
+        .prefetch_related(
+            Prefetch('stoppoint_set', queryset=StopPoint.objects.order_by('point'), to_attr='stop_points'),
+            Prefetch(
+                'rechargerequest_set',
+                queryset=RechargeRequest.objects.filter(status='pending').select_related('voucher'),
+                to_attr='pending_recharges',
+            ),
+            Prefetch('userwithdrawal_set', queryset=UserWithdrawal.objects.order_by('-created_at'), to_attr='withdrawals'),
+        )
+    )
+
+
+def build_admin_dashboard_rows(users):
+    """
+    Attaches the template-facing attributes to users loaded through
+    admin_dashboard_queryset(). Performs no queries.
+    """
+    rows = list(users)
+    for user_obj in rows:
+        user_obj.wallet_address = _related_or_none(user_obj, 'userwalletaddress')
+        wallet = _related_or_none(user_obj, 'wallet')
+        wallet_balance = wallet.current_balance if wallet else Decimal('0.00')
+
+        cs = _related_or_none(user_obj, 'commission_setting')
+        user_obj.product_rate = cs.product_rate if cs else 0
+        user_obj.referral_rate = cs.referral_rate if cs else 0
+        user_obj.daily_task_limit = cs.daily_task_limit if cs else DEFAULT_DAILY_TASK_LIMIT
+
+        # Task progress per stop point: True=stop reached (red), False=not reached (green)
+        user_obj.task_progress = [wallet_balance >= sp.required_balance for sp in user_obj.stop_points]
+    return rows
+
+
+def _related_or_none(obj, name):
+    """Reverse one-to-one lookup that returns None instead of raising."""
+    try:
+        return getattr(obj, name)
+    except ObjectDoesNotExist:
+        return None
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.services import admin_dashboard_queryset, build_admin_dashboard_rows
+from balance.models import RechargeRequest, Voucher, Wallet
+from commission.models import Commission, CommissionSetting
+from stoppoints.models import StopPoint
+from wallet.models import UserWalletAddress, UserWithdrawal
+
+User = get_user_model()
+
+
+class AdminDashboardQueryBudgetTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='dash_admin', password='pass', role='admin')
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def make_users(self, count):
+        for _ in range(count):
+            n = User.objects.count()
+            user = User.objects.create_user(username=f'dash_user{n}', phone=f'+1000{n}', password='pass')
+            CommissionSetting.objects.create(user=user, product_rate=Decimal('5.00'), daily_task_limit=40)
+            Wallet.objects.create(user=user, current_balance=Decimal('50.00'))
+            UserWalletAddress.objects.create(user=user, address=f'addr-{n}', network='TRX-20')
+            StopPoint.objects.create(user=user, point=3, required_balance=Decimal('20.00'), order=1)
+            StopPoint.objects.create(user=user, point=5, required_balance=Decimal('80.00'), order=2)
+            recharge = RechargeRequest.objects.create(user=user, amount=Decimal('100.00'))
+            Voucher.objects.create(recharge_request=recharge, file='vouchers/v.jpg')
+            UserWithdrawal.objects.create(user=user, amount=Decimal('1.00'), network='TRX-20')
+            Commission.objects.create(user=user, product_name='Product 1', amount=Decimal('1.50'))
+            Commission.objects.create(user=user, product_name='Product 2', amount=Decimal('2.25'))
+
+    def count_dashboard_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = build_admin_dashboard_rows(admin_dashboard_queryset())
+            for user in rows:
+                for recharge in user.pending_recharges:
+                    recharge.voucher
+        return len(ctx), rows
+
+    def test_query_count_is_constant_as_users_grow(self):
+        self.make_users(2)
+        small, _ = self.count_dashboard_queries()
+        self.make_users(8)
+        large, rows = self.count_dashboard_queries()
+
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 4)
+
+    def test_rows_carry_dashboard_attributes(self):
+        self.make_users(1)
+        _, rows = self.count_dashboard_queries()
+        user = rows[0]
+
+        self.assertEqual(user.total_commission, Decimal('3.75'))
+        self.assertEqual(user.daily_task_limit, 40)
+        self.assertEqual(user.product_rate, Decimal('5.00'))
+        self.assertEqual([sp.point for sp in user.stop_points], [3, 5])
+        self.assertEqual(user.task_progress, [True, False])
+        self.assertEqual(len(user.pending_recharges), 1)
+        self.assertIsNotNone(user.pending_recharges[0].voucher)
+        self.assertTrue(user.wallet_address.address.startswith('addr-'))
+
+    def test_dashboard_view_renders(self):
+        self.make_users(3)
+        response = self.client.get(reverse('accounts:admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['users']), 3)
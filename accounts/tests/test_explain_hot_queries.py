@@ -0,0 +1,33 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from accounts.management.commands.explain_hot_queries import hot_queries
+
+
+class ExplainHotQueriesTests(TestCase):
+    def index_names(self):
+        with connection.cursor() as cursor:
+            return {
+                name
+                for table in connection.introspection.table_names(cursor)
+                for name in connection.introspection.get_constraints(cursor, table)
+            }
+
+    def test_every_hot_path_has_its_index(self):
+        existing = self.index_names()
+        for label, _, names in hot_queries(1):
+            for name in names:
+                self.assertIn(name, existing, label)
+
+    def test_prints_plans_and_restores_indexes(self):
+        before = self.index_names()
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+
+        output = out.getvalue()
+        self.assertEqual(output.count('-- without composite index --'), len(hot_queries(1)))
+        self.assertIn('recharge_user_status_idx', output)
+        self.assertIn('stoppoint_user_order_idx', output)
+        self.assertEqual(self.index_names(), before)
@@ -0,0 +1,77 @@
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.services import filter_regular_users, paginate_users
+from balance.models import RechargeRequest
+from stoppoints.models import StopPointProgress
+from wallet.models import UserWithdrawal
+
+User = get_user_model()
+
+
+class UserListPaginationTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create(username=f'page_user{i:02d}', phone=f'+2000{i:02d}', referral_code=f'REF{i:03d}')
+            for i in range(7)
+        ]
+
+    def test_keyset_pages_cover_every_user_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = paginate_users(filter_regular_users({}), after=cursor, limit=3)
+            seen.extend(u.id for u in page['users'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [u.id for u in self.users])
+
+    def test_previous_page_returns_preceding_rows(self):
+        first = paginate_users(filter_regular_users({}), limit=3)
+        second = paginate_users(filter_regular_users({}), after=first['next_cursor'], limit=3)
+        back = paginate_users(filter_regular_users({}), before=second['prev_cursor'], limit=3)
+
+        self.assertEqual([u.id for u in back['users']], [u.id for u in first['users']])
+        self.assertIsNone(back['prev_cursor'])
+        self.assertIsNotNone(back['next_cursor'])
+
+    def test_page_reads_bounded_rows(self):
+        with CaptureQueriesContext(connection) as ctx:
+            paginate_users(filter_regular_users({}), after=self.users[2].id, limit=2)
+        self.assertEqual(len(ctx), 1)
+        self.assertIn('LIMIT 3', ctx.captured_queries[0]['sql'])
+
+    def test_search_by_username_phone_and_referral_code(self):
+        self.assertEqual(list(filter_regular_users({'q': 'page_user03'})), [self.users[3]])
+        self.assertEqual(list(filter_regular_users({'q': '+200004'})), [self.users[4]])
+        self.assertEqual(list(filter_regular_users({'q': 'ref005'})), [self.users[5]])
+
+    def test_filters(self):
+        RechargeRequest.objects.create(user=self.users[1], amount=Decimal('10.00'))
+        RechargeRequest.objects.create(user=self.users[2], amount=Decimal('10.00'), status='approved')
+        StopPointProgress.objects.filter(user=self.users[3]).update(is_stopped=True)
+        UserWithdrawal.objects.create(user=self.users[4], amount=Decimal('1.00'), network='TRX-20')
+        UserWithdrawal.objects.create(user=self.users[5], amount=Decimal('1.00'), network='TRX-20', status='APPROVED')
+
+        self.assertEqual(list(filter_regular_users({'has_pending_recharge': '1'})), [self.users[1]])
+        self.assertEqual(list(filter_regular_users({'stopped': 'on'})), [self.users[3]])
+        self.assertEqual(list(filter_regular_users({'pending_withdrawal': '1'})), [self.users[4]])
+
+    def test_dashboards_paginate(self):
+        admin = User.objects.create_user(username='page_admin', password='pass', role='admin')
+        cs = User.objects.create_user(username='page_cs', password='pass', role='customerservice')
+        client = Client()
+
+        client.force_login(admin)
+        response = client.get(reverse('accounts:admin_dashboard'), {'limit': 5})
+        self.assertEqual(len(response.context['users']), 5)
+        self.assertContains(response, f"after={self.users[4].id}")
+
+        client.force_login(cs)
+        response = client.get(reverse('accounts:customerservice_dashboard'), {'q': 'page_user06'})
+        self.assertEqual(list(response.context['regular_users']), [self.users[6]])
@@ -14,7 +14,9 @@ from products.models import UserProductTask
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
-from commission.utils import get_total_commission
+from accounts.services import filter_regular_users, paginate_users
+from accounts.jobs import delete_user_job
+from jobs.registry import enqueue
 
 
 
@@ -191,13 +193,11 @@ def customerservicelogin(request):
 def customerservice_dashboard(request):
     """
     Customer Service dashboard:
-    - View all Regular Users
+    - View Regular Users (searchable, filterable, keyset-paginated)
     - Reset login and fund passwords
-    - Delete Regular Users (wipes all fields safely before delete)
+    - Delete Regular Users (wipes unique fields now, deletes on the job worker)
       Deleting a user does NOT affect their referrals.
     """
-    regular_users = CustomUser.objects.filter(role='user')
-
     if request.method == "POST":
         action = request.POST.get("action")
         target_id = request.POST.get("user_id")
@@ -211,13 +211,15 @@ def customerservice_dashboard(request):
             target_user.password = ''
             target_user.fund_password = ''
             target_user.referral_code = None
+            target_user.is_active = False
             target_user.save(update_fields=[
-                'username','phone','password','fund_password','referral_code'
+                'username','phone','password','fund_password','referral_code','is_active'
             ])
 
-            # Delete the user; referrals remain completely intact
-            target_user.delete()
-            messages.success(request, "Regular User deleted successfully.")
+            # The cascade can be large, so the delete itself runs on the job
+            # worker; referrals remain completely intact
+            enqueue(delete_user_job, {"user_id": target_user.id}, idempotency_key=f"delete_user:{target_user.id}")
+            messages.success(request, "Regular User deactivated and queued for deletion.")
             return redirect('accounts:customerservice_dashboard')
 
         elif action == "reset_login_password":
@@ -240,7 +242,16 @@ def customerservice_dashboard(request):
                 messages.success(request, f"Fund password for {target_user.username} reset successfully.")
             return redirect('accounts:customerservice_dashboard')
 
-    return render(request, "accounts/customerservice_dashboard.html", {"regular_users": regular_users})
+    page = paginate_users(
+        filter_regular_users(request.GET),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        limit=request.GET.get('limit'),
+    )
+    return render(request, "accounts/customerservice_dashboard.html", {
+        "regular_users": page['users'],
+        "page": page,
+    })
 
 
 
@@ -422,7 +433,6 @@ from django.shortcuts import render, get_object_or_404, redirect
 from accounts.models import CustomUser
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib import messages
-from balance.models import RechargeHistory, RechargeRequest, Voucher
 
 def is_admin(user):
     return user.is_authenticated and user.role == 'admin'
@@ -431,22 +441,18 @@ from django.shortcuts import render, get_object_or_404, redirect
 from accounts.models import CustomUser
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib import messages
-from balance.models import RechargeRequest, Voucher
 # (also import approve_recharge / reject_recharge from wherever you defined them)
 
 def is_admin(user):
     return user.is_authenticated and user.role == 'admin'
 
 
-from stoppoints.models import StopPoint
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 
 from accounts.models import CustomUser
-from stoppoints.models import StopPoint
-from balance.models import RechargeRequest, Voucher
 
 
 
@@ -525,15 +531,11 @@ def manage_superadmin_wallets(request):
 
 
 
-from wallet.models import UserWalletAddress, UserWithdrawal  # include withdrawals
 
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-from balance.models import RechargeRequest, Voucher
-from wallet.models import UserWithdrawal
-from stoppoints.models import StopPoint
 from commission.models import CommissionSetting  # Correct import
 
 from accounts.utils import is_admin  # your existing utility
@@ -541,11 +543,8 @@ from accounts.utils import is_admin  # your existing utility
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render
 from accounts.models import CustomUser
-from stoppoints.models import StopPoint
-from balance.models import RechargeRequest, Voucher
-from wallet.models import UserWalletAddress, UserWithdrawal
 from commission.models import CommissionSetting
-from commission.utils import get_total_commission
+from accounts.services import admin_dashboard_queryset, build_admin_dashboard_rows
 from accounts.utils import is_admin
 
 
@@ -571,53 +570,16 @@ def admin_dashboard(request):
                 messages.error(request, 'Invalid daily limit value.')
             return redirect('accounts:admin_dashboard')
 
-    users = CustomUser.objects.filter(role='user')
-
-    for user_obj in users:
-        # Stop points
-        stop_points = StopPoint.objects.filter(user=user_obj).order_by('point')
-        user_obj.stop_points = stop_points
-
-        # Pending recharges
-        user_obj.pending_recharges = RechargeRequest.objects.filter(user=user_obj, status="pending")
-        for recharge in user_obj.pending_recharges:
-            recharge.voucher = Voucher.objects.filter(recharge_request=recharge).first()
-
-        # Wallet address & balance
-        try:
-            user_obj.wallet_address = UserWalletAddress.objects.get(user=user_obj)
-            wallet_balance = user_obj.wallet_address.balance
-        except UserWalletAddress.DoesNotExist:
-            user_obj.wallet_address = None
-            wallet_balance = 0
-
-        # Withdrawals
-        user_obj.withdrawals = UserWithdrawal.objects.filter(user=user_obj).order_by('-created_at')
-
-        # Commission details
-        cs = CommissionSetting.objects.filter(user=user_obj).last()
-        user_obj.commission_setting = cs
-        if cs:
-            user_obj.product_rate = getattr(cs, 'product_rate', 0)
-            user_obj.referral_rate = getattr(cs, 'referral_rate', 0)
-            user_obj.daily_task_limit = getattr(cs, 'daily_task_limit', 60)
-        else:
-            user_obj.product_rate = 0
-            user_obj.referral_rate = 0
-            user_obj.daily_task_limit = 60
-
-        # Total commission
-        user_obj.total_commission = get_total_commission(user_obj)
-
-        # Task progress per stop point: True=stop reached, False=not reached
-        user_obj.task_progress = []
-        for sp in stop_points:
-            if wallet_balance >= sp.required_balance:
-                user_obj.task_progress.append(True)  # Red bar
-            else:
-                user_obj.task_progress.append(False)  # Green bar
+    page = paginate_users(
+        admin_dashboard_queryset(filter_regular_users(request.GET)),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        limit=request.GET.get('limit'),
+    )
+    users = build_admin_dashboard_rows(page['users'])
 
     context = {
         "users": users,
+        "page": page,
     }
     return render(request, "accounts/admin_dashboard.html", context)
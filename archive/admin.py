@@ -0,0 +1,43 @@
+from django.contrib import admin
+
+from .models import ArchiveRun, ArchiveSummary, ArchivedCommission, ArchivedUserProductTask
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Archived history is only written by archive_history."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedUserProductTask)
+class ArchivedUserProductTaskAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'user_id', 'product_id', 'task_number', 'is_completed', 'business_day', 'archived_at')
+    search_fields = ('=user_id',)
+
+
+@admin.register(ArchivedCommission)
+class ArchivedCommissionAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'user_id', 'product_name', 'amount', 'commission_type', 'created_at', 'archived_at')
+    list_filter = ('commission_type',)
+    search_fields = ('=user_id',)
+
+
+@admin.register(ArchiveSummary)
+class ArchiveSummaryAdmin(ReadOnlyAdmin):
+    list_display = (
+        'user', 'task_count', 'completed_task_count', 'commission_count',
+        'self_commission_total', 'referral_commission_total', 'updated_at',
+    )
+    search_fields = ('user__username',)
+
+
+@admin.register(ArchiveRun)
+class ArchiveRunAdmin(ReadOnlyAdmin):
+    list_display = ('cutoff', 'status', 'tasks_archived', 'commissions_archived', 'started_at', 'finished_at')
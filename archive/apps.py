@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ArchiveConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'archive'
+
+    def ready(self):
+        import archive.signals  # ensures signals are registered
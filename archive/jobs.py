@@ -0,0 +1,16 @@
+from datetime import date
+
+from archive.services import ARCHIVE_BATCH_SIZE, archive_history
+from jobs.registry import heartbeat, job
+
+
+# -----------------------------
+# Archival Job
+# -----------------------------
+@job('archive.archive_history')
+def archive_history_job(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Queued form of manage.py archive_history. Each batch commits on its
+    own (short write locks), so a retry resumes after the last one.
+    """
+    archive_history(date.fromisoformat(cutoff), batch_size=batch_size, on_batch=heartbeat)
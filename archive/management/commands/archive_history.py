@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from archive.services import (
+    ARCHIVE_BATCH_SIZE,
+    archivable_commissions,
+    archivable_tasks,
+    archive_cutoff,
+    archive_history,
+)
+
+
+class Command(BaseCommand):
+    help = 'Move task and commission history older than the horizon into the archive tables, in resumable batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days', type=int, default=settings.ARCHIVE_HORIZON_DAYS,
+            help='Business days of history kept hot (default: ARCHIVE_HORIZON_DAYS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        if options['horizon_days'] < 1:
+            raise CommandError("--horizon-days must be at least 1: the current day is never archived.")
+        cutoff = archive_cutoff(options['horizon_days'])
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"Would archive before {cutoff}: {archivable_tasks(cutoff).count()} tasks, "
+                f"{archivable_commissions(cutoff).count()} commissions"
+            )
+            return
+
+        run = archive_history(cutoff, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived before {cutoff}: {run.tasks_archived} tasks, "
+            f"{run.commissions_archived} commissions (status: {run.status})"
+        ))
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:11
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=10)),
+                ('last_task_id', models.PositiveBigIntegerField(default=0)),
+                ('last_commission_id', models.PositiveBigIntegerField(default=0)),
+                ('tasks_archived', models.PositiveIntegerField(default=0)),
+                ('commissions_archived', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedCommission',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('user_id', models.BigIntegerField()),
+                ('product_name', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('commission_type', models.CharField(choices=[('self', 'Self Earned'), ('referral', 'Referral Earned')], default='self', max_length=10)),
+                ('triggered_by_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Commission',
+                'verbose_name_plural': 'Archived Commissions',
+                'indexes': [models.Index(fields=['user_id', 'id'], name='archived_commission_user_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedUserProductTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('user_id', models.BigIntegerField()),
+                ('product_id', models.BigIntegerField()),
+                ('task_number', models.PositiveIntegerField(null=True)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('commissioned', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('business_day', models.DateField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Task',
+                'verbose_name_plural': 'Archived Tasks',
+                'indexes': [models.Index(fields=['user_id', 'id'], name='archived_task_user_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_count', models.PositiveIntegerField(default=0)),
+                ('completed_task_count', models.PositiveIntegerField(default=0)),
+                ('commission_count', models.PositiveIntegerField(default=0)),
+                ('self_commission_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('referral_commission_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archive Summary',
+                'verbose_name_plural': 'Archive Summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,112 @@
+from decimal import Decimal
+from django.conf import settings
+from django.db import models
+
+
+# -----------------------------
+# Archived History
+# -----------------------------
+# Cold copies of rows moved out of the hot tables by archive_history.
+# They keep the original primary key (so re-copying a row is a no-op) and
+# plain id columns instead of foreign keys, so ARCHIVE_DATABASE can point
+# them at a separate database (see archive.routers).
+class ArchivedUserProductTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # UserProductTask.id
+    user_id = models.BigIntegerField()
+    product_id = models.BigIntegerField()
+    task_number = models.PositiveIntegerField(null=True)
+    is_completed = models.BooleanField(default=False)
+    commissioned = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    business_day = models.DateField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived Task"
+        verbose_name_plural = "Archived Tasks"
+        indexes = [
+            # Per-user history pages, newest first
+            models.Index(fields=['user_id', 'id'], name='archived_task_user_idx'),
+        ]
+
+
+class ArchivedCommission(models.Model):
+    COMMISSION_TYPES = (
+        ('self', 'Self Earned'),
+        ('referral', 'Referral Earned'),
+    )
+
+    id = models.BigIntegerField(primary_key=True)  # Commission.id
+    user_id = models.BigIntegerField()
+    product_name = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    commission_type = models.CharField(max_length=10, choices=COMMISSION_TYPES, default='self')
+    triggered_by_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived Commission"
+        verbose_name_plural = "Archived Commissions"
+        indexes = [
+            # Per-user history pages, newest first
+            models.Index(fields=['user_id', 'id'], name='archived_commission_user_idx'),
+        ]
+
+
+# -----------------------------
+# Per-user Archive Totals
+# -----------------------------
+class ArchiveSummary(models.Model):
+    """
+    What a user's archived rows added up to, kept next to the live tables
+    (always in the default database) so totals read as live + summary
+    without touching the archive. Written only by archive_history, in the
+    same transaction that deletes the rows it counts.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archive_summary')
+    task_count = models.PositiveIntegerField(default=0)
+    completed_task_count = models.PositiveIntegerField(default=0)
+    commission_count = models.PositiveIntegerField(default=0)
+    self_commission_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    referral_commission_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Archive Summary"
+        verbose_name_plural = "Archive Summaries"
+
+    @property
+    def commission_total(self):
+        return self.self_commission_total + self.referral_commission_total
+
+    def __str__(self):
+        return f"{self.user_id}: {self.task_count} tasks, {self.commission_count} commissions archived"
+
+
+# -----------------------------
+# Archive Runs
+# -----------------------------
+class ArchiveRun(models.Model):
+    """
+    One archival pass: moves history from before `cutoff` (a business day)
+    in id-ordered batches. The cursors are saved with each batch, so an
+    interrupted run resumes where it stopped.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+
+    cutoff = models.DateField(unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    last_task_id = models.PositiveBigIntegerField(default=0)
+    last_commission_id = models.PositiveBigIntegerField(default=0)
+    tasks_archived = models.PositiveIntegerField(default=0)
+    commissions_archived = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Archive before {self.cutoff} ({self.status})"
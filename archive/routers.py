@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Models whose rows live in ARCHIVE_DATABASE; summaries and runs stay in default
+ARCHIVE_MODELS = {'archiveduserproducttask', 'archivedcommission'}
+
+
+def archive_database():
+    return getattr(settings, 'ARCHIVE_DATABASE', DEFAULT_DB_ALIAS)
+
+
+def is_archive_model(app_label, model_name):
+    return app_label == 'archive' and model_name in ARCHIVE_MODELS
+
+
+# -----------------------------
+# Archive Database Router
+# -----------------------------
+class ArchiveRouter:
+    """
+    Sends archived history to settings.ARCHIVE_DATABASE (a DATABASES alias,
+    e.g. a separate SQLite file or PostgreSQL server). With the default
+    alias it changes nothing. Other models never migrate to the archive
+    alias and archived models only migrate there.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_archive_model(model._meta.app_label, model._meta.model_name):
+            return archive_database()
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        alias = archive_database()
+        if alias == DEFAULT_DB_ALIAS:
+            return None
+        if is_archive_model(app_label, model_name):
+            return db == alias
+        if db == alias:
+            return False
+        return None
@@ -0,0 +1,230 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from archive.models import ArchiveRun, ArchiveSummary, ArchivedCommission, ArchivedUserProductTask
+from commission.models import Commission
+from products.models import UserProductTask, current_business_day
+
+ARCHIVE_BATCH_SIZE = 1000
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+
+TASK_FIELDS = (
+    'id', 'user_id', 'product_id', 'task_number', 'is_completed', 'commissioned',
+    'created_at', 'completed_at', 'business_day',
+)
+COMMISSION_FIELDS = ('id', 'user_id', 'product_name', 'amount', 'commission_type', 'triggered_by_id', 'created_at')
+SUMMARY_FIELDS = (
+    'task_count', 'completed_task_count', 'commission_count', 'self_commission_total', 'referral_commission_total',
+)
+# Commission type -> ArchiveSummary field it accumulates into
+COMMISSION_TOTAL_FIELDS = {
+    'self': 'self_commission_total',
+    'referral': 'referral_commission_total',
+}
+
+
+# -----------------------------
+# What Gets Archived
+# -----------------------------
+def archive_cutoff(horizon_days=None):
+    """First business day kept hot: everything before it may be archived."""
+    if horizon_days is None:
+        horizon_days = settings.ARCHIVE_HORIZON_DAYS
+    return current_business_day() - timedelta(days=horizon_days)
+
+
+def latest_archive_cutoff():
+    """Newest cutoff any archive run has started on, or None."""
+    return ArchiveRun.objects.aggregate(cutoff=Max('cutoff'))['cutoff']
+
+
+def archivable_tasks(cutoff):
+    return UserProductTask.objects.filter(business_day__lt=cutoff)
+
+
+def archivable_commissions(cutoff):
+    """
+    Commissions created before the cutoff day. Rows with an idempotency
+    key stay hot: they are the pay-once guard for referral commissions.
+    """
+    start = timezone.make_aware(datetime.combine(cutoff, time.min))
+    return Commission.objects.filter(created_at__lt=start, idempotency_key__isnull=True)
+
+
+# -----------------------------
+# Archival
+# -----------------------------
+def archive_history(cutoff, batch_size=ARCHIVE_BATCH_SIZE, on_batch=None):
+    """
+    Moves tasks and commissions from before `cutoff` into the archive
+    tables, batch_size rows at a time in id order. Per batch:
+    - copy the rows to the archive (a repeated copy is ignored)
+    - in one transaction: delete the originals still present, add them to
+      their users' ArchiveSummary and save the run's cursor
+    So live rows + summaries always add up to the full history, and an
+    interrupted run resumes after its last batch. on_batch(run) is called
+    after each committed batch. Returns the ArchiveRun.
+    """
+    run, _ = ArchiveRun.objects.get_or_create(cutoff=cutoff)
+    if run.status == 'done':
+        return run
+
+    for archive_batch in (_archive_task_batch, _archive_commission_batch):
+        while archive_batch(run, batch_size):
+            if on_batch:
+                on_batch(run)
+
+    run.status = 'done'
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at'])
+    return run
+
+
+def _archive_task_batch(run, batch_size):
+    rows = list(
+        archivable_tasks(run.cutoff).filter(id__gt=run.last_task_id)
+        .order_by('id')
+        .values(*TASK_FIELDS)[:batch_size]
+    )
+    if not rows:
+        return 0
+    ArchivedUserProductTask.objects.bulk_create(
+        [ArchivedUserProductTask(**row) for row in rows], ignore_conflicts=True
+    )
+
+    with transaction.atomic():
+        moved = _delete_live_rows(UserProductTask, rows)
+        totals = defaultdict(lambda: defaultdict(int))
+        for row in moved:
+            totals[row['user_id']]['task_count'] += 1
+            totals[row['user_id']]['completed_task_count'] += int(row['is_completed'])
+        _add_to_summaries(totals)
+        run.last_task_id = rows[-1]['id']
+        run.tasks_archived += len(moved)
+        run.save(update_fields=['last_task_id', 'tasks_archived'])
+    return len(rows)
+
+
+def _archive_commission_batch(run, batch_size):
+    rows = list(
+        archivable_commissions(run.cutoff).filter(id__gt=run.last_commission_id)
+        .order_by('id')
+        .values(*COMMISSION_FIELDS)[:batch_size]
+    )
+    if not rows:
+        return 0
+    ArchivedCommission.objects.bulk_create([ArchivedCommission(**row) for row in rows], ignore_conflicts=True)
+
+    with transaction.atomic():
+        moved = _delete_live_rows(Commission, rows)
+        totals = defaultdict(lambda: defaultdict(int))
+        for row in moved:
+            totals[row['user_id']]['commission_count'] += 1
+            totals[row['user_id']][COMMISSION_TOTAL_FIELDS[row['commission_type']]] += row['amount']
+        _add_to_summaries(totals)
+        run.last_commission_id = rows[-1]['id']
+        run.commissions_archived += len(moved)
+        run.save(update_fields=['last_commission_id', 'commissions_archived'])
+    return len(rows)
+
+
+def _delete_live_rows(model, rows):
+    """
+    Locks and deletes the rows that still exist (a user deleted meanwhile
+    takes theirs along) and returns those rows: only they are summarized.
+    """
+    live = set(
+        model.objects.select_for_update()
+        .filter(id__in=[row['id'] for row in rows])
+        .values_list('id', flat=True)
+    )
+    model.objects.filter(id__in=live).delete()
+    return [row for row in rows if row['id'] in live]
+
+
+def _add_to_summaries(totals):
+    """Adds {user_id: {field: amount}} onto the users' summaries: one read, one upsert."""
+    if not totals:
+        return
+    current = {
+        row['user_id']: row
+        for row in ArchiveSummary.objects.select_for_update().filter(user_id__in=totals).values('user_id', *SUMMARY_FIELDS)
+    }
+    summaries = []
+    for user_id, added in totals.items():
+        values = current.get(user_id, {})
+        summaries.append(ArchiveSummary(
+            user_id=user_id,
+            **{field: values.get(field, 0) + added.get(field, 0) for field in SUMMARY_FIELDS},
+        ))
+    ArchiveSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*SUMMARY_FIELDS, 'updated_at'],
+    )
+
+
+# -----------------------------
+# Archived Totals
+# -----------------------------
+def get_archived_commission_total(user_id):
+    """The user's archived commissions (self + referral); zero when nothing is archived."""
+    summary = ArchiveSummary.objects.filter(user_id=user_id).first()
+    return summary.commission_total if summary else Decimal('0.00')
+
+
+def archived_commission_totals(user_ids):
+    """{(user_id, commission_type): archived total} for a batch of users, in one query."""
+    totals = {}
+    rows = ArchiveSummary.objects.filter(user_id__in=user_ids).values('user_id', *COMMISSION_TOTAL_FIELDS.values())
+    for row in rows:
+        for ctype, field in COMMISSION_TOTAL_FIELDS.items():
+            totals[(row['user_id'], ctype)] = row[field]
+    return totals
+
+
+# -----------------------------
+# Archived History (read-only)
+# -----------------------------
+def archived_tasks(user_id, after=None, limit=HISTORY_PAGE_SIZE):
+    """A page of the user's archived tasks, newest first. See paginate_history()."""
+    return paginate_history(ArchivedUserProductTask.objects.filter(user_id=user_id), after, limit)
+
+
+def archived_commissions(user_id, after=None, limit=HISTORY_PAGE_SIZE):
+    """A page of the user's archived commissions, newest first. See paginate_history()."""
+    return paginate_history(ArchivedCommission.objects.filter(user_id=user_id), after, limit)
+
+
+def paginate_history(rows, after=None, limit=HISTORY_PAGE_SIZE):
+    """
+    Keyset pagination over archived rows by descending id: pass a page's
+    next_cursor as `after` for the following (older) page. Each page reads
+    at most limit + 1 rows from the (user_id, id) index.
+    """
+    after = _parse_int(after)
+    limit = max(1, min(_parse_int(limit) or HISTORY_PAGE_SIZE, MAX_HISTORY_PAGE_SIZE))
+    if after is not None:
+        rows = rows.filter(id__lt=after)
+    page = list(rows.order_by('-id')[:limit + 1])
+    has_next = len(page) > limit
+    page = page[:limit]
+    return {
+        'items': page,
+        'next_cursor': page[-1].id if page and has_next else None,
+    }
+
+
+def _parse_int(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from archive.models import ArchivedCommission, ArchivedUserProductTask
+
+
+# -----------------------------
+# User Deletion
+# -----------------------------
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def purge_archived_history(sender, instance, **kwargs):
+    """Archived rows have no foreign keys, so they don't cascade; drop them here."""
+    ArchivedUserProductTask.objects.filter(user_id=instance.pk).delete()
+    ArchivedCommission.objects.filter(user_id=instance.pk).delete()
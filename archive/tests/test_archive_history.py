@@ -0,0 +1,198 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.services import admin_dashboard_queryset
+from archive import services as archive_services
+from archive.jobs import archive_history_job
+from archive.models import ArchiveRun, ArchiveSummary, ArchivedCommission, ArchivedUserProductTask
+from archive.routers import ArchiveRouter
+from archive.services import archive_cutoff, archive_history, archived_commissions, archived_tasks
+from balance.models import Wallet
+from commission.models import Commission
+from commission.utils import get_total_commission
+from jobs.registry import enqueue
+from jobs.tests.helpers import ResumableJobMixin
+from products.models import Product, UserProductTask, current_business_day
+
+User = get_user_model()
+
+
+class ArchiveHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='archive_user', phone='+9400001')
+        self.referrer = User.objects.create(username='archive_referrer', phone='+9400002')
+        self.product = Product.objects.create(name='A0', price=Decimal('5.00'))
+        self.cutoff = archive_cutoff(30)
+        self.old_day = self.cutoff - timedelta(days=5)
+        self.old_time = timezone.now() - timedelta(days=40)
+
+        self.old_tasks = [self.task(self.old_day, completed=n < 2) for n in range(3)]
+        self.recent_task = self.task(current_business_day(), completed=True)
+
+        self.old_commissions = [self.commission(self.user, '1.25'), self.commission(self.user, '2.00')]
+        self.old_referral = self.commission(self.referrer, '0.40', commission_type='referral')
+        self.keyed = self.commission(self.referrer, '0.60', commission_type='referral', idempotency_key='ref:1:2:3')
+        self.recent = Commission.objects.create(user=self.user, product_name='Product 9', amount=Decimal('3.00'))
+
+    def task(self, day, completed):
+        return UserProductTask.objects.create(user=self.user, product=self.product, is_completed=completed, business_day=day)
+
+    def commission(self, user, amount, **fields):
+        row = Commission.objects.create(user=user, product_name='Product 1', amount=Decimal(amount), **fields)
+        Commission.objects.filter(pk=row.pk).update(created_at=self.old_time)
+        return row
+
+    def test_old_rows_move_in_batches_and_totals_stay_put(self):
+        before = {u.id: get_total_commission(u) for u in (self.user, self.referrer)}
+
+        run = archive_history(self.cutoff, batch_size=2)
+
+        self.assertEqual((run.status, run.tasks_archived, run.commissions_archived), ('done', 3, 3))
+        self.assertEqual(list(UserProductTask.objects.values_list('id', flat=True)), [self.recent_task.id])
+        self.assertEqual(set(Commission.objects.values_list('id', flat=True)), {self.keyed.id, self.recent.id})
+        self.assertEqual(ArchivedUserProductTask.objects.count(), 3)
+        self.assertEqual(
+            set(ArchivedCommission.objects.values_list('id', flat=True)),
+            {c.id for c in self.old_commissions} | {self.old_referral.id},
+        )
+
+        summary = ArchiveSummary.objects.get(user=self.user)
+        self.assertEqual((summary.task_count, summary.completed_task_count, summary.commission_count), (3, 2, 2))
+        self.assertEqual(summary.self_commission_total, Decimal('3.25'))
+        self.assertEqual(ArchiveSummary.objects.get(user=self.referrer).referral_commission_total, Decimal('0.40'))
+
+        self.assertEqual({u.id: get_total_commission(u) for u in (self.user, self.referrer)}, before)
+        dashboard = {u.id: u.total_commission for u in admin_dashboard_queryset(User.objects.all())}
+        self.assertEqual(dashboard[self.user.id], Decimal('6.25'))
+        self.assertEqual(dashboard[self.referrer.id], Decimal('1.00'))
+
+    def test_reconcile_counts_archived_commissions(self):
+        Wallet.objects.create(user=self.user, product_commission=Decimal('6.25'))
+        Wallet.objects.create(user=self.referrer, referral_commission=Decimal('1.00'))
+        archive_history(self.cutoff)
+
+        out = StringIO()
+        call_command('reconcile_wallets', stdout=out)
+        self.assertIn('Checked 2 wallets, 0 with drift', out.getvalue())
+
+    def test_interrupted_run_resumes_without_double_counting(self):
+        # A crash after copying the first commission but before deleting it
+        first = self.old_commissions[0]
+        ArchivedCommission.objects.create(
+            id=first.id, user_id=first.user_id, product_name=first.product_name, amount=first.amount,
+            commission_type='self', created_at=self.old_time,
+        )
+        ArchiveRun.objects.create(cutoff=self.cutoff, last_task_id=self.old_tasks[1].id, tasks_archived=0)
+
+        run = archive_history(self.cutoff)
+
+        self.assertEqual(run.tasks_archived, 1)  # resumed after the saved cursor
+        summary = ArchiveSummary.objects.get(user=self.user)
+        self.assertEqual((summary.commission_count, summary.self_commission_total), (2, Decimal('3.25')))
+
+        with CaptureQueriesContext(connection) as ctx:
+            archive_history(self.cutoff)
+        self.assertEqual(len(ctx), 1)  # finished run: only the run lookup
+
+    def test_history_pages_newest_first(self):
+        archive_history(self.cutoff)
+        ids = sorted((t.id for t in self.old_tasks), reverse=True)
+
+        page = archived_tasks(self.user.id, limit=2)
+        self.assertEqual([t.id for t in page['items']], ids[:2])
+        self.assertEqual(page['next_cursor'], ids[1])
+
+        page = archived_tasks(self.user.id, after=page['next_cursor'], limit=2)
+        self.assertEqual([t.id for t in page['items']], ids[2:])
+        self.assertIsNone(page['next_cursor'])
+        self.assertEqual(archived_commissions(self.referrer.id)['items'][0].amount, Decimal('0.40'))
+
+    def test_history_view_is_scoped_to_the_user(self):
+        archive_history(self.cutoff)
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('archive:history', args=['commissions'])
+
+        data = client.get(url, {'limit': 1}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.old_commissions[1].id])
+        self.assertEqual(data['next_cursor'], self.old_commissions[1].id)
+
+        data = client.get(url, {'user': self.referrer.id}).json()
+        self.assertEqual({row['id'] for row in data['results']}, {c.id for c in self.old_commissions})
+        self.assertEqual(client.get(reverse('archive:history', args=['wallets'])).status_code, 404)
+        self.assertEqual(client.post(url).status_code, 405)
+
+        admin = User.objects.create_user(username='archive_admin', password='pass', role='admin')
+        client.force_login(admin)
+        data = client.get(url, {'user': self.referrer.id}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.old_referral.id])
+
+    def test_deleting_a_user_purges_their_archive(self):
+        archive_history(self.cutoff)
+        self.user.delete()
+
+        self.assertFalse(ArchivedUserProductTask.objects.exists())
+        self.assertEqual(list(ArchivedCommission.objects.values_list('id', flat=True)), [self.old_referral.id])
+
+    def test_command_dry_run_and_horizon(self):
+        out = StringIO()
+        call_command('archive_history', '--horizon-days', '30', '--dry-run', stdout=out)
+        self.assertIn(f'Would archive before {self.cutoff}: 3 tasks, 3 commissions', out.getvalue())
+        self.assertFalse(ArchiveRun.objects.exists())
+
+        call_command('archive_history', '--horizon-days', '30', stdout=out)
+        self.assertIn('3 tasks, 3 commissions (status: done)', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('archive_history', '--horizon-days', '0')
+
+
+class ArchiveJobTests(ResumableJobMixin, TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='archive_job_user', phone='+9400101')
+        product = Product.objects.create(name='AJ', price=Decimal('5.00'))
+        self.cutoff = archive_cutoff(30)
+        self.tasks = [
+            UserProductTask.objects.create(user=self.user, product=product, business_day=self.cutoff - timedelta(days=2))
+            for _ in range(3)
+        ]
+
+    def test_worker_commits_each_batch_and_resumes(self):
+        job = enqueue(archive_history_job, {'cutoff': self.cutoff.isoformat(), 'batch_size': 1})
+        self.run_with_failing_chunk(job, archive_services, '_delete_live_rows', fail_on=2)
+
+        run = ArchiveRun.objects.get(cutoff=self.cutoff)
+        self.assertEqual((run.status, run.last_task_id, run.tasks_archived), ('running', self.tasks[0].id, 1))
+        self.assertEqual(UserProductTask.objects.count(), 2)
+        self.assertEqual(ArchiveSummary.objects.get(user=self.user).task_count, 1)
+
+        self.resume(job)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.tasks_archived), ('done', 3))
+        self.assertFalse(UserProductTask.objects.exists())
+        self.assertEqual(ArchiveSummary.objects.get(user=self.user).task_count, 3)
+
+
+class ArchiveRouterTests(TestCase):
+    def test_archived_rows_follow_the_archive_alias(self):
+        router = ArchiveRouter()
+        with override_settings(ARCHIVE_DATABASE='archive'):
+            self.assertEqual(router.db_for_read(ArchivedCommission), 'archive')
+            self.assertEqual(router.db_for_write(ArchivedUserProductTask), 'archive')
+            self.assertIsNone(router.db_for_write(ArchiveSummary))
+            self.assertTrue(router.allow_migrate('archive', 'archive', 'archivedcommission'))
+            self.assertFalse(router.allow_migrate('default', 'archive', 'archivedcommission'))
+            self.assertFalse(router.allow_migrate('archive', 'archive', 'archivesummary'))
+            self.assertFalse(router.allow_migrate('archive', 'products', 'product'))
+            self.assertIsNone(router.allow_migrate('default', 'products', 'product'))
+
+        self.assertEqual(router.db_for_read(ArchivedCommission), 'default')
+        self.assertIsNone(router.allow_migrate('default', 'archive', 'archivedcommission'))
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = "archive"
+
+urlpatterns = [
+    # Read-only archived history: ?after=<cursor>&limit=<n> (&user=<id> for admins)
+    path('history/<str:kind>/', views.archived_history, name='history'),
+]
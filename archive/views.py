@@ -0,0 +1,46 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+
+from archive.services import archived_commissions, archived_tasks
+
+# kind -> (page function, fields returned per row)
+HISTORY_KINDS = {
+    'tasks': (
+        archived_tasks,
+        ('id', 'product_id', 'task_number', 'is_completed', 'business_day', 'created_at', 'completed_at'),
+    ),
+    'commissions': (
+        archived_commissions,
+        ('id', 'product_name', 'amount', 'commission_type', 'triggered_by_id', 'created_at'),
+    ),
+}
+
+
+def is_admin(user):
+    return user.is_authenticated and user.role in ["admin", "superadmin"]
+
+
+# -----------------------------
+# Archived History API
+# -----------------------------
+@login_required
+@require_GET
+def archived_history(request, kind):
+    """
+    One page of archived tasks or commissions as JSON, newest first.
+    Users see their own history; admins may pass ?user=<id>.
+    """
+    if kind not in HISTORY_KINDS:
+        raise Http404("Unknown history kind")
+    page_for, fields = HISTORY_KINDS[kind]
+
+    user_id = request.user.id
+    if is_admin(request.user) and request.GET.get('user', '').isdigit():
+        user_id = int(request.GET['user'])
+
+    page = page_for(user_id, after=request.GET.get('after'), limit=request.GET.get('limit'))
+    return JsonResponse({
+        'results': [{field: getattr(row, field) for field in fields} for row in page['items']],
+        'next_cursor': page['next_cursor'],
+    })
@@ -0,0 +1,44 @@
+from balance.models import Voucher
+from balance.services import approve_recharge, delete_vouchers, reject_recharge
+from balance.vouchers import make_voucher_thumbnail
+from jobs.registry import job
+
+
+# -----------------------------
+# Voucher Review Jobs
+# -----------------------------
+@job('balance.approve_voucher')
+def approve_voucher_job(voucher_id):
+    """Approves the voucher's recharge, then deletes the voucher and its file."""
+    _review_voucher(voucher_id, approve_recharge)
+
+
+@job('balance.reject_voucher')
+def reject_voucher_job(voucher_id):
+    """Rejects the voucher's recharge, then deletes the voucher and its file."""
+    _review_voucher(voucher_id, reject_recharge)
+
+
+def _review_voucher(voucher_id, review):
+    voucher = Voucher.objects.select_related('recharge_request__user').filter(pk=voucher_id).first()
+    if voucher is None:
+        return  # already handled by an earlier run
+
+    try:
+        review(voucher.recharge_request)
+    except ValueError:
+        pass  # processed by an earlier attempt or another admin; just clean up
+
+    delete_vouchers([voucher.recharge_request_id])
+
+
+# -----------------------------
+# Voucher Thumbnail Job
+# -----------------------------
+@job('balance.voucher_thumbnail')
+def voucher_thumbnail_job(voucher_id):
+    """Renders the dashboard thumbnail for a newly uploaded voucher."""
+    voucher = Voucher.objects.filter(pk=voucher_id).first()
+    if voucher is None or not voucher.file or voucher.thumbnail:
+        return
+    make_voucher_thumbnail(voucher)
@@ -0,0 +1,157 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from balance.models import LedgerEntry, Wallet, WalletSnapshot
+
+# Wallet fields the ledger tracks; each LedgerEntry holds a delta for each
+LEDGER_FIELDS = ("current_balance", "product_commission", "referral_commission", "cumulative_total")
+CENT = Decimal("0.01")
+SNAPSHOT_EVERY = 100
+SNAPSHOT_BATCH_SIZE = 500
+# Entries younger than this may belong to transactions still in flight
+SNAPSHOT_SETTLE = timedelta(minutes=5)
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+def sum_movements(movements):
+    """Total {field: delta} of [(entry_type, {field: delta}), ...]."""
+    totals = {}
+    for _, deltas in movements:
+        for field, delta in deltas.items():
+            totals[field] = totals.get(field, Decimal("0.00")) + Decimal(delta)
+    return totals
+
+
+def ledger_entries(user_id, movements, reference=""):
+    """Unsaved LedgerEntry rows for [(entry_type, {field: delta}), ...]."""
+    now = timezone.now()
+    return [
+        LedgerEntry(user_id=user_id, entry_type=entry_type, reference=reference, created_at=now, **deltas)
+        for entry_type, deltas in movements
+    ]
+
+
+def record_movements(user_id, movements, reference=""):
+    """Appends the movements' entries with one INSERT."""
+    return LedgerEntry.objects.bulk_create(ledger_entries(user_id, movements, reference))
+
+
+# -----------------------------
+# Historical Balances
+# -----------------------------
+def balance_at(user, at=None):
+    """
+    The user's wallet totals ({field: amount}) as of `at` (default: now):
+    the newest snapshot at or before `at` plus the entries after it, so
+    the work is bounded by the snapshot interval, not the user's history.
+    Snapshots only cover settled entries (see snapshot_wallets), so no
+    entry below a snapshot's last_entry_id can still be uncommitted.
+    """
+    user_id = getattr(user, "pk", user)
+    at = at or timezone.now()
+    snapshot = (
+        WalletSnapshot.objects.filter(user_id=user_id, as_of__lte=at)
+        .order_by("-as_of", "-last_entry_id")
+        .values("last_entry_id", *LEDGER_FIELDS)
+        .first()
+    )
+    last_entry_id = snapshot["last_entry_id"] if snapshot else 0
+
+    deltas = LedgerEntry.objects.filter(user_id=user_id, id__gt=last_entry_id, created_at__lte=at).aggregate(
+        **{field: Sum(field) for field in LEDGER_FIELDS}
+    )
+    # SQLite sums decimals as floats; the columns are cents
+    return {
+        field: ((snapshot[field] if snapshot else Decimal("0.00")) + (deltas[field] or Decimal("0.00"))).quantize(CENT)
+        for field in LEDGER_FIELDS
+    }
+
+
+# -----------------------------
+# Snapshots
+# -----------------------------
+def snapshot_wallets(every=SNAPSHOT_EVERY, batch_size=SNAPSHOT_BATCH_SIZE, settle=SNAPSHOT_SETTLE):
+    """
+    Takes a WalletSnapshot for every user with at least `every` entries
+    since their last one, batch_size wallets at a time. Each snapshot is
+    the previous one plus one grouped aggregate over the newer entries.
+    Returns the number of snapshots taken.
+
+    Ids are handed out at INSERT, not COMMIT, so a concurrent writer can
+    commit an entry below an id a snapshot already covers; balance_at
+    would then skip it for good. Snapshots therefore stop below the
+    oldest entry younger than `settle` (longer than any transaction).
+    """
+    boundary = _settled_boundary(settle)
+    taken = 0
+    last_id = 0
+    while True:
+        wallets = list(
+            Wallet.objects.filter(id__gt=last_id).order_by("id").values_list("id", "user_id")[:batch_size]
+        )
+        if not wallets:
+            break
+        last_id = wallets[-1][0]
+        taken += _snapshot_batch([user_id for _, user_id in wallets], every, boundary)
+    return taken
+
+
+def _settled_boundary(settle):
+    """Lowest entry id that is not yet settled; every id below it is committed."""
+    unsettled = LedgerEntry.objects.filter(created_at__gt=timezone.now() - settle).aggregate(first=Min("id"))["first"]
+    if unsettled is not None:
+        return unsettled
+    return (LedgerEntry.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+
+@transaction.atomic
+def _snapshot_batch(user_ids, every, boundary):
+    """
+    One grouped aggregate over settled entries (id < boundary) newer than
+    each user's latest snapshot, one read, one INSERT.
+    """
+    newest = WalletSnapshot.objects.filter(user_id=OuterRef("user_id")).order_by("-last_entry_id")
+    pending = list(
+        LedgerEntry.objects.filter(user_id__in=user_ids, id__lt=boundary)
+        .annotate(after=Coalesce(Subquery(newest.values("last_entry_id")[:1]), Value(0), output_field=IntegerField()))
+        .filter(id__gt=F("after"))
+        .values("user_id")
+        .annotate(
+            count=Count("id"),
+            last_entry_id=Max("id"),
+            as_of=Max("created_at"),
+            **{f"delta_{field}": Sum(field) for field in LEDGER_FIELDS},
+        )
+        .filter(count__gte=every)
+        .order_by()
+    )
+    if not pending:
+        return 0
+
+    previous = {
+        snap.user_id: snap
+        for snap in WalletSnapshot.objects.filter(
+            user_id__in=[row["user_id"] for row in pending], id=Subquery(newest.values("id")[:1])
+        )
+    }
+    snapshots = []
+    for row in pending:
+        prev = previous.get(row["user_id"])
+        snapshots.append(WalletSnapshot(
+            user_id=row["user_id"],
+            last_entry_id=row["last_entry_id"],
+            as_of=row["as_of"],
+            entry_count=row["count"],
+            **{
+                field: ((getattr(prev, field) if prev else Decimal("0.00")) + row[f"delta_{field}"]).quantize(CENT)
+                for field in LEDGER_FIELDS
+            },
+        ))
+    WalletSnapshot.objects.bulk_create(snapshots)
+    return len(snapshots)
@@ -0,0 +1,138 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from archive.services import archived_commission_totals
+from balance.ledger import LEDGER_FIELDS
+from balance.models import LedgerEntry, Wallet
+from balance.reconcile import RECONCILE_CHUNK_SIZE, stream_totals
+from balance.services import adjust_wallet
+from commission.models import Commission
+
+# Commission type -> wallet field it accumulates into
+COMMISSION_FIELDS = {
+    'self': 'product_commission',
+    'referral': 'referral_commission',
+}
+# Ledger entries that move commission buckets outside the Commission table:
+# withdrawals drain them (debit_withdrawal), refunds would put money back
+PAYOUT_ENTRY_TYPES = ('withdrawal', 'refund')
+
+
+class Command(BaseCommand):
+    help = (
+        'Verify wallet totals in batches and report drift: commission buckets against the Commission '
+        'ledger, or (--ledger) all four totals against a replay of the balance ledger'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Wallets checked per pass')
+        parser.add_argument(
+            '--chunk-size', type=int, default=RECONCILE_CHUNK_SIZE, help='Source rows streamed per database fetch'
+        )
+        parser.add_argument(
+            '--ledger', action='store_true', help='Replay LedgerEntry rows and check every wallet total'
+        )
+        parser.add_argument('--fix', action='store_true', help='Rewrite drifted totals from the ledger')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.chunk_size = options['chunk_size']
+        fields = LEDGER_FIELDS if options['ledger'] else tuple(COMMISSION_FIELDS.values())
+        expected_totals = self.ledger_replay if options['ledger'] else self.ledger_totals
+        fix_wallet = self.set_wallet if options['ledger'] else self.fix_wallet
+        checked = drifted = 0
+        last_id = 0
+
+        while True:
+            wallets = list(
+                Wallet.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values('id', 'user_id', *fields)[:batch_size]
+            )
+            if not wallets:
+                break
+            last_id = wallets[-1]['id']
+
+            expected = expected_totals([w['user_id'] for w in wallets])
+            for wallet in wallets:
+                checked += 1
+                drift = {
+                    field: (wallet[field], expected.get((wallet['user_id'], field), Decimal('0.00')))
+                    for field in fields
+                    if wallet[field] != expected.get((wallet['user_id'], field), Decimal('0.00'))
+                }
+                if not drift:
+                    continue
+                drifted += 1
+                details = ', '.join(f"{field}: wallet={actual} ledger={ledger}" for field, (actual, ledger) in drift.items())
+                self.stdout.write(f"user {wallet['user_id']}: {details}")
+                if options['fix']:
+                    fix_wallet(wallet['user_id'], drift)
+
+        summary = f"Checked {checked} wallets, {drifted} with drift"
+        if drifted and options['fix']:
+            summary += ' (fixed)'
+        self.stdout.write(self.style.WARNING(summary) if drifted else self.style.SUCCESS(summary))
+
+    def ledger_totals(self, user_ids):
+        """
+        Per (user, wallet field) Commission sums for one batch: the batch's
+        rows streamed per commission type, plus archived totals, plus the
+        withdrawal/refund ledger deltas on each commission bucket (money
+        paid out of a bucket is not drift).
+        """
+        archived = archived_commission_totals(user_ids)
+        totals = {}
+        for ctype, field in COMMISSION_FIELDS.items():
+            rows = Commission.objects.filter(user_id__in=user_ids, commission_type=ctype).values_list('user_id', 'amount')
+            for user_id, (total,) in stream_totals(rows, self.chunk_size).items():
+                totals[(user_id, field)] = total
+            for (user_id, archived_type), total in archived.items():
+                if archived_type == ctype:
+                    totals[(user_id, field)] = totals.get((user_id, field), Decimal('0.00')) + total
+
+        fields = tuple(COMMISSION_FIELDS.values())
+        payouts = LedgerEntry.objects.filter(user_id__in=user_ids, entry_type__in=PAYOUT_ENTRY_TYPES).values_list(
+            'user_id', *fields
+        )
+        for user_id, sums in stream_totals(payouts, self.chunk_size).items():
+            for field, delta in zip(fields, sums):
+                totals[(user_id, field)] = totals.get((user_id, field), Decimal('0.00')) + delta
+        return totals
+
+    def ledger_replay(self, user_ids):
+        """Per (user, wallet field) sums of the batch's LedgerEntry rows, streamed in id order."""
+        rows = LedgerEntry.objects.filter(user_id__in=user_ids).order_by('id').values_list('user_id', *LEDGER_FIELDS)
+        return {
+            (user_id, field): total
+            for user_id, sums in stream_totals(rows, self.chunk_size).items()
+            for field, total in zip(LEDGER_FIELDS, sums)
+        }
+
+    @transaction.atomic
+    def fix_wallet(self, user_id, drift):
+        """
+        Moves drifted buckets to the ledger value and shifts cumulative_total
+        by the same delta, leaving recharges counted in it untouched. The
+        correction is applied as deltas and recorded as a ledger adjustment.
+        """
+        deltas = {field: ledger - actual for field, (actual, ledger) in drift.items()}
+        adjust_wallet(
+            user_id,
+            entry_type='adjustment',
+            reference='reconcile_wallets',
+            cumulative_total=sum(deltas.values(), Decimal('0.00')),
+            **deltas,
+        )
+
+    def set_wallet(self, user_id, drift):
+        """
+        The balance ledger is the record: moves the wallet row onto its
+        replay without a new entry. Applied as deltas, so movements made
+        since the check are kept.
+        """
+        Wallet.objects.filter(user_id=user_id).update(
+            **{field: F(field) + (ledger - actual) for field, (actual, ledger) in drift.items()}
+        )
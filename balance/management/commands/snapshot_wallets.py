@@ -0,0 +1,26 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+
+from balance.ledger import SNAPSHOT_BATCH_SIZE, SNAPSHOT_EVERY, SNAPSHOT_SETTLE, snapshot_wallets
+
+
+class Command(BaseCommand):
+    help = 'Snapshot wallet totals for users with at least N ledger entries since their last snapshot (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=SNAPSHOT_EVERY, help='Entries between snapshots')
+        parser.add_argument('--batch-size', type=int, default=SNAPSHOT_BATCH_SIZE, help='Wallets per transaction')
+        parser.add_argument(
+            '--settle-seconds', type=int, default=int(SNAPSHOT_SETTLE.total_seconds()),
+            help='Leave entries younger than this to the next run (longer than any transaction)'
+        )
+
+    def handle(self, *args, **options):
+        if options['every'] < 1:
+            raise CommandError("--every must be at least 1.")
+        taken = snapshot_wallets(
+            every=options['every'],
+            batch_size=options['batch_size'],
+            settle=timedelta(seconds=options['settle_seconds']),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Took {taken} wallet snapshots"))
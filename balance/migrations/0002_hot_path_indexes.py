@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('balance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rechargerequest',
+            index=models.Index(fields=['user', 'status'], name='recharge_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+LEDGER_FIELDS = ('current_balance', 'product_commission', 'referral_commission', 'cumulative_total')
+
+
+def open_ledgers(apps, schema_editor):
+    """One opening entry per existing wallet, so every wallet equals the sum of its entries."""
+    Wallet = apps.get_model('balance', 'Wallet')
+    LedgerEntry = apps.get_model('balance', 'LedgerEntry')
+    wallets = Wallet.objects.order_by('id').values('user_id', *LEDGER_FIELDS)
+    LedgerEntry.objects.bulk_create(
+        (
+            LedgerEntry(user_id=w['user_id'], entry_type='opening', reference='balance.0004', **{f: w[f] for f in LEDGER_FIELDS})
+            for w in wallets.iterator()
+            if any(w[f] for f in LEDGER_FIELDS)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('balance', '0003_voucher_ingestion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('opening', 'Opening Balance'), ('recharge', 'Recharge'), ('task_debit', 'Task Debit'), ('self_commission', 'Self Commission'), ('referral_commission', 'Referral Commission'), ('withdrawal', 'Withdrawal'), ('refund', 'Refund'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('current_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('product_commission', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('referral_commission', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('cumulative_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('reference', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'indexes': [models.Index(fields=['user', 'id'], name='ledger_user_id_idx'), models.Index(fields=['user', 'created_at'], name='ledger_user_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WalletSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.PositiveBigIntegerField()),
+                ('as_of', models.DateTimeField()),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('current_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('product_commission', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('referral_commission', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('cumulative_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wallet_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'as_of'], name='snapshot_user_as_of_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('balance', '0004_balance_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['created_at', 'id'], name='ledger_date_id_idx'),
+        ),
+    ]
@@ -3,6 +3,7 @@
 from django.db import models
 from decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -25,10 +26,10 @@ class Wallet(models.Model):
         """
         Adds recharge to current_balance and cumulative_total
         """
-        amount = Decimal(amount)
-        self.current_balance += amount
-        self.cumulative_total += amount
-        self.save()
+        from balance.services import credit_wallet
+
+        credit_wallet(self.user_id, amount, balance_type="current")
+        self.refresh_from_db(fields=['current_balance', 'cumulative_total'])
 
     
 
@@ -36,9 +37,10 @@ class Wallet(models.Model):
         """
         Adds referral commission to the referrer WITHOUT affecting cumulative_total.
         """
-        amount = Decimal(amount)
-        self.referral_commission += amount
-        self.save(update_fields=['referral_commission'])
+        from balance.services import adjust_wallet
+
+        adjust_wallet(self.user_id, entry_type="referral_commission", referral_commission=amount)
+        self.refresh_from_db(fields=['referral_commission'])
 
 
     
@@ -46,12 +48,11 @@ class Wallet(models.Model):
         """
         Deducts from current balance only
         """
-        amount = Decimal(amount)
-        if self.current_balance >= amount:
-            self.current_balance -= amount
-            self.save()
-            return True
-        return False
+        from balance.services import debit_wallet
+
+        spent = debit_wallet(self.user_id, amount, balance_type="current")
+        self.refresh_from_db(fields=['current_balance'])
+        return spent
     
     def add_product_commission(self, amount):
         """
@@ -59,18 +60,89 @@ class Wallet(models.Model):
         - Updates product_commission
         - Updates cumulative_total (lifetime earnings)
         """
-        amount = Decimal(amount)
-        self.product_commission += amount
-        self.cumulative_total += amount
-        self.save(update_fields=['product_commission', 'cumulative_total'])
+        from balance.services import credit_wallet
 
+        credit_wallet(self.user_id, amount, balance_type="product_commission")
+        self.refresh_from_db(fields=['product_commission', 'cumulative_total'])
 
 
 
 
-    
-    
+# -----------------------------
+# Balance Ledger
+# -----------------------------
+class LedgerEntry(models.Model):
+    """
+    One signed balance movement, appended in the same transaction as the
+    Wallet UPDATE it explains (see balance.services.adjust_wallet). Each
+    column is the delta applied to the Wallet field of the same name, so
+    a wallet equals the sum of its entries; rows are never changed.
+    """
+    ENTRY_TYPES = [
+        ("opening", "Opening Balance"),
+        ("recharge", "Recharge"),
+        ("task_debit", "Task Debit"),
+        ("self_commission", "Self Commission"),
+        ("referral_commission", "Referral Commission"),
+        ("withdrawal", "Withdrawal"),
+        ("refund", "Refund"),
+        ("adjustment", "Adjustment"),
+    ]
 
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ledger_entries")
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES)
+    current_balance = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    product_commission = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    referral_commission = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    cumulative_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    reference = models.CharField(max_length=100, blank=True, default="")  # e.g. "recharge:12"
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Ledger Entry"
+        verbose_name_plural = "Ledger Entries"
+        indexes = [
+            # Entries after a snapshot (snapshot + delta reads)
+            models.Index(fields=["user", "id"], name="ledger_user_id_idx"),
+            # Per-user statements by date
+            models.Index(fields=["user", "created_at"], name="ledger_user_date_idx"),
+            # Settled-entry boundary for snapshots (entries younger than the window)
+            models.Index(fields=["created_at", "id"], name="ledger_date_id_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Ledger entries are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.entry_type} - {self.created_at}"
+
+
+class WalletSnapshot(models.Model):
+    """
+    A user's wallet totals as of ledger entry last_entry_id (inclusive),
+    taken by manage.py snapshot_wallets every N entries. A balance at any
+    time is the newest snapshot before it plus the entries after it.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="wallet_snapshots")
+    last_entry_id = models.PositiveBigIntegerField()
+    as_of = models.DateTimeField()  # created_at of the newest entry included
+    entry_count = models.PositiveIntegerField(default=0)  # entries since the previous snapshot
+    current_balance = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    product_commission = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    referral_commission = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    cumulative_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Newest snapshot at or before a timestamp
+            models.Index(fields=["user", "as_of"], name="snapshot_user_as_of_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.as_of}"
 
 
 # -----------------------------
@@ -87,6 +159,15 @@ class RechargeRequest(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
+    # SHA-256 of the uploaded voucher; kept after the voucher is deleted so
+    # the same proof of payment can't back a second recharge
+    voucher_hash = models.CharField(max_length=64, null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            # Pending recharges per user (dashboards, approval queue)
+            models.Index(fields=["user", "status"], name="recharge_user_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.amount} - {self.status}"
@@ -98,6 +179,10 @@ class RechargeRequest(models.Model):
 class Voucher(models.Model):
     recharge_request = models.OneToOneField(RechargeRequest, on_delete=models.CASCADE)
     file = models.FileField(upload_to="vouchers/")
+    # Small JPEG for the admin dashboard, generated by the job worker
+    thumbnail = models.ImageField(upload_to="vouchers/thumbs/", blank=True)
+    content_type = models.CharField(max_length=50, blank=True)  # sniffed, not client-supplied
+    size = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
         return f"Voucher for {self.recharge_request.user.username} - {self.recharge_request.amount}"
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # optional: grouping falls back to plain Python
+    np = None
+
+CENT = Decimal("0.01")
+RECONCILE_CHUNK_SIZE = 2000
+
+
+# -----------------------------
+# Streamed Per-user Totals
+# -----------------------------
+def stream_totals(rows, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Sums a values_list queryset of (user_id, amount, ...) rows per user.
+    Rows are streamed with .iterator(chunk_size) and folded a chunk at a
+    time (NumPy grouping when available), in integer cents so the sums are
+    exact. Memory is one chunk plus one total per user, whatever the
+    table size. Returns {user_id: [Decimal, ...]} (one per amount column).
+    """
+    totals = {}
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _fold(totals, chunk)
+            chunk = []
+    if chunk:
+        _fold(totals, chunk)
+    return {
+        user_id: [(Decimal(cents) * CENT).quantize(CENT) for cents in sums]
+        for user_id, sums in totals.items()
+    }
+
+
+def _cents(amount):
+    return int((amount or 0) * 100)
+
+
+def _fold(totals, chunk):
+    """Adds one chunk's per-user cent sums into totals ({user_id: [int, ...]})."""
+    width = len(chunk[0]) - 1
+    if np is None:
+        for user_id, *amounts in chunk:
+            sums = totals.setdefault(user_id, [0] * width)
+            for i, amount in enumerate(amounts):
+                sums[i] += _cents(amount)
+        return
+
+    users = np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk))
+    cents = np.array([[_cents(a) for a in row[1:]] for row in chunk], dtype=np.int64).reshape(len(chunk), width)
+    user_ids, inverse = np.unique(users, return_inverse=True)
+    grouped = np.zeros((len(user_ids), width), dtype=np.int64)
+    np.add.at(grouped, inverse, cents)
+    for user_id, row in zip(user_ids.tolist(), grouped.tolist()):
+        sums = totals.setdefault(user_id, [0] * width)
+        for i, value in enumerate(row):
+            sums[i] += value
@@ -1,6 +1,9 @@
 from decimal import Decimal
 from django.db import transaction
-from balance.models import Wallet, RechargeRequest, Voucher, RechargeHistory
+from django.db.models import Case, DecimalField, F, Value, When
+from balance.ledger import ledger_entries, record_movements, sum_movements
+from balance.models import LedgerEntry, Wallet, RechargeRequest, Voucher, RechargeHistory
+from balance.vouchers import ingest_voucher
 
 # -----------------------------
 # Wallet Utilities
@@ -18,48 +21,120 @@ def get_wallet_balance(user):
     wallet = get_wallet(user)
     return wallet.current_balance + wallet.product_commission + wallet.referral_commission
 
+# -----------------------------
+# Wallet Mutations
+# -----------------------------
+# balance_type -> Wallet field
+WALLET_BALANCE_FIELDS = {
+    "current": "current_balance",
+    "product_commission": "product_commission",
+    "referral_commission": "referral_commission",
+}
+
+# balance_type -> ledger entry type of a credit to it
+CREDIT_ENTRY_TYPES = {
+    "current": "recharge",
+    "product_commission": "self_commission",
+    "referral_commission": "referral_commission",
+}
+
+def adjust_wallet(user, guard=None, entry_type="adjustment", reference="", movements=None, **deltas):
+    """
+    Applies deltas to the user's wallet in a single UPDATE
+    (field = field + delta), so concurrent writers never lose updates,
+    and appends the matching LedgerEntry in the same transaction.
+    guard: optional {field: amount}; the update only happens while
+    field >= amount, which makes "check balance then spend" atomic.
+    movements: optional [(entry_type, {field: delta}), ...] when one update
+    is several ledger entries (a task's debit and its commission); the
+    deltas are then their sum.
+    Creates the wallet if missing. Returns True if the row was updated.
+    """
+    if movements is None:
+        movements = [(entry_type, deltas)]
+    else:
+        deltas = sum_movements(movements)
+    wallets = Wallet.objects.filter(user=user)
+    for field, amount in (guard or {}).items():
+        wallets = wallets.filter(**{f"{field}__gte": amount})
+    changes = {field: F(field) + Decimal(delta) for field, delta in deltas.items()}
+
+    with transaction.atomic(savepoint=False):
+        updated = wallets.update(**changes) == 1
+        if not updated and not Wallet.objects.filter(user=user).exists():
+            get_wallet(user)
+            updated = wallets.update(**changes) == 1
+        if updated:
+            record_movements(getattr(user, "pk", user), movements, reference)
+    return updated
+
+def credit_wallet(user, amount, balance_type="current", entry_type=None, reference=""):
+    """Adds amount to a balance and to the lifetime cumulative_total."""
+    amount = Decimal(amount)
+    return adjust_wallet(
+        user,
+        entry_type=entry_type or CREDIT_ENTRY_TYPES[balance_type],
+        reference=reference,
+        **{WALLET_BALANCE_FIELDS[balance_type]: amount, "cumulative_total": amount},
+    )
+
+def debit_wallet(user, amount, balance_type="current", entry_type="adjustment", reference=""):
+    """Subtracts amount from a balance unless that would take it below zero."""
+    field = WALLET_BALANCE_FIELDS[balance_type]
+    amount = Decimal(amount)
+    return adjust_wallet(user, guard={field: amount}, entry_type=entry_type, reference=reference, **{field: -amount})
+
+# Buckets a withdrawal drains, in order; together they are get_wallet_balance()
+WITHDRAWAL_FIELDS = ("referral_commission", "product_commission", "current_balance")
+
+def debit_withdrawal(user, amount, reference=""):
+    """
+    Takes amount out of the whole balance (get_wallet_balance): referral
+    commission first, then product commission, then current_balance.
+    One guarded UPDATE and one "withdrawal" ledger entry with a delta per
+    bucket. Returns False if the buckets don't cover it (or no longer do).
+    """
+    amount = Decimal(amount)
+    if amount <= 0:
+        return False
+    wallet = get_wallet(user)
+    deltas = {}
+    remaining = amount
+    for field in WITHDRAWAL_FIELDS:
+        take = min(remaining, max(getattr(wallet, field), Decimal("0.00")))
+        if take > 0:
+            deltas[field] = -take
+            remaining -= take
+    if remaining > 0:
+        return False
+    return adjust_wallet(
+        user,
+        guard={field: -delta for field, delta in deltas.items()},
+        entry_type="withdrawal",
+        reference=reference,
+        **deltas,
+    )
+
 @transaction.atomic
-def update_wallet(user, amount, action="add", balance_type="current"):
+def update_wallet(user, amount, action="add", balance_type="current", entry_type=None, reference=""):
     """
     Generic wallet update
     balance_type: current, product_commission, referral_commission
     action: add or subtract
+    entry_type: ledger entry type (default: by balance_type for credits,
+    "adjustment" for debits)
+    Returns the refreshed wallet, or False if the subtraction would overdraw.
     """
-    wallet = get_wallet(user)
-    amount = Decimal(amount)
-
-    if balance_type == "current":
-        if action == "add":
-            wallet.current_balance += amount
-            wallet.cumulative_total += amount
-        elif action == "subtract":
-            if wallet.current_balance >= amount:
-                wallet.current_balance -= amount
-            else:
-                return False
-    elif balance_type == "product_commission":
-        if action == "add":
-            wallet.product_commission += amount
-            wallet.cumulative_total += amount
-        elif action == "subtract":
-            if wallet.product_commission >= amount:
-                wallet.product_commission -= amount
-            else:
-                return False
-    elif balance_type == "referral_commission":
-        if action == "add":
-            wallet.referral_commission += amount
-            wallet.cumulative_total += amount
-        elif action == "subtract":
-            if wallet.referral_commission >= amount:
-                wallet.referral_commission -= amount
-            else:
-                return False
-    else:
+    field = WALLET_BALANCE_FIELDS.get(balance_type)
+    if field is None or action not in ("add", "subtract"):
         return False
 
-    wallet.save(update_fields=["current_balance", "product_commission", "referral_commission", "cumulative_total"])
-    return wallet
+    amount = Decimal(amount)
+    if action == "add":
+        credit_wallet(user, amount, balance_type, entry_type=entry_type, reference=reference)
+    elif not debit_wallet(user, amount, balance_type, entry_type=entry_type or "adjustment", reference=reference):
+        return False
+    return get_wallet(user)
 
 # -----------------------------
 # Recharge Utilities
@@ -82,14 +157,15 @@ def approve_recharge(recharge_request):
     - mark recharge approved
     - create RechargeHistory
     """
-    if recharge_request.status != "pending":
+    # Claim the request first so two admins can't both credit it
+    if not _transition_recharge(recharge_request, "approved"):
         raise ValueError("Recharge already processed")
 
     # Only current_balance updated, NO referral commission
-    update_wallet(recharge_request.user, recharge_request.amount, action="add", balance_type="current")
-
-    recharge_request.status = "approved"
-    recharge_request.save()
+    credit_wallet(
+        recharge_request.user, recharge_request.amount, balance_type="current",
+        reference=f"recharge:{recharge_request.pk}",
+    )
 
     RechargeHistory.objects.create(
         user=recharge_request.user,
@@ -105,12 +181,9 @@ def reject_recharge(recharge_request):
     - mark rejected
     - log in history
     """
-    if recharge_request.status != "pending":
+    if not _transition_recharge(recharge_request, "rejected"):
         raise ValueError("Recharge already processed")
 
-    recharge_request.status = "rejected"
-    recharge_request.save()
-
     RechargeHistory.objects.create(
         user=recharge_request.user,
         amount=recharge_request.amount,
@@ -118,16 +191,127 @@ def reject_recharge(recharge_request):
     )
     return recharge_request
 
+def _transition_recharge(recharge_request, status):
+    """Moves a pending request to status; False if it was already processed."""
+    updated = RechargeRequest.objects.filter(pk=recharge_request.pk, status="pending").update(status=status)
+    if updated:
+        recharge_request.status = status
+    return bool(updated)
+
 # -----------------------------
-# Voucher Utilities
+# Batch Recharge Approval
 # -----------------------------
+RECHARGE_BATCH_SIZE = 200
+
+def approve_recharges(recharge_ids, batch_size=RECHARGE_BATCH_SIZE):
+    """
+    Approves many recharge requests, one transaction per batch of
+    batch_size. Each batch costs a fixed number of queries however many
+    requests it holds (see _approve_recharge_batch).
+    Returns (approved_ids, failures) where failures maps id -> reason.
+    """
+    ids = list(dict.fromkeys(int(i) for i in recharge_ids))
+    approved, failures = [], {}
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        try:
+            batch_approved, batch_failures = _approve_recharge_batch(batch)
+        except _BatchConflict:
+            # Without row locks (SQLite) another admin got in between; redo
+            # the batch one request at a time, which reports exactly who lost
+            batch_approved, batch_failures = _approve_one_by_one(batch)
+        approved.extend(batch_approved)
+        failures.update(batch_failures)
+    return approved, failures
 
 @transaction.atomic
+def _approve_recharge_batch(ids):
+    """
+    - lock the pending requests, then claim them with one conditional UPDATE
+    - credit every wallet with one UPDATE (current_balance/cumulative_total
+      += the user's total, as a CASE per user)
+    - bulk_create the RechargeHistory and LedgerEntry rows and delete the
+      vouchers
+    """
+    requests = list(
+        RechargeRequest.objects.select_for_update().filter(pk__in=ids).only("id", "user_id", "amount", "status")
+    )
+    found = {r.id: r for r in requests}
+    failures = {i: "not found" for i in ids if i not in found}
+    pending = [r for r in requests if r.status == "pending"]
+    failures.update({r.id: "already processed" for r in requests if r.status != "pending"})
+    if not pending:
+        return [], failures
+
+    claimed = RechargeRequest.objects.filter(pk__in=[r.id for r in pending], status="pending").update(status="approved")
+    if claimed != len(pending):
+        raise _BatchConflict()  # rolls the whole batch back
+
+    totals = {}
+    for r in pending:
+        totals[r.user_id] = totals.get(r.user_id, Decimal("0.00")) + r.amount
+    Wallet.objects.bulk_create([Wallet(user_id=u) for u in totals], ignore_conflicts=True)
+    credit = Case(
+        *[When(user_id=u, then=Value(total)) for u, total in totals.items()],
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    Wallet.objects.filter(user_id__in=totals).update(
+        current_balance=F("current_balance") + credit,
+        cumulative_total=F("cumulative_total") + credit,
+    )
+
+    RechargeHistory.objects.bulk_create([
+        RechargeHistory(user_id=r.user_id, amount=r.amount, status="approved") for r in pending
+    ])
+    LedgerEntry.objects.bulk_create([
+        entry
+        for r in pending
+        for entry in ledger_entries(
+            r.user_id, [("recharge", {"current_balance": r.amount, "cumulative_total": r.amount})], f"recharge:{r.id}"
+        )
+    ])
+    delete_vouchers([r.id for r in pending])
+    return [r.id for r in pending], failures
+
+class _BatchConflict(Exception):
+    pass
+
+def _approve_one_by_one(ids):
+    approved, failures = [], {}
+    for recharge in RechargeRequest.objects.filter(pk__in=ids).select_related("user"):
+        try:
+            approve_recharge(recharge)
+        except ValueError as exc:
+            failures[recharge.id] = str(exc)
+        else:
+            approved.append(recharge.id)
+    failures.update({i: "not found" for i in ids if i not in approved and i not in failures})
+    delete_vouchers(approved)
+    return approved, failures
+
+# -----------------------------
+# Voucher Utilities
+# -----------------------------
+
+def delete_vouchers(recharge_ids):
+    """
+    Deletes the vouchers of the given recharge requests; their files and
+    thumbnails are removed once the transaction commits.
+    """
+    vouchers = Voucher.objects.filter(recharge_request_id__in=recharge_ids)
+    files = [
+        (f.storage, f.name) for v in vouchers.only("id", "file", "thumbnail") for f in (v.file, v.thumbnail) if f
+    ]
+    vouchers.delete()
+
+    def remove_files():
+        for storage, name in files:
+            storage.delete(name)
+    transaction.on_commit(remove_files)
+
 def upload_voucher(recharge_request, file):
     """
-    Upload or update voucher for recharge
+    Upload or update voucher for recharge (validated, hashed and
+    thumbnailed; see balance.vouchers.ingest_voucher)
     """
-    voucher, _ = Voucher.objects.get_or_create(recharge_request=recharge_request)
-    voucher.file = file
-    voucher.save()
-    return voucher
+    return ingest_voucher(recharge_request, file)
@@ -0,0 +1,79 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from balance.models import RechargeHistory, RechargeRequest, Voucher, Wallet
+from balance.services import approve_recharges
+
+User = get_user_model()
+
+
+class BulkRechargeApprovalTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f'bulk_user{i}', phone=f'+9000{i:02d}') for i in range(3)]
+        Wallet.objects.create(user=self.users[0], current_balance=Decimal('5.00'))
+
+    def make_recharges(self, amounts):
+        recharges = []
+        for i, amount in enumerate(amounts):
+            recharge = RechargeRequest.objects.create(user=self.users[i % 3], amount=Decimal(amount))
+            Voucher.objects.create(recharge_request=recharge, file='vouchers/v.jpg')
+            recharges.append(recharge)
+        return recharges
+
+    def test_approves_batch_and_credits_each_user_once(self):
+        recharges = self.make_recharges(['10.00', '20.00', '30.00', '1.50'])
+
+        approved, failures = approve_recharges([r.id for r in recharges])
+
+        self.assertEqual(sorted(approved), sorted(r.id for r in recharges))
+        self.assertEqual(failures, {})
+        self.assertEqual(Wallet.objects.get(user=self.users[0]).current_balance, Decimal('16.50'))
+        self.assertEqual(Wallet.objects.get(user=self.users[0]).cumulative_total, Decimal('11.50'))
+        self.assertEqual(Wallet.objects.get(user=self.users[2]).current_balance, Decimal('30.00'))
+        self.assertEqual(RechargeRequest.objects.filter(status='approved').count(), 4)
+        self.assertEqual(RechargeHistory.objects.filter(status='approved').count(), 4)
+        self.assertFalse(Voucher.objects.exists())
+
+    def test_reports_per_item_failures(self):
+        done, pending = self.make_recharges(['10.00', '20.00'])
+        RechargeRequest.objects.filter(pk=done.pk).update(status='rejected')
+
+        approved, failures = approve_recharges([done.id, pending.id, 999999])
+
+        self.assertEqual(approved, [pending.id])
+        self.assertEqual(failures, {done.id: 'already processed', 999999: 'not found'})
+        self.assertEqual(Wallet.objects.get(user=self.users[1]).current_balance, Decimal('20.00'))
+
+    def test_query_count_does_not_grow_with_batch(self):
+        small = self.make_recharges(['1.00'] * 3)
+        with CaptureQueriesContext(connection) as small_ctx:
+            approve_recharges([r.id for r in small])
+        large = self.make_recharges(['1.00'] * 30)
+        with CaptureQueriesContext(connection) as large_ctx:
+            approve_recharges([r.id for r in large])
+
+        self.assertEqual(len(small_ctx), len(large_ctx))
+
+    def test_batches_split_by_batch_size(self):
+        recharges = self.make_recharges(['2.00'] * 5)
+        approved, _ = approve_recharges([r.id for r in recharges], batch_size=2)
+        self.assertEqual(len(approved), 5)
+        self.assertEqual(Wallet.objects.get(user=self.users[0]).current_balance, Decimal('9.00'))
+
+    def test_endpoint_requires_admin_and_approves_selection(self):
+        recharges = self.make_recharges(['10.00', '20.00'])
+        url = reverse('balance:approve_recharges_bulk')
+        client = Client()
+
+        client.force_login(self.users[0])
+        client.post(url, {'recharge_ids': [r.id for r in recharges]})
+        self.assertFalse(RechargeRequest.objects.filter(status='approved').exists())
+
+        client.force_login(User.objects.create_user(username='bulk_admin', password='pass', role='admin'))
+        response = client.post(url, {'recharge_ids': [r.id for r in recharges]})
+        self.assertRedirects(response, reverse('accounts:admin_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(RechargeRequest.objects.filter(status='approved').count(), 2)
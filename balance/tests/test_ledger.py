@@ -0,0 +1,132 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from balance.ledger import LEDGER_FIELDS, balance_at, snapshot_wallets
+from balance.models import LedgerEntry, RechargeRequest, Wallet, WalletSnapshot
+from balance.services import approve_recharge, approve_recharges, credit_wallet, debit_wallet
+from commission.models import CommissionSetting
+from commission.service import complete_task
+from products.models import Product
+from wallet.models import UserWalletAddress, UserWithdrawal
+
+User = get_user_model()
+
+
+class BalanceLedgerTests(TestCase):
+    def setUp(self):
+        self.referrer = User.objects.create(username='ledger_referrer', phone='+9500001')
+        self.user = User.objects.create(username='ledger_user', phone='+9500002', referred_by=self.referrer)
+        CommissionSetting.objects.create(user=self.user, product_rate=Decimal('5.00'))
+        CommissionSetting.objects.create(user=self.referrer, referral_rate=Decimal('2.00'))
+
+    def wallet_totals(self, user):
+        return dict(Wallet.objects.filter(user=user).values(*LEDGER_FIELDS).get())
+
+    def test_every_movement_is_an_entry_and_wallet_equals_ledger(self):
+        approve_recharge(RechargeRequest.objects.create(user=self.user, amount=Decimal('100.00')))
+        approve_recharges([RechargeRequest.objects.create(user=self.referrer, amount=Decimal('20.00')).id])
+        complete_task(self.user, Product.objects.create(name='L0', price=Decimal('10.00')))
+        self.assertFalse(debit_wallet(self.user, Decimal('500.00')))  # refused: no entry
+
+        types = list(LedgerEntry.objects.filter(user=self.user).order_by('id').values_list('entry_type', flat=True))
+        self.assertEqual(types, ['recharge', 'task_debit', 'self_commission'])
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(user=self.referrer).order_by('id').values_list('entry_type', 'reference')),
+            [('recharge', f'recharge:{RechargeRequest.objects.get(user=self.referrer).id}'),
+             ('referral_commission', f'product:{Product.objects.get().id}')],
+        )
+        for user in (self.user, self.referrer):
+            self.assertEqual(balance_at(user), self.wallet_totals(user))
+        self.assertEqual(self.wallet_totals(self.user)['current_balance'], Decimal('90.00'))
+
+    def test_balance_at_uses_snapshot_plus_delta(self):
+        credit_wallet(self.user, Decimal('10.00'))
+        credit_wallet(self.user, Decimal('5.00'))
+        earlier = timezone.now() - timedelta(hours=2)
+        LedgerEntry.objects.filter(user=self.user).update(created_at=earlier)
+
+        self.assertEqual(snapshot_wallets(every=2), 1)
+        snapshot = WalletSnapshot.objects.get(user=self.user)
+        self.assertEqual((snapshot.current_balance, snapshot.entry_count, snapshot.as_of), (Decimal('15.00'), 2, earlier))
+        self.assertEqual(snapshot_wallets(every=2), 0)  # nothing new since
+
+        debit_wallet(self.user, Decimal('4.00'))
+        with self.assertNumQueries(2):
+            now = balance_at(self.user)
+        self.assertEqual(now, self.wallet_totals(self.user))
+        self.assertEqual(balance_at(self.user, earlier - timedelta(seconds=1))['current_balance'], Decimal('0.00'))
+        self.assertEqual(balance_at(self.user, earlier + timedelta(minutes=1))['current_balance'], Decimal('15.00'))
+
+        debit_wallet(self.user, Decimal('1.00'))
+        self.assertEqual(snapshot_wallets(every=2), 0)  # not settled yet
+        LedgerEntry.objects.filter(user=self.user, created_at__gt=earlier).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(snapshot_wallets(every=2), 1)
+        latest = WalletSnapshot.objects.filter(user=self.user).latest('last_entry_id')
+        self.assertEqual((latest.current_balance, latest.cumulative_total), (Decimal('10.00'), Decimal('15.00')))
+
+    def test_snapshots_stop_below_unsettled_entries(self):
+        for amount in ('1.00', '2.00', '4.00'):
+            credit_wallet(self.user, Decimal(amount))
+        first, late, last = LedgerEntry.objects.filter(user=self.user).order_by('id')
+        LedgerEntry.objects.filter(id__in=[first.id, last.id]).update(created_at=timezone.now() - timedelta(hours=1))
+        # `late` has a lower id than `last` but is still in flight (inside the settle window)
+
+        self.assertEqual(snapshot_wallets(every=1), 1)
+        snapshot = WalletSnapshot.objects.get(user=self.user)
+        self.assertEqual((snapshot.last_entry_id, snapshot.current_balance), (first.id, Decimal('1.00')))
+        self.assertEqual(balance_at(self.user)['current_balance'], Decimal('7.00'))
+
+        self.assertEqual(snapshot_wallets(every=1, settle=timedelta(0)), 1)
+        self.assertEqual(WalletSnapshot.objects.latest('last_entry_id').current_balance, Decimal('7.00'))
+
+    def test_entries_are_append_only(self):
+        credit_wallet(self.user, Decimal('1.00'))
+        entry = LedgerEntry.objects.get()
+        entry.current_balance = Decimal('99.00')
+        with self.assertRaises(ValueError):
+            entry.save()
+
+    def test_withdrawal_drains_commission_buckets_too(self):
+        credit_wallet(self.user, Decimal('10.00'))
+        credit_wallet(self.user, Decimal('1.00'), balance_type='product_commission')
+        credit_wallet(self.user, Decimal('0.50'), balance_type='referral_commission')
+        self.user.set_fund_password('1234')
+        UserWalletAddress.objects.create(user=self.user, address='TLedgerAddress', network='N/A')
+        client = Client()
+        client.force_login(self.user)
+
+        client.post(reverse('wallet:withdraw'), {'network': 'TRX-20', 'fund_password': '1234'})
+
+        self.assertEqual(UserWithdrawal.objects.get(user=self.user).amount.to_decimal(), Decimal('11.45'))
+        totals = self.wallet_totals(self.user)
+        self.assertEqual(
+            (totals['current_balance'], totals['product_commission'], totals['referral_commission']),
+            (Decimal('0.05'), Decimal('0.00'), Decimal('0.00')),
+        )
+        entry = LedgerEntry.objects.get(entry_type='withdrawal')
+        self.assertEqual(
+            (entry.current_balance, entry.product_commission, entry.referral_commission),
+            (Decimal('-9.95'), Decimal('-1.00'), Decimal('-0.50')),
+        )
+        self.assertEqual(balance_at(self.user), totals)
+
+    def test_rejected_withdrawal_is_refunded_once(self):
+        credit_wallet(self.user, Decimal('30.00'))
+        debit_wallet(self.user, Decimal('25.00'), entry_type='withdrawal')
+        withdrawal = UserWithdrawal.objects.create(user=self.user, amount=Decimal('25.00'), network='TRX-20')
+        admin = User.objects.create_user(username='ledger_admin', password='pass', role='admin')
+        client = Client()
+        client.force_login(admin)
+
+        url = reverse('wallet:reject_withdrawal', args=[withdrawal.id])
+        client.post(url)
+        client.post(url)
+
+        self.assertEqual(Wallet.objects.get(user=self.user).current_balance, Decimal('30.00'))
+        refund = LedgerEntry.objects.get(entry_type='refund')
+        self.assertEqual((refund.current_balance, refund.reference), (Decimal('25.00'), f'withdrawal:{withdrawal.id}'))
+        self.assertEqual(balance_at(self.user), self.wallet_totals(self.user))
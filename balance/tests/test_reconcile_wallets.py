@@ -0,0 +1,144 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from AmazonProject.money import Money
+from balance import reconcile
+from balance.models import LedgerEntry, Wallet
+from balance.services import credit_wallet, debit_wallet
+from commission.models import Commission, CommissionSetting
+from commission.service import complete_task
+from products.models import Product
+from wallet.models import UserWalletAddress, UserWithdrawal
+
+User = get_user_model()
+
+
+class ReconcileWalletsCommandTests(TestCase):
+    def setUp(self):
+        self.clean = User.objects.create(username='recon_clean', phone='+4000001')
+        self.drifted = User.objects.create(username='recon_drift', phone='+4000002')
+        for user in (self.clean, self.drifted):
+            Commission.objects.create(user=user, product_name='Product 1', amount=Decimal('2.00'), commission_type='self')
+            Commission.objects.create(user=user, product_name='Product 1', amount=Decimal('0.50'), commission_type='referral')
+
+        Wallet.objects.create(
+            user=self.clean, current_balance=Decimal('10.00'), product_commission=Decimal('2.00'),
+            referral_commission=Decimal('0.50'), cumulative_total=Decimal('12.50'),
+        )
+        Wallet.objects.create(
+            user=self.drifted, current_balance=Decimal('10.00'), product_commission=Decimal('3.00'),
+            referral_commission=Decimal('0.50'), cumulative_total=Decimal('13.50'),
+        )
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('reconcile_wallets', '--batch-size', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_drift_without_writing(self):
+        output = self.run_command()
+
+        self.assertIn(f'user {self.drifted.id}: product_commission: wallet=3.00 ledger=2.00', output)
+        self.assertNotIn(f'user {self.clean.id}:', output)
+        self.assertIn('Checked 2 wallets, 1 with drift', output)
+        self.assertEqual(Wallet.objects.get(user=self.drifted).product_commission, Decimal('3.00'))
+
+    def test_fix_rewrites_drifted_buckets(self):
+        self.run_command('--fix')
+
+        wallet = Wallet.objects.get(user=self.drifted)
+        self.assertEqual(wallet.product_commission, Decimal('2.00'))
+        self.assertEqual(wallet.cumulative_total, Decimal('12.50'))
+        self.assertIn('0 with drift', self.run_command())
+
+
+class LedgerReplayTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f'replay_user{i}', phone=f'+4100{i:02d}') for i in range(3)]
+        for user in self.users:
+            credit_wallet(user, Decimal('10.10'))
+            credit_wallet(user, Decimal('0.35'), balance_type='referral_commission')
+            debit_wallet(user, Decimal('4.05'), entry_type='task_debit')
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('reconcile_wallets', '--ledger', '--batch-size', '2', '--chunk-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_replay_matches_untouched_wallets(self):
+        self.assertIn('Checked 3 wallets, 0 with drift', self.run_command())
+
+    def test_replay_reports_and_fixes_out_of_band_writes(self):
+        Wallet.objects.filter(user=self.users[1]).update(current_balance=Decimal('50.00'))
+
+        output = self.run_command('--fix')
+
+        self.assertIn(f'user {self.users[1].id}: current_balance: wallet=50.00 ledger=6.05', output)
+        self.assertEqual(Wallet.objects.get(user=self.users[1]).current_balance, Decimal('6.05'))
+        self.assertEqual(LedgerEntry.objects.filter(user=self.users[1]).count(), 3)  # no entry added
+        self.assertIn('0 with drift', self.run_command())
+
+    def grouped_totals(self):
+        rows = LedgerEntry.objects.order_by('id').values_list('user_id', 'current_balance', 'cumulative_total')
+        return reconcile.stream_totals(rows, chunk_size=4)
+
+    def expected_totals(self):
+        return {user.id: [Decimal('6.05'), Decimal('10.45')] for user in self.users}
+
+    def test_grouping_is_exact_in_python(self):
+        with mock.patch.object(reconcile, 'np', None):
+            self.assertEqual(self.grouped_totals(), self.expected_totals())
+
+    @skipUnless(reconcile.np, 'NumPy not installed')
+    def test_grouping_is_exact_with_numpy(self):
+        self.assertEqual(self.grouped_totals(), self.expected_totals())
+
+
+class WithdrawalReconcileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='recon_withdraw', phone='+4200001')
+        self.user.set_fund_password('1234')
+        UserWalletAddress.objects.create(user=self.user, address='TReconAddress', network='N/A')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def withdraw(self):
+        self.client.post(reverse('wallet:withdraw'), {'network': 'TRX-20', 'fund_password': '1234'})
+        return UserWithdrawal.objects.get(user=self.user)
+
+    def test_withdraw_counts_commission_buckets(self):
+        credit_wallet(self.user, Decimal('0.03'))
+        credit_wallet(self.user, Decimal('0.10'), balance_type='product_commission')
+        credit_wallet(self.user, Decimal('2.37'), balance_type='referral_commission')
+
+        self.assertEqual(self.withdraw().amount, Money.from_decimal('2.45'))
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual(
+            (wallet.current_balance, wallet.product_commission, wallet.referral_commission),
+            (Decimal('0.03'), Decimal('0.02'), Decimal('0.00')),
+        )
+
+    def test_withdrawn_commission_is_not_drift(self):
+        CommissionSetting.objects.create(user=self.user, product_rate=Decimal('5.00'))
+        credit_wallet(self.user, Decimal('100.00'))
+        complete_task(self.user, Product.objects.create(name='RW', price=Decimal('10.00')))
+        withdrawal = self.withdraw()
+
+        for args in ((), ('--fix',)):
+            out = StringIO()
+            call_command('reconcile_wallets', *args, stdout=out)
+            self.assertIn('Checked 1 wallets, 0 with drift', out.getvalue())
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual((wallet.product_commission, wallet.cumulative_total), (Decimal('0.00'), Decimal('100.50')))
+
+        admin = User.objects.create_user(username='recon_admin', password='pass', role='admin')
+        self.client.force_login(admin)
+        self.client.post(reverse('wallet:reject_withdrawal', args=[withdrawal.id]))
+        out = StringIO()
+        call_command('reconcile_wallets', stdout=out)
+        self.assertIn('0 with drift', out.getvalue())
@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from balance.jobs import voucher_thumbnail_job
+from balance.models import RechargeRequest, Voucher
+from balance.services import delete_vouchers
+from balance.vouchers import THUMBNAIL_SIZE, VoucherRejected, ingest_voucher
+from jobs.models import Job
+
+User = get_user_model()
+
+
+def png_bytes(size=(1200, 900), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class VoucherIngestionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create(username='voucher_user', phone='+9100001')
+        self.recharge = RechargeRequest.objects.create(user=self.user, amount=Decimal('50.00'))
+
+    def upload(self, content, name='voucher.png', recharge=None):
+        return ingest_voucher(recharge or self.recharge, SimpleUploadedFile(name, content, content_type='image/png'))
+
+    def test_stores_sniffed_type_hash_and_queues_thumbnail(self):
+        voucher = self.upload(png_bytes(), name='whatever.exe')
+
+        self.assertEqual(voucher.content_type, 'image/png')
+        self.assertTrue(voucher.file.name.endswith('.png'))
+        self.assertEqual(len(RechargeRequest.objects.get(pk=self.recharge.pk).voucher_hash), 64)
+        self.assertFalse(voucher.thumbnail)
+        self.assertEqual(Job.objects.get().name, 'balance.voucher_thumbnail')
+
+    def test_thumbnail_job_writes_small_jpeg(self):
+        voucher = self.upload(png_bytes())
+        voucher_thumbnail_job(voucher_id=voucher.id)
+
+        voucher.refresh_from_db()
+        with voucher.thumbnail.open('rb') as thumb:
+            image = Image.open(thumb)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertLessEqual(image.size[0], THUMBNAIL_SIZE[0])
+            self.assertLessEqual(image.size[1], THUMBNAIL_SIZE[1])
+        self.assertLess(voucher.thumbnail.size, voucher.size)
+
+    def test_rejects_content_that_is_not_an_image(self):
+        with self.assertRaises(VoucherRejected):
+            self.upload(b'<html>not an image</html>', name='fake.jpg')
+        self.assertFalse(Voucher.objects.exists())
+
+    @override_settings(VOUCHER_MAX_UPLOAD_SIZE=1024)
+    def test_rejects_oversized_upload(self):
+        with self.assertRaises(VoucherRejected):
+            self.upload(png_bytes())
+
+    def test_same_voucher_cannot_back_two_recharges(self):
+        content = png_bytes()
+        self.upload(content)
+        self.upload(content)  # re-uploading to the same recharge is fine
+
+        other = RechargeRequest.objects.create(user=self.user, amount=Decimal('50.00'))
+        with self.assertRaises(VoucherRejected):
+            self.upload(content, recharge=other)
+
+    def test_replacing_and_deleting_vouchers_remove_old_files(self):
+        first = self.upload(png_bytes(color=(1, 2, 3)))
+        voucher_thumbnail_job(voucher_id=first.id)
+        first.refresh_from_db()
+        old_file, old_thumb = first.file.name, first.thumbnail.name
+        storage = first.file.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.upload(png_bytes(color=(4, 5, 6)))
+        self.assertFalse(storage.exists(old_file))
+        self.assertFalse(storage.exists(old_thumb))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_vouchers([self.recharge.id])
+        self.assertFalse(storage.exists(second.file.name))
+        self.assertFalse(Voucher.objects.exists())
+
+    @override_settings(VOUCHER_MAX_UPLOAD_SIZE=2048)
+    def test_view_stops_oversized_stream_and_checks_csrf(self):
+        url = reverse('balance:upload_voucher', args=[self.recharge.id])
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+
+        response = client.post(url, {'voucher_file': SimpleUploadedFile('v.png', png_bytes())})
+        self.assertEqual(response.status_code, 403)
+
+        client.get(url)
+        token = client.cookies['csrftoken'].value
+        # The form sends the token before the file, as the template does
+        response = client.post(url, {'csrfmiddlewaretoken': token, 'voucher_file': SimpleUploadedFile('v.png', png_bytes())})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertFalse(Voucher.objects.exists())
+
+        small = png_bytes(size=(10, 10))
+        client.post(url, {'csrfmiddlewaretoken': token, 'voucher_file': SimpleUploadedFile('v.png', small)})
+        self.assertEqual(Voucher.objects.get().size, len(small))
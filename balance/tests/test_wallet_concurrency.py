@@ -0,0 +1,89 @@
+import threading
+import time
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from balance.models import Wallet
+from balance.services import credit_wallet, debit_wallet
+
+User = get_user_model()
+
+
+class WalletConcurrencyTests(TransactionTestCase):
+    """
+    Hammers one wallet from several threads, each on its own DB connection.
+    Every mutation is a single UPDATE, so the final balance must be exact.
+    """
+    threads = 8
+    ops_per_thread = 25
+
+    def setUp(self):
+        self.user = User.objects.create(username='stress_user', phone='+7000001')
+        Wallet.objects.create(user=self.user, current_balance=Decimal('0.00'))
+
+    def run_threads(self, target):
+        results = []
+        lock = threading.Lock()
+
+        def worker(n):
+            try:
+                for _ in range(self.ops_per_thread):
+                    outcome = self.retry_locked(lambda: target(n))
+                    with lock:
+                        results.append(outcome)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return results
+
+    def retry_locked(self, op):
+        # SQLite serialises writers and may report "table is locked" instead
+        # of waiting; the UPDATE did not happen, so trying again is safe.
+        for _ in range(200):
+            try:
+                return op()
+            except OperationalError:
+                time.sleep(0.005)
+        raise AssertionError('wallet row stayed locked')
+
+    def test_concurrent_credits_are_not_lost(self):
+        self.run_threads(lambda n: credit_wallet(self.user.id, Decimal('1.25')))
+
+        wallet = Wallet.objects.get(user=self.user)
+        expected = Decimal('1.25') * self.threads * self.ops_per_thread
+        self.assertEqual(wallet.current_balance, expected)
+        self.assertEqual(wallet.cumulative_total, expected)
+
+    def test_concurrent_debits_never_overdraw(self):
+        Wallet.objects.filter(user=self.user).update(current_balance=Decimal('50.00'))
+
+        results = self.run_threads(lambda n: debit_wallet(self.user.id, Decimal('1.00')))
+
+        self.assertEqual(results.count(True), 50)
+        self.assertEqual(Wallet.objects.get(user=self.user).current_balance, Decimal('0.00'))
+
+    def test_mixed_credits_and_debits_balance_exactly(self):
+        Wallet.objects.filter(user=self.user).update(current_balance=Decimal('100.00'))
+
+        def op(n):
+            # Even threads credit, odd threads debit
+            if n % 2 == 0:
+                return ('credit', credit_wallet(self.user.id, Decimal('0.10')))
+            return ('debit', debit_wallet(self.user.id, Decimal('0.30')))
+
+        results = self.run_threads(op)
+
+        credits = sum(1 for kind, ok in results if kind == 'credit' and ok)
+        debits = sum(1 for kind, ok in results if kind == 'debit' and ok)
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual(
+            wallet.current_balance,
+            Decimal('100.00') + Decimal('0.10') * credits - Decimal('0.30') * debits,
+        )
@@ -6,6 +6,7 @@ app_name = "balance"
 urlpatterns = [
     path('approve-voucher/<int:voucher_id>/', views.approve_voucher, name='approve_voucher'),
     path('reject-voucher/<int:voucher_id>/', views.reject_voucher, name='reject_voucher'),
+    path('approve-recharges/', views.approve_recharges_bulk, name='approve_recharges_bulk'),
 
     # Wallet page (GET)
     path('wallet/', views.wallet_dashboard, name='wallet_dashboard'),
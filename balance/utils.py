@@ -1,6 +1,8 @@
 from decimal import Decimal
 from django.db import transaction
 from balance.models import Wallet, RechargeRequest, Voucher, RechargeHistory
+from balance.services import approve_recharge, reject_recharge, update_wallet
+from balance.vouchers import ingest_voucher
 
 # -----------------------------
 # Wallet Utilities
@@ -18,48 +20,17 @@ def get_wallet_balance(user):
     wallet = get_wallet(user)
     return wallet.current_balance + wallet.product_commission + wallet.referral_commission
 
-@transaction.atomic
-def update_wallet_balance(user, amount, action="add", balance_type="current"):
+def update_wallet_balance(user, amount, action="add", balance_type="current", entry_type=None, reference=""):
     """
     Generic wallet update
     balance_type: 'current', 'product_commission', 'referral_commission'
     action: 'add' or 'subtract'
+    Delegates to balance.services.update_wallet (atomic F() updates plus a
+    ledger entry).
     """
-    wallet = get_wallet(user)
-    amount = Decimal(amount)
-
-    if balance_type == "current":
-        if action == "add":
-            wallet.current_balance += amount
-            wallet.cumulative_total += amount
-        elif action == "subtract":
-            if wallet.current_balance >= amount:
-                wallet.current_balance -= amount
-            else:
-                return False
-    elif balance_type == "product_commission":
-        if action == "add":
-            wallet.product_commission += amount
-            wallet.cumulative_total += amount
-        elif action == "subtract":
-            if wallet.product_commission >= amount:
-                wallet.product_commission -= amount
-            else:
-                return False
-    elif balance_type == "referral_commission":
-        if action == "add":
-            wallet.referral_commission += amount
-            wallet.cumulative_total += amount
-        elif action == "subtract":
-            if wallet.referral_commission >= amount:
-                wallet.referral_commission -= amount
-            else:
-                return False
-    else:
-        return False
-
-    wallet.save(update_fields=["current_balance", "product_commission", "referral_commission", "cumulative_total"])
-    return wallet
+    return update_wallet(
+        user, amount, action=action, balance_type=balance_type, entry_type=entry_type, reference=reference
+    )
 
 # -----------------------------
 # Recharge Utilities
@@ -74,59 +45,12 @@ def create_recharge_request(user, amount):
     recharge = RechargeRequest.objects.create(user=user, amount=amount)
     return recharge
 
-@transaction.atomic
-def approve_recharge(recharge_request):
-    """
-    Approve recharge request:
-    - update wallet current_balance ONLY
-    - mark recharge approved
-    - log history
-    """
-    if recharge_request.status != "pending":
-        raise ValueError("Recharge already processed")
-
-    # Only add to current_balance, no referral commission
-    update_wallet_balance(recharge_request.user, recharge_request.amount, action="add", balance_type="current")
-    recharge_request.status = "approved"
-    recharge_request.save()
-
-    RechargeHistory.objects.create(
-        user=recharge_request.user,
-        amount=recharge_request.amount,
-        status="approved"
-    )
-    return recharge_request
-
-@transaction.atomic
-def reject_recharge(recharge_request):
-    """
-    Reject recharge request:
-    - mark rejected
-    - log in history
-    """
-    if recharge_request.status != "pending":
-        raise ValueError("Recharge already processed")
-
-    recharge_request.status = "rejected"
-    recharge_request.save()
-
-    RechargeHistory.objects.create(
-        user=recharge_request.user,
-        amount=recharge_request.amount,
-        status="rejected"
-    )
-    return recharge_request
-
 # -----------------------------
 # Voucher Utilities
 # -----------------------------
 
-@transaction.atomic
 def upload_voucher(recharge_request, file):
     """
-    Upload or update voucher for recharge
+    Upload or update voucher for recharge (see balance.vouchers.ingest_voucher)
     """
-    voucher, _ = Voucher.objects.get_or_create(recharge_request=recharge_request)
-    voucher.file = file
-    voucher.save()
-    return voucher
+    return ingest_voucher(recharge_request, file)
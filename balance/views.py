@@ -1,23 +1,21 @@
 # balance/views.py
 from decimal import Decimal
-import os
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Sum
-from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from balance.models import Wallet, RechargeRequest, RechargeHistory, Voucher
 from balance.services import (
-    get_wallet_balance,
     create_recharge_request,
-    update_wallet,
     upload_voucher,
-    approve_recharge,
-    reject_recharge,
+    approve_recharges,
 )
 from accounts.models import SuperAdminWallet
-from commission.models import Commission
+from commission.utils import get_today_commission
+from balance.vouchers import VoucherRejected, use_voucher_upload_handlers, voucher_max_size
+from balance.jobs import approve_voucher_job, reject_voucher_job
+from jobs.registry import enqueue
 
 # -----------------------------
 # Admin check
@@ -33,11 +31,6 @@ def is_admin(user):
 # -----------------------------
 @login_required
 def wallet_dashboard(request):
-    from django.db.models import Sum
-    from django.utils import timezone
-    from commission.models import Commission
-    from decimal import Decimal
-
     wallet, _ = Wallet.objects.get_or_create(user=request.user)
     pending_recharge = RechargeRequest.objects.filter(user=request.user, status="pending").first()
     history = RechargeHistory.objects.filter(user=request.user).order_by("-action_date")
@@ -45,21 +38,7 @@ def wallet_dashboard(request):
     # -----------------------------
     # Today's Commissions
     # -----------------------------
-    today = timezone.now().date()
-
-    # Today's product commission
-    today_product_commission = Commission.objects.filter(
-        user=request.user,
-        commission_type='self',
-        created_at__date=today
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    # Today's referral commission
-    today_referral_commission = Commission.objects.filter(
-        user=request.user,
-        commission_type='referral',
-        created_at__date=today
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    today_product_commission, today_referral_commission = get_today_commission(request.user)
 
     # Combined
     today_commission = today_product_commission + today_referral_commission
@@ -105,15 +84,30 @@ def recharge_amount(request):
 # -----------------------------
 # Upload Voucher
 # -----------------------------
+# CSRF is checked in _upload_voucher_view instead of the middleware, which
+# would read request.FILES before the streaming upload handlers are set.
+@csrf_exempt
 @login_required
 def upload_voucher_view(request, recharge_id):
+    size_limit = use_voucher_upload_handlers(request)
+    return _upload_voucher_view(request, recharge_id, size_limit)
+
+
+@csrf_protect
+def _upload_voucher_view(request, recharge_id, size_limit):
     recharge_request = get_object_or_404(RechargeRequest, id=recharge_id, user=request.user)
     voucher = Voucher.objects.filter(recharge_request=recharge_request).first()
 
-    if request.method == "POST" and request.FILES.get("voucher_file"):
-        file = request.FILES["voucher_file"]
-        upload_voucher(recharge_request, file)
-        messages.success(request, "Voucher uploaded successfully. Await admin approval.")
+    if request.method == "POST":
+        file = request.FILES.get("voucher_file")
+        try:
+            if size_limit.exceeded:
+                raise VoucherRejected(f"Voucher is larger than {voucher_max_size() // (1024 * 1024)} MB.")
+            if file:
+                upload_voucher(recharge_request, file)
+                messages.success(request, "Voucher uploaded successfully. Await admin approval.")
+        except VoucherRejected as exc:
+            messages.error(request, str(exc))
         return redirect("balance:upload_voucher", recharge_id=recharge_request.id)
 
     superadmin_wallet = SuperAdminWallet.objects.first()
@@ -131,20 +125,34 @@ def upload_voucher_view(request, recharge_id):
 @login_required
 @user_passes_test(is_admin)
 def approve_voucher(request, voucher_id):
-    voucher = get_object_or_404(Voucher, id=voucher_id)
-    recharge_request = voucher.recharge_request
-    user = recharge_request.user
+    voucher = get_object_or_404(Voucher.objects.select_related('recharge_request__user'), id=voucher_id)
+    user = voucher.recharge_request.user
 
     if request.method == "POST":
-        approve_recharge(recharge_request)
+        # Crediting the wallet and deleting the file run on the job worker
+        enqueue(approve_voucher_job, {"voucher_id": voucher.id}, idempotency_key=f"approve_voucher:{voucher.id}")
+        messages.success(request, f"Voucher for {user.username} queued for approval.")
+
+    return redirect("accounts:admin_dashboard")
 
-        # Delete voucher file safely
-        if voucher.file and os.path.isfile(voucher.file.path):
-            os.remove(voucher.file.path)
-        voucher.delete()
 
-        wallet = Wallet.objects.get(user=user)
-        messages.success(request, f"Voucher for {user.username} approved. Total balance: {wallet.total_balance}")
+# -----------------------------
+# Bulk Approve Recharges (Admin)
+# -----------------------------
+@login_required
+@user_passes_test(is_admin)
+def approve_recharges_bulk(request):
+    """Approves every selected pending recharge in one action."""
+    if request.method == "POST":
+        recharge_ids = [i for i in request.POST.getlist("recharge_ids") if i.isdigit()]
+        approved, failures = approve_recharges(recharge_ids)
+        if approved:
+            messages.success(request, f"{len(approved)} recharges approved.")
+        if failures:
+            details = ", ".join(f"#{rid}: {reason}" for rid, reason in sorted(failures.items()))
+            messages.warning(request, f"{len(failures)} recharges not approved ({details}).")
+        if not recharge_ids:
+            messages.info(request, "No recharges selected.")
 
     return redirect("accounts:admin_dashboard")
 
@@ -155,18 +163,12 @@ def approve_voucher(request, voucher_id):
 @login_required
 @user_passes_test(is_admin)
 def reject_voucher(request, voucher_id):
-    voucher = get_object_or_404(Voucher, id=voucher_id)
-    recharge_request = voucher.recharge_request
-    user = recharge_request.user
+    voucher = get_object_or_404(Voucher.objects.select_related('recharge_request__user'), id=voucher_id)
+    user = voucher.recharge_request.user
 
     if request.method == "POST":
-        reject_recharge(recharge_request)
-
-        if voucher.file and os.path.isfile(voucher.file.path):
-            os.remove(voucher.file.path)
-        voucher.delete()
-
-        messages.info(request, f"Voucher for {user.username} has been rejected.")
+        enqueue(reject_voucher_job, {"voucher_id": voucher.id}, idempotency_key=f"reject_voucher:{voucher.id}")
+        messages.info(request, f"Voucher for {user.username} queued for rejection.")
 
     return redirect("accounts:admin_dashboard")
 
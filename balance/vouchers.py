@@ -0,0 +1,184 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+
+from balance.models import RechargeRequest, Voucher
+
+DEFAULT_VOUCHER_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+THUMBNAIL_SIZE = (240, 240)
+
+# Leading bytes -> (content type, file extension)
+VOUCHER_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+]
+
+
+class VoucherRejected(ValueError):
+    """The upload is too large, not an accepted image, or already used."""
+
+
+def voucher_max_size():
+    return getattr(settings, "VOUCHER_MAX_UPLOAD_SIZE", DEFAULT_VOUCHER_MAX_UPLOAD_SIZE)
+
+
+# -----------------------------
+# Streaming Upload
+# -----------------------------
+class VoucherSizeLimitHandler(FileUploadHandler):
+    """
+    First upload handler for voucher uploads: stops reading the file as
+    soon as it passes the size limit, so an oversized upload is never
+    written out in full. Chunks under the limit go on to the next handler.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or voucher_max_size()
+        self.received = 0
+        self.exceeded = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.exceeded = True
+            raise StopUpload()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def use_voucher_upload_handlers(request):
+    """
+    Streams the request's uploads to a temporary file on disk (never held
+    in memory), behind the size limit. Must run before request.POST or
+    request.FILES is read. Returns the size-limit handler.
+    """
+    limiter = VoucherSizeLimitHandler(request)
+    request.upload_handlers = [limiter, TemporaryFileUploadHandler(request)]
+    return limiter
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+def sniff_voucher_type(head):
+    """(content type, extension) from a file's first bytes, or None."""
+    for signature, content_type, extension in VOUCHER_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def hash_voucher(uploaded_file):
+    """SHA-256 of the file, read chunk by chunk."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def ingest_voucher(recharge_request, uploaded_file):
+    """
+    Validates and stores an uploaded voucher:
+    - enforces the size limit and sniffs the type from the first bytes
+      (the client's content type and file name are ignored)
+    - rejects a voucher whose hash already backs another recharge
+    - saves it chunk by chunk, replacing any earlier voucher
+    - queues the thumbnail for the job worker
+    Raises VoucherRejected. Returns the voucher.
+    """
+    if uploaded_file.size > voucher_max_size():
+        raise VoucherRejected(f"Voucher is larger than {voucher_max_size() // (1024 * 1024)} MB.")
+
+    head = uploaded_file.read(16)
+    uploaded_file.seek(0)
+    kind = sniff_voucher_type(head)
+    if kind is None:
+        raise VoucherRejected("Voucher must be a JPEG, PNG, GIF or WEBP image.")
+    content_type, extension = kind
+
+    digest = hash_voucher(uploaded_file)
+    if RechargeRequest.objects.filter(voucher_hash=digest).exclude(pk=recharge_request.pk).exists():
+        raise VoucherRejected("This voucher has already been used for another recharge.")
+
+    try:
+        with transaction.atomic():
+            RechargeRequest.objects.filter(pk=recharge_request.pk).update(voucher_hash=digest)
+            voucher = _store_voucher(recharge_request, uploaded_file, f"{digest[:20]}.{extension}", content_type)
+    except IntegrityError:
+        # Lost a race with the same file uploaded for another recharge
+        raise VoucherRejected("This voucher has already been used for another recharge.")
+    recharge_request.voucher_hash = digest
+    return voucher
+
+
+def _store_voucher(recharge_request, uploaded_file, name, content_type):
+    from jobs.registry import enqueue
+
+    voucher, _ = Voucher.objects.select_for_update().get_or_create(recharge_request=recharge_request)
+    old_files = _voucher_files(voucher)
+
+    voucher.file.save(name, uploaded_file, save=False)
+    voucher.thumbnail = None
+    voucher.content_type = content_type
+    voucher.size = uploaded_file.size
+    voucher.save()
+
+    old_files = [(storage, n) for storage, n in old_files if n != voucher.file.name]
+    transaction.on_commit(lambda: _delete_files(old_files))
+    enqueue("balance.voucher_thumbnail", {"voucher_id": voucher.id}, idempotency_key=f"voucher_thumbnail:{voucher.file.name}")
+    return voucher
+
+
+# -----------------------------
+# Thumbnails
+# -----------------------------
+def make_voucher_thumbnail(voucher):
+    """
+    Writes a THUMBNAIL_SIZE JPEG of the voucher. Skipped (returns False)
+    if the voucher's file was replaced while the thumbnail was made.
+    """
+    from PIL import Image
+
+    file_name = voucher.file.name
+    with voucher.file.open("rb") as source:
+        image = Image.open(source)
+        image.draft("RGB", THUMBNAIL_SIZE)  # JPEG: decode at reduced scale
+        image.thumbnail(THUMBNAIL_SIZE)
+        buffer = BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=75, optimize=True)
+
+    base = os.path.splitext(os.path.basename(file_name))[0]
+    thumbnail_name = voucher.thumbnail.field.generate_filename(voucher, f"{base}_thumb.jpg")
+    thumbnail_name = voucher.thumbnail.storage.save(thumbnail_name, ContentFile(buffer.getvalue()))
+
+    if not Voucher.objects.filter(pk=voucher.pk, file=file_name).update(thumbnail=thumbnail_name):
+        voucher.thumbnail.storage.delete(thumbnail_name)
+        return False
+    voucher.thumbnail.name = thumbnail_name
+    return True
+
+
+def _voucher_files(voucher):
+    return [(f.storage, f.name) for f in (voucher.file, voucher.thumbnail) if f]
+
+
+def _delete_files(files):
+    for storage, name in files:
+        storage.delete(name)
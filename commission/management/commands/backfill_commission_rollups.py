@@ -0,0 +1,71 @@
+from datetime import datetime, time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from archive.services import latest_archive_cutoff
+from commission.models import Commission, DailyCommissionRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyCommissionRollup rows from the Commission ledger, in batches of users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        users = rows = 0
+        last_user_id = 0
+        # Days before the archive cutoff are no longer fully in the ledger,
+        # so their rollups are kept as they are.
+        self.since = latest_archive_cutoff()
+        ledger = Commission.objects.all()
+        rollups = DailyCommissionRollup.objects.all()
+        if self.since:
+            ledger = ledger.filter(created_at__gte=timezone.make_aware(datetime.combine(self.since, time.min)))
+            rollups = rollups.filter(day__gte=self.since)
+        self.ledger, self.rollups = ledger, rollups
+
+        while True:
+            user_ids = list(
+                ledger.filter(user_id__gt=last_user_id)
+                .order_by('user_id')
+                .values_list('user_id', flat=True)
+                .distinct()[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+            rows += self.rebuild(user_ids)
+            users += len(user_ids)
+
+        message = f"Rebuilt {rows} rollup rows for {users} users"
+        if self.since:
+            message += f" (from {self.since}, the archive cutoff)"
+        self.stdout.write(self.style.SUCCESS(message))
+
+    @transaction.atomic
+    def rebuild(self, user_ids):
+        totals = (
+            self.ledger.filter(user_id__in=user_ids)
+            .annotate(day=TruncDate('created_at'))
+            .values('user_id', 'day', 'commission_type')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by()
+        )
+        rollups = [
+            DailyCommissionRollup(
+                user_id=row['user_id'],
+                day=row['day'],
+                commission_type=row['commission_type'],
+                total=row['total'],
+                count=row['count'],
+            )
+            for row in totals
+        ]
+        self.rollups.filter(user_id__in=user_ids).delete()
+        DailyCommissionRollup.objects.bulk_create(rollups)
+        return len(rollups)
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from balance.models import Wallet
+from commission.models import CommissionSetting
+from products.models import Product, UserProductTask
+from products.utils import complete_product_task
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Count the SQL queries one task completion costs, using throwaway rows that are rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=20, help='Completions to measure')
+        parser.add_argument('--show-sql', action='store_true', help='Print the queries of the last completion')
+
+    def handle(self, *args, **options):
+        tasks = options['tasks']
+        with transaction.atomic():
+            per_task = self.measure(tasks)
+            transaction.set_rollback(True)
+
+        for label, counts in per_task.items():
+            self.stdout.write(
+                f"{label}: {sum(counts) / len(counts):.1f} queries per completion "
+                f"(min {min(counts)}, max {max(counts)}) over {len(counts)} tasks"
+            )
+        if options['show_sql']:
+            for query in self.last_queries:
+                self.stdout.write(query['sql'])
+
+    def measure(self, tasks):
+        referrer = User.objects.create(username='bench_referrer', phone='+bench-1')
+        referred = User.objects.create(username='bench_referred', phone='+bench-2', referred_by=referrer)
+        loner = User.objects.create(username='bench_loner', phone='+bench-3')
+        for user in (referrer, referred, loner):
+            CommissionSetting.objects.create(user=user, product_rate=Decimal('5.00'), referral_rate=Decimal('2.00'))
+            Wallet.objects.create(user=user, current_balance=Decimal('1000000.00'))
+        products = [Product.objects.create(name=f'Bench {i}', price=Decimal('10.00')) for i in range(tasks)]
+
+        per_task = {'with referrer': [], 'without referrer': []}
+        for label, user in (('with referrer', referred), ('without referrer', loner)):
+            for number, product in enumerate(products, start=1):
+                UserProductTask.objects.create(user=user, product=product, task_number=number)
+                with CaptureQueriesContext(connection) as ctx:
+                    result = complete_product_task(user, product)
+                if result['warning']:
+                    raise RuntimeError(result['warning'])
+                per_task[label].append(len(ctx))
+                self.last_queries = ctx.captured_queries
+        return per_task
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0002_daily_commission_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commission',
+            index=models.Index(fields=['user', 'commission_type', 'created_at'], name='commission_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commission',
+            index=models.Index(fields=['user', 'product_name', 'commission_type', 'triggered_by'], name='commission_user_product_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+def backfill_referral_keys(apps, schema_editor):
+    """
+    Keys existing referral commissions. product_name is either
+    "Product <id>" or the product's file path depending on the code path
+    that wrote it. Rows whose product can't be resolved, and any
+    duplicates beyond the earliest row, are left unkeyed.
+    """
+    Commission = apps.get_model('commission', 'Commission')
+    Product = apps.get_model('products', 'Product')
+
+    product_ids_by_file = dict(Product.objects.values_list('file', 'id'))
+    seen = set()
+    rows = (
+        Commission.objects.filter(commission_type='referral', triggered_by__isnull=False)
+        .order_by('id')
+        .values_list('id', 'user_id', 'triggered_by_id', 'product_name')
+    )
+    for pk, referrer_id, referred_id, product_name in rows.iterator(chunk_size=1000):
+        if product_name.startswith('Product ') and product_name[8:].isdigit():
+            product_id = int(product_name[8:])
+        else:
+            product_id = product_ids_by_file.get(product_name)
+        if product_id is None:
+            continue
+
+        key = f"referral:{referrer_id}:{referred_id}:product:{product_id}"
+        if key not in seen:
+            seen.add(key)
+            Commission.objects.filter(pk=pk).update(idempotency_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commission', '0003_hot_path_indexes'),
+        ('products', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commission',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_referral_keys, migrations.RunPython.noop),
+    ]
@@ -43,11 +43,47 @@ class Commission(models.Model):
     triggered_by = models.ForeignKey(
         User, null=True, blank=True, on_delete=models.SET_NULL, related_name='triggered_commissions'
     )
+    # Set for commissions that must be paid at most once (see referral_idempotency_key)
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Commission"
         verbose_name_plural = "Commissions"
+        indexes = [
+            # Per-user totals by type and date range (wallet, dashboards)
+            models.Index(fields=["user", "commission_type", "created_at"], name="commission_user_type_date_idx"),
+            # Referral idempotency check: one referral row per referrer/product/referred user
+            models.Index(
+                fields=["user", "product_name", "commission_type", "triggered_by"], name="commission_user_product_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.product_name} - Commission: {self.amount:.2f} ({self.commission_type})"
+
+
+# -----------------------------
+# Daily Commission Rollups
+# -----------------------------
+class DailyCommissionRollup(models.Model):
+    """
+    Per-user, per-day, per-type commission totals, maintained as Commission
+    rows are created. Serves "today's commission" widgets and daily charts
+    with a unique-key lookup instead of aggregating Commission.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_commission_rollups")
+    day = models.DateField()
+    commission_type = models.CharField(max_length=10, choices=Commission.COMMISSION_TYPES)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Commission Rollup"
+        verbose_name_plural = "Daily Commission Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day", "commission_type"], name="commission_rollup_user_day_type"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.day} - {self.commission_type}: {self.total}"
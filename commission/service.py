@@ -1,89 +1,199 @@
 from decimal import Decimal
-from django.db import transaction
-from balance.models import Wallet
-from .models import Commission, CommissionSetting
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from AmazonProject.money import Money, percent_of_many
+from balance.services import adjust_wallet, credit_wallet
+from products.models import UserProductTask, UserTaskProgress
+from .models import Commission
+from .utils import (
+    add_to_daily_rollup,
+    commission_product_name,
+    create_commission_once,
+    get_commission_setting,
+    referral_idempotency_key,
+)
+
+# -----------------------------
+# Commission Ledger Service
+# -----------------------------
+# Every task completion, from views and commands alike, goes through
+# complete_task(): one transaction, conditional UPDATEs for the task and
+# wallets, and a single INSERT for the self + referral Commission rows.
 
 def get_commission_rates(user):
     """
     Fetch the latest dynamic commission rates for the user.
     """
-    setting = CommissionSetting.objects.filter(user=user).order_by("-updated_at").first()
+    setting = get_commission_setting(user)
     return {
-        "product_rate": Decimal(setting.product_rate) if setting else Decimal("0.00"),
-        "referral_rate": Decimal(setting.referral_rate) if setting else Decimal("0.00"),
+        "product_rate": setting["product_rate"],
+        "referral_rate": setting["referral_rate"],
     }
 
+
+def commission_amount(price, rate):
+    """
+    Commission for a product price at a percentage rate, to the cent
+    (half-even, like Decimal.quantize), in integer cents.
+    """
+    return Money.from_decimal(price).percent(rate).to_decimal()
+
+
+def commission_amounts(prices, rate):
+    """
+    commission_amount() for many prices at one rate, as one integer vector
+    operation: [Decimal, ...] in the same order as prices.
+    """
+    cents = [Money.from_decimal(price).minor for price in prices]
+    return [Money(minor).to_decimal() for minor in percent_of_many(cents, rate)]
+
+
+def get_eligible_referrer(user):
+    """The user's referrer, if they earn referral commission (regular users only)."""
+    referrer = getattr(user, "referred_by", None)
+    if referrer and referrer.role == 'user':
+        return referrer
+    return None
+
+
+def _load_rates(user, referrer):
+    """
+    (user's product rate, referrer's referral rate) from the settings cache.
+    Missing settings count as 0%.
+    """
+    product_rate = get_commission_setting(user)["product_rate"]
+    referral_rate = get_commission_setting(referrer)["referral_rate"] if referrer else Decimal("0.00")
+    return product_rate, referral_rate
+
+
+def _insert_commissions(self_row, referral_row):
+    """
+    Inserts both rows with one bulk_create. If the referral was already
+    paid (its idempotency key exists), the batch fails in its savepoint and
+    only the self row is inserted; the stored referral row is returned.
+    Returns (referral_row, referral_created).
+    """
+    if referral_row is None:
+        Commission.objects.bulk_create([self_row])
+        return None, False
+    try:
+        with transaction.atomic():
+            Commission.objects.bulk_create([self_row, referral_row])
+        return referral_row, True
+    except IntegrityError:
+        self_row.pk = None
+        Commission.objects.bulk_create([self_row])
+        return Commission.objects.get(idempotency_key=referral_row.idempotency_key), False
+
+
 @transaction.atomic
-def process_product_completion(user, product):
+def complete_task(user, product, task=None):
     """
     Handles product completion:
-    - Deduct product price
-    - Add product commission to user
-    - Add referral commission to referrer (if any)
-    - Update wallet totals
-    - Create Commission records
-    Returns dict of commission amounts
-    """
-    wallet, _ = Wallet.objects.get_or_create(user=user)
-
-    if wallet.current_balance < product.price:
-        return {"warning": f"Insufficient balance for Product {product.id}"}
-
-    # Deduct product price
-    wallet.current_balance -= product.price
-
-    # Calculate product commission
-    rates = get_commission_rates(user)
-    product_commission_amount = (Decimal(product.price) * rates['product_rate'] / Decimal("100.00")).quantize(Decimal("0.01"))
-    wallet.product_commission += product_commission_amount
-    wallet.cumulative_total += product_commission_amount
-
-    # Record product commission
-    Commission.objects.create(
-        user=user,
-        product_name=f"Product {product.id}",
-        amount=product_commission_amount,
-        commission_type='self',
-        triggered_by=user,
+    - Claim the task (if given) so it completes at most once
+    - Deduct product price and add product commission (guarded UPDATE)
+    - Record self + referral Commission rows (one INSERT)
+    - Pay the referrer once per referred user and product
+    Returns dict of commission amounts, or a warning.
+    """
+    referrer = get_eligible_referrer(user)
+    product_rate, referral_rate = _load_rates(user, referrer)
+    product_commission = commission_amount(product.price, product_rate)
+    product_name = commission_product_name(product)
+
+    if task is not None:
+        claimed = UserProductTask.objects.filter(pk=task.pk, is_completed=False).update(
+            is_completed=True, completed_at=timezone.now()
+        )
+        if not claimed:
+            return {"warning": "Task already completed or does not exist."}
+
+    paid = adjust_wallet(
+        user,
+        guard={'current_balance': product.price},
+        reference=f"product:{product.id}",
+        movements=[
+            ('task_debit', {'current_balance': -product.price}),
+            ('self_commission', {'product_commission': product_commission, 'cumulative_total': product_commission}),
+        ],
     )
+    if not paid:
+        transaction.set_rollback(True)
+        return {"warning": "Insufficient balance."}
 
-    # Referral commission
-    referral_amount = Decimal("0.00")
-    referrer = getattr(user, "referred_by", None)
+    self_row = Commission(
+        user=user, product_name=product_name, amount=product_commission, commission_type='self', triggered_by=user
+    )
+    referral_row = None
     if referrer:
-        # Compute referral amount using product price to match other helpers
-        referral_amount = (Decimal(product.price) * rates['referral_rate'] / Decimal("100.00")).quantize(Decimal("0.01"))
-
-        # Idempotency: if referral commission already recorded for this referrer + product + triggered_by, skip wallet update
-        existing = Commission.objects.filter(
+        referral_row = Commission(
             user=referrer,
-            product_name=f"Product {product.id}",
+            product_name=product_name,
+            amount=commission_amount(product.price, referral_rate),
             commission_type='referral',
-            triggered_by=user
-        ).first()
-
-        if existing:
-            referral_amount = existing.amount
-        else:
-            ref_wallet, _ = Wallet.objects.get_or_create(user=referrer)
-            ref_wallet.referral_commission += referral_amount
-            ref_wallet.cumulative_total += referral_amount
-            ref_wallet.save(update_fields=['referral_commission','cumulative_total'])
-
-            # Record referral commission
-            Commission.objects.create(
-                user=referrer,
-                product_name=f"Product {product.id}",
-                amount=referral_amount,
-                commission_type='referral',
-                triggered_by=user,
-            )
-
-    # Save user's wallet
-    wallet.save(update_fields=['current_balance','product_commission','referral_commission','cumulative_total'])
+            triggered_by=user,
+            idempotency_key=referral_idempotency_key(referrer.id, user.id, product.id),
+        )
+    referral_row, referral_created = _insert_commissions(self_row, referral_row)
+
+    # bulk_create skips post_save, so keep the daily rollups in step here
+    today = timezone.localdate()
+    add_to_daily_rollup(user.id, today, 'self', product_commission)
+    if referral_created:
+        add_to_daily_rollup(referrer.id, today, 'referral', referral_row.amount)
+        credit_wallet(
+            referrer, referral_row.amount, balance_type='referral_commission', reference=f"product:{product.id}"
+        )
+
+    if task is not None:
+        # Only count it if the task belongs to the day the counters cover
+        UserTaskProgress.objects.filter(user=user, current_day=task.business_day).update(
+            completed_count=F('completed_count') + 1
+        )
 
     return {
-        "product_commission": product_commission_amount,
-        "referral_commission": referral_amount,
-        "warning": None
+        "warning": None,
+        "product_commission": product_commission,
+        "referral_commission": referral_row.amount if referral_row else Decimal("0.00"),
     }
+
+
+def process_product_completion(user, product):
+    """
+    Completes a product for the user without a UserProductTask row.
+    Same ledger path as task completion; see complete_task().
+    """
+    result = complete_task(user, product)
+    if result["warning"] == "Insufficient balance.":
+        result["warning"] = f"Insufficient balance for Product {product.id}"
+    return result
+
+
+@transaction.atomic
+def pay_referral_commission(referrer, referred_user, product):
+    """
+    Records and pays the referral commission for referred_user completing
+    product, at most once. Returns the referral amount (the stored amount
+    if it was already paid).
+    """
+    if not referrer or referrer.role != 'user' or referred_user.role != 'user':
+        return Decimal("0.00")
+
+    referral_rate = get_commission_setting(referrer)["referral_rate"]
+    if referral_rate <= 0:
+        return Decimal("0.00")
+
+    commission, created = create_commission_once(
+        referral_idempotency_key(referrer.id, referred_user.id, product.id),
+        user=referrer,
+        product_name=commission_product_name(product),
+        commission_type='referral',
+        amount=commission_amount(product.price, referral_rate),
+        triggered_by=referred_user,
+    )
+    if created:
+        credit_wallet(
+            referrer, commission.amount, balance_type='referral_commission', reference=f"product:{product.id}"
+        )
+    return commission.amount
@@ -1,10 +1,37 @@
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from products.models import UserProductTask
-from .utils import calculate_product_commission
+from .models import Commission, CommissionSetting
+from .utils import calculate_product_commission, invalidate_commission_setting, record_commission_rollup
 from balance.utils import update_wallet_balance
 
 #@receiver(post_save, sender=UserProductTask)
 #def handle_product_completion(sender, instance, created, **kwargs):
     # Only trigger commission once after task is completed
   ######## instance.save(update_fields=['commissioned'])
+
+
+@receiver(post_save, sender=Commission)
+def update_daily_commission_rollup(sender, instance, created, raw=False, **kwargs):
+    """Keep the per-day commission rollup in step with new Commission rows."""
+    if created and not raw:
+        record_commission_rollup(instance)
+
+
+@receiver(post_save, sender=CommissionSetting)
+@receiver(post_delete, sender=CommissionSetting)
+def invalidate_cached_commission_setting(sender, instance, **kwargs):
+    """
+    Every settings write (set_commission, update_user_commission,
+    update_user_referral_commission, the dashboard's set_daily_limit and
+    the Django admin) saves the model, so this covers them all.
+    """
+    invalidate_commission_setting(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user_settings(sender, instance, created, raw=False, **kwargs):
+    """A new user may reuse the id of a deleted one; don't serve its settings."""
+    if created and not raw:
+        invalidate_commission_setting(instance.pk)
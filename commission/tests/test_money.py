@@ -0,0 +1,108 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from unittest import skipUnless
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from AmazonProject import money
+from AmazonProject.money import CRYPTO_PLACES, INT64_MAX, Money, MoneyField, percent_of_many
+from balance.models import Wallet
+from balance.services import credit_wallet
+from commission.service import commission_amount, commission_amounts
+from wallet.models import UserWalletAddress, UserWithdrawal
+
+User = get_user_model()
+
+PRICES = [Decimal(f'{cents // 100}.{cents % 100:02d}') for cents in range(0, 100001, 37)] + [
+    Decimal('0.01'), Decimal('0.10'), Decimal('0.50'), Decimal('12.50'), Decimal('99999999.99'),
+]
+RATES = [Decimal(r) for r in ('0', '0.5', '1', '2', '2.5', '3.33', '5', '7.25', '10', '12.5', '33.333', '100')]
+
+
+def legacy_commission(price, rate):
+    """The Decimal formula commission_amount() replaced."""
+    return (Decimal(price) * Decimal(rate) / Decimal("100.00")).quantize(Decimal("0.01"))
+
+
+class MoneyCommissionTests(TestCase):
+    def test_commission_amount_equals_decimal_formula(self):
+        for rate in RATES:
+            for price in PRICES:
+                self.assertEqual(commission_amount(price, rate), legacy_commission(price, rate), (price, rate))
+
+    def test_half_even_ties_match_decimal(self):
+        # 0.5% of 1.00 = 0.005 -> 0.00; of 3.00 = 0.015 -> 0.02
+        self.assertEqual(commission_amount(Decimal('1.00'), Decimal('0.5')), Decimal('0.00'))
+        self.assertEqual(commission_amount(Decimal('3.00'), Decimal('0.5')), Decimal('0.02'))
+        self.assertEqual(commission_amount(Decimal('-3.00'), Decimal('0.5')), legacy_commission('-3.00', '0.5'))
+
+    def test_batch_equals_one_by_one(self):
+        for rate in RATES:
+            expected = [legacy_commission(price, rate) for price in PRICES]
+            self.assertEqual(commission_amounts(PRICES, rate), expected, rate)
+
+    def test_batch_python_fallback(self):
+        numpy, money.np = money.np, None
+        try:
+            self.assertEqual(commission_amounts(PRICES, Decimal('2.5')), [legacy_commission(p, '2.5') for p in PRICES])
+        finally:
+            money.np = numpy
+        self.assertEqual(percent_of_many([], Decimal('5')), [])
+
+    def test_batch_beyond_int64_stays_exact(self):
+        # amount * numerator overflows int64: must take the Python path
+        minors = [INT64_MAX // 3, -(INT64_MAX // 7), 1]
+        rate = Decimal('12.345')
+        self.assertEqual(percent_of_many(minors, rate), [Money(m).percent(rate).minor for m in minors])
+
+    @skipUnless(money.np, 'NumPy not installed')
+    def test_batch_numpy_path(self):
+        minors = list(range(-5000, 5000, 7))
+        for rate in RATES:
+            self.assertEqual(percent_of_many(minors, rate), [Money(m).percent(rate).minor for m in minors], rate)
+
+    def test_money_arithmetic_is_exact(self):
+        self.assertEqual(Money.from_decimal('0.10') + Money.from_decimal('0.20'), Money.from_decimal('0.30'))
+        self.assertEqual(Money(5) - Money(7), Money(-2))
+        self.assertEqual(Money(5), Money(5000000, CRYPTO_PLACES))
+        self.assertEqual(Money.from_decimal('1.23456789', CRYPTO_PLACES).to_places(2, rounded=True), Money(123))
+        self.assertEqual(str(Money(-1234)), '-12.34')
+        with self.assertRaises(TypeError):
+            Money.from_decimal(0.05)
+        with self.assertRaises(ValueError):
+            Money.from_decimal('0.005')
+        with self.assertRaises(ValueError):
+            Money(123456789, CRYPTO_PLACES).to_places(2)
+
+    def test_money_field(self):
+        field = MoneyField(places=CRYPTO_PLACES)
+        self.assertEqual(field.get_prep_value(Decimal('1.5')), 150000000)
+        self.assertEqual(field.to_python('0.00000001'), Money(1, CRYPTO_PLACES))
+        with self.assertRaises(ValidationError):
+            field.to_python('0.000000001')
+        self.assertEqual(field.deconstruct()[3], {'places': CRYPTO_PLACES})
+
+
+class WithdrawalAmountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='money_user', phone='+9600001')
+        self.user.set_fund_password('1234')
+        UserWalletAddress.objects.create(user=self.user, address='TMoneyAddress', network='N/A')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_withdraw_leaves_exactly_five_cents(self):
+        credit_wallet(self.user, Decimal('10.10'))
+        self.client.post(reverse('wallet:withdraw'), {'network': 'TRX-20', 'fund_password': '1234'})
+
+        withdrawal = UserWithdrawal.objects.get(user=self.user)
+        self.assertEqual(withdrawal.amount, Money.from_decimal('10.05'))
+        self.assertEqual(withdrawal.amount.to_decimal(), Decimal('10.05000000'))
+        self.assertEqual(Wallet.objects.get(user=self.user).current_balance, Decimal('0.05'))
+
+    def test_stored_amount_round_trips_at_crypto_precision(self):
+        withdrawal = UserWithdrawal.objects.create(user=self.user, amount=Decimal('0.12345678'), network='TRX-20')
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.amount, Money(12345678, CRYPTO_PLACES))
+        self.assertTrue(UserWithdrawal.objects.filter(amount__gt=Decimal('0.12')).exists())
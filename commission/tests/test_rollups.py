@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from archive.services import archive_history
+from commission.models import Commission, DailyCommissionRollup
+from commission.utils import get_daily_commission_history, get_today_commission
+
+User = get_user_model()
+
+
+class DailyCommissionRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='rollup_user', phone='+5000001')
+
+    def add(self, amount, ctype='self'):
+        return Commission.objects.create(user=self.user, product_name='Product 1', amount=Decimal(amount), commission_type=ctype)
+
+    def test_rollup_is_maintained_on_commission_creation(self):
+        self.add('1.25')
+        self.add('0.75')
+        self.add('0.40', 'referral')
+
+        rollup = DailyCommissionRollup.objects.get(user=self.user, commission_type='self')
+        self.assertEqual((rollup.total, rollup.count), (Decimal('2.00'), 2))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(get_today_commission(self.user), (Decimal('2.00'), Decimal('0.40')))
+        self.assertEqual(len(ctx), 1)
+
+    def test_history_fills_missing_days(self):
+        self.add('3.00')
+        yesterday = timezone.localdate() - timedelta(days=1)
+        DailyCommissionRollup.objects.create(user=self.user, day=yesterday, commission_type='referral', total=Decimal('1.00'), count=1)
+
+        history = get_daily_commission_history(self.user, days=3)
+
+        self.assertEqual([row['total'] for row in history], [Decimal('0.00'), Decimal('1.00'), Decimal('3.00')])
+        self.assertEqual(history[-1]['day'], timezone.localdate())
+
+    def test_backfill_rebuilds_from_ledger(self):
+        old = self.add('5.00')
+        Commission.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=2))
+        self.add('1.00')
+        DailyCommissionRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_commission_rollups', '--batch-size', '1', stdout=out)
+
+        self.assertIn('Rebuilt 2 rollup rows for 1 users', out.getvalue())
+        self.assertEqual(get_today_commission(self.user), (Decimal('1.00'), Decimal('0.00')))
+        self.assertEqual(
+            DailyCommissionRollup.objects.get(day=timezone.localdate() - timedelta(days=2)).total, Decimal('5.00')
+        )
+
+    def test_backfill_keeps_archived_days(self):
+        old = self.add('5.00')
+        old_day = timezone.localdate() - timedelta(days=10)
+        Commission.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        DailyCommissionRollup.objects.filter(day=timezone.localdate()).update(day=old_day)
+        self.add('1.00')
+        archive_history(timezone.localdate() - timedelta(days=5))
+
+        out = StringIO()
+        call_command('backfill_commission_rollups', stdout=out)
+
+        self.assertIn('Rebuilt 1 rollup rows for 1 users', out.getvalue())
+        self.assertEqual(DailyCommissionRollup.objects.get(day=old_day).total, Decimal('5.00'))
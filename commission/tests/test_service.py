@@ -0,0 +1,80 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from balance.models import Wallet
+from commission.models import Commission, CommissionSetting, DailyCommissionRollup
+from commission.service import complete_task
+from commission.utils import get_today_commission
+from products.models import Product, UserProductTask
+
+User = get_user_model()
+
+
+class LedgerServiceTests(TestCase):
+    def setUp(self):
+        self.referrer = User.objects.create(username='l_referrer', phone='+8000001')
+        self.user = User.objects.create(username='l_user', phone='+8000002', referred_by=self.referrer)
+        CommissionSetting.objects.create(user=self.referrer, referral_rate=Decimal('2.00'))
+        CommissionSetting.objects.create(user=self.user, product_rate=Decimal('5.00'))
+        Wallet.objects.create(user=self.referrer)
+        Wallet.objects.create(user=self.user, current_balance=Decimal('100.00'))
+        self.products = [Product.objects.create(name=f'L{i}', price=Decimal('10.00')) for i in range(3)]
+
+    def complete(self, product, number):
+        task = UserProductTask.objects.create(user=self.user, product=product, task_number=number)
+        return complete_task(self.user, product, task=task)
+
+    def test_completion_writes_ledger_wallets_and_rollups(self):
+        result = self.complete(self.products[0], 1)
+
+        self.assertEqual((result['product_commission'], result['referral_commission']), (Decimal('0.50'), Decimal('0.20')))
+        wallet = Wallet.objects.get(user=self.user)
+        self.assertEqual((wallet.current_balance, wallet.product_commission), (Decimal('90.00'), Decimal('0.50')))
+        self.assertEqual(Wallet.objects.get(user=self.referrer).referral_commission, Decimal('0.20'))
+        self.assertEqual(get_today_commission(self.user), (Decimal('0.50'), Decimal('0.00')))
+        self.assertEqual(get_today_commission(self.referrer), (Decimal('0.00'), Decimal('0.20')))
+        names = set(Commission.objects.values_list('product_name', flat=True))
+        self.assertEqual(names, {f'Product {self.products[0].id}'})
+
+    def test_commission_rows_are_inserted_together(self):
+        self.complete(self.products[1], 1)  # creates today's rollup rows
+        task = UserProductTask.objects.create(user=self.user, product=self.products[0], task_number=2)
+        with CaptureQueriesContext(connection) as ctx:
+            complete_task(self.user, self.products[0], task=task)
+
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "commission_commission"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertLessEqual(len(ctx), 14)
+
+    def test_query_count_is_constant_per_completion(self):
+        counts = []
+        for number, product in enumerate(self.products, start=1):
+            task = UserProductTask.objects.create(user=self.user, product=product, task_number=number)
+            with CaptureQueriesContext(connection) as ctx:
+                complete_task(self.user, product, task=task)
+            counts.append(len(ctx))
+        self.assertEqual(len(set(counts[1:])), 1)
+
+    def test_repeat_product_records_self_but_not_referral(self):
+        self.complete(self.products[0], 1)
+        result = self.complete(self.products[0], 2)
+
+        self.assertEqual(result['referral_commission'], Decimal('0.20'))
+        self.assertEqual(Commission.objects.filter(user=self.user, commission_type='self').count(), 2)
+        self.assertEqual(Commission.objects.filter(user=self.referrer, commission_type='referral').count(), 1)
+        self.assertEqual(Wallet.objects.get(user=self.referrer).referral_commission, Decimal('0.20'))
+        self.assertEqual(DailyCommissionRollup.objects.get(user=self.referrer).count, 1)
+
+    def test_insufficient_balance_changes_nothing(self):
+        Wallet.objects.filter(user=self.user).update(current_balance=Decimal('5.00'))
+        task = UserProductTask.objects.create(user=self.user, product=self.products[0], task_number=1)
+
+        result = complete_task(self.user, self.products[0], task=task)
+
+        self.assertEqual(result['warning'], 'Insufficient balance.')
+        task.refresh_from_db()
+        self.assertFalse(task.is_completed)
+        self.assertFalse(Commission.objects.exists())
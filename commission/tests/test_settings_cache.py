@@ -0,0 +1,73 @@
+import json
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from AmazonProject.cache_utils import RequestMemoMiddleware, cache_timeout
+from commission.models import CommissionSetting
+from commission.utils import get_commission_setting
+from products.utils import get_daily_task_limit
+
+User = get_user_model()
+
+
+class CommissionSettingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='cache_admin', password='pass', role='admin')
+        self.user = User.objects.create(username='cache_user', phone='+9000001')
+        CommissionSetting.objects.create(user=self.user, product_rate=Decimal('4.00'), daily_task_limit=30)
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_repeat_lookups_hit_the_cache(self):
+        self.assertEqual(get_commission_setting(self.user)['product_rate'], Decimal('4.00'))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_daily_task_limit(self.user), 30)
+
+    def test_defaults_when_user_has_no_setting(self):
+        other = User.objects.create(username='cache_other', phone='+9000002')
+        self.assertEqual(
+            get_commission_setting(other),
+            {'product_rate': Decimal('0.00'), 'referral_rate': Decimal('0.00'), 'daily_task_limit': 60},
+        )
+
+    def test_admin_views_invalidate(self):
+        get_commission_setting(self.user)
+
+        self.client.post(reverse('commission:set_commission', args=[self.user.id]), {'commission_rate': '6.50'})
+        self.assertEqual(get_commission_setting(self.user)['product_rate'], Decimal('6.50'))
+
+        self.client.post(
+            reverse('commission:update_user_referral_commission'),
+            json.dumps({'user_id': self.user.id, 'rate': '1.5'}),
+            content_type='application/json',
+        )
+        self.assertEqual(get_commission_setting(self.user)['referral_rate'], Decimal('1.50'))
+
+        self.client.post(
+            reverse('accounts:admin_dashboard'),
+            {'action': 'set_daily_limit', 'user_id': self.user.id, 'daily_limit': '45'},
+        )
+        self.assertEqual(get_daily_task_limit(self.user), 45)
+
+    def test_request_memo_skips_the_shared_cache(self):
+        results = []
+
+        def view(request):
+            results.append(get_commission_setting(self.user))
+            cache.clear()
+            with self.assertNumQueries(0):
+                results.append(get_commission_setting(self.user))
+
+        RequestMemoMiddleware(view)(None)
+        self.assertEqual(results[0], results[1])
+
+    def test_local_cache_caps_timeouts(self):
+        with override_settings(CACHE_LOCAL_TIMEOUT=7):
+            self.assertEqual((cache_timeout(300), cache_timeout(None), cache_timeout(3)), (7, 7, 3))
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/amazonproject-test-cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(cache_timeout(300), 300)
@@ -1,8 +1,11 @@
 from decimal import Decimal
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from commission.utils import add_referral_commission_atomic
+from commission.service import process_product_completion
+from commission.utils import add_referral_commission_atomic, create_commission_once, referral_idempotency_key
 from commission.models import CommissionSetting, Commission
 from products.models import Product
 from balance.models import Wallet
@@ -31,3 +34,43 @@ class CommissionUtilsTest(TestCase):
 
         wallet = Wallet.objects.get(user=self.referrer)
         self.assertEqual(wallet.referral_commission, Decimal('0.50'))
+
+
+class ReferralIdempotencyKeyTest(TestCase):
+    def setUp(self):
+        self.referrer = User.objects.create(username='k_referrer', phone='+6000001')
+        self.referred = User.objects.create(username='k_referred', phone='+6000002', referred_by=self.referrer)
+        CommissionSetting.objects.create(user=self.referrer, referral_rate=Decimal('5.00'))
+        CommissionSetting.objects.create(user=self.referred, referral_rate=Decimal('5.00'))
+        Wallet.objects.create(user=self.referrer)
+        Wallet.objects.create(user=self.referred, current_balance=Decimal('100.00'))
+        self.product = Product.objects.create(name='KProduct', price=Decimal('10.00'))
+        self.key = referral_idempotency_key(self.referrer.id, self.referred.id, self.product.id)
+
+    def test_duplicate_insert_returns_existing_row(self):
+        first, created = create_commission_once(self.key, user=self.referrer, product_name='x', amount=Decimal('1.00'))
+        second, created_again = create_commission_once(self.key, user=self.referrer, product_name='x', amount=Decimal('9.00'))
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.amount, Decimal('1.00'))
+
+    def test_referral_write_does_not_read_first(self):
+        with CaptureQueriesContext(connection) as ctx:
+            process_product_completion(self.referred, self.product)
+
+        commission_reads = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "commission_commission"' in q['sql']
+        ]
+        self.assertEqual(commission_reads, [])
+        self.assertEqual(Commission.objects.get(idempotency_key=self.key).amount, Decimal('0.50'))
+
+    def test_key_is_shared_across_code_paths(self):
+        process_product_completion(self.referred, self.product)
+        self.assertEqual(add_referral_commission_atomic(self.referrer, self.referred, self.product), Decimal('0.50'))
+        process_product_completion(self.referred, self.product)
+
+        self.assertEqual(Commission.objects.filter(user=self.referrer, commission_type='referral').count(), 1)
+        self.assertEqual(Wallet.objects.get(user=self.referrer).referral_commission, Decimal('0.50'))
@@ -1,13 +1,54 @@
+from datetime import timedelta
 from decimal import Decimal
-from django.db import transaction
-from django.db.models import Sum
-from balance.models import Wallet
-from commission.models import Commission, CommissionSetting
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from commission.models import Commission, CommissionSetting, DailyCommissionRollup
 from django.contrib.auth import get_user_model
+from AmazonProject.cache_utils import bump_version, memoized
+from archive.services import get_archived_commission_total
 
 User = get_user_model()
 
 
+# -----------------------------
+# Cached Commission Settings
+# -----------------------------
+SETTINGS_CACHE_NAMESPACE = 'commission_setting'
+DEFAULT_DAILY_TASK_LIMIT = 60
+
+
+def get_commission_setting(user):
+    """
+    Returns the user's {'product_rate', 'referral_rate', 'daily_task_limit'},
+    with defaults when no CommissionSetting exists. Memoized per request and
+    cached in the shared cache; any CommissionSetting save/delete bumps the
+    user's version (see commission.signals).
+    """
+    user_id = getattr(user, 'pk', user)
+    return memoized(SETTINGS_CACHE_NAMESPACE, user_id, lambda: _load_commission_setting(user_id))
+
+
+def _load_commission_setting(user_id):
+    setting = CommissionSetting.objects.filter(user_id=user_id).first()
+    if setting is None:
+        return {
+            'product_rate': Decimal('0.00'),
+            'referral_rate': Decimal('0.00'),
+            'daily_task_limit': DEFAULT_DAILY_TASK_LIMIT,
+        }
+    return {
+        'product_rate': Decimal(setting.product_rate),
+        'referral_rate': Decimal(setting.referral_rate),
+        'daily_task_limit': setting.daily_task_limit,
+    }
+
+
+def invalidate_commission_setting(user_id):
+    """Drops cached settings for the user in every process."""
+    bump_version(SETTINGS_CACHE_NAMESPACE, user_id)
+
+
 # -----------------------------
 # Commission Rates
 # -----------------------------
@@ -16,8 +57,7 @@ def get_product_commission_rate(user):
     Returns the product commission rate for a user.
     Defaults to 0.00 if not set.
     """
-    setting = CommissionSetting.objects.filter(user=user).order_by('-updated_at').first()
-    return Decimal(setting.product_rate) if setting else Decimal('0.00')
+    return get_commission_setting(user)['product_rate']
 
 
 def get_referral_rate(referrer):
@@ -28,8 +68,38 @@ def get_referral_rate(referrer):
     if not referrer or referrer.role != 'user':
         return Decimal('0.00')
 
-    setting = CommissionSetting.objects.filter(user=referrer).first()
-    return Decimal(setting.referral_rate) if setting else Decimal('0.00')
+    return get_commission_setting(referrer)['referral_rate']
+
+
+# -----------------------------
+# Idempotent Commission Records
+# -----------------------------
+def commission_product_name(product):
+    """
+    Commission.product_name for a product: "Product <id>", stable across
+    renames and image changes (a product's file name was used by some paths
+    before, and was empty for products without an image).
+    """
+    return f"Product {product.id}"
+
+
+def referral_idempotency_key(referrer_id, referred_id, product_id):
+    """A referrer is paid at most once per referred user and product."""
+    return f"referral:{referrer_id}:{referred_id}:product:{product_id}"
+
+
+def create_commission_once(idempotency_key, **fields):
+    """
+    Inserts a Commission keyed by idempotency_key and returns
+    (commission, created). The unique constraint decides the winner, so
+    the normal path is a single INSERT and concurrent duplicates get the
+    existing row back instead of creating a second one.
+    """
+    try:
+        with transaction.atomic():
+            return Commission.objects.create(idempotency_key=idempotency_key, **fields), True
+    except IntegrityError:
+        return Commission.objects.get(idempotency_key=idempotency_key), False
 
 
 # -----------------------------
@@ -41,16 +111,16 @@ def calculate_product_commission(user, product):
     Calculates product commission WITHOUT updating wallet.
     Returns a Commission instance or None if rate <= 0.
     """
+    from commission.service import commission_amount
+
     rate = get_product_commission_rate(user)
     if rate <= 0:
         return None
 
-    amount = (Decimal(product.price) * rate / Decimal('100.00')).quantize(Decimal('0.01'))
-
     commission = Commission.objects.create(
         user=user,
-        product_name=getattr(product, 'file', f'Product {product.id}'),
-        amount=amount,
+        product_name=commission_product_name(product),
+        amount=commission_amount(product.price, rate),
         commission_type='self',
     )
     return commission
@@ -59,56 +129,86 @@ def calculate_product_commission(user, product):
 # -----------------------------
 # Referral Commission
 # -----------------------------
-@transaction.atomic
 def add_referral_commission_atomic(referrer, referred_user, product):
     """
     Adds referral commission to the referrer based on product price.
-    Updates wallet and commission record.
+    Kept for existing callers; see commission.service.pay_referral_commission.
     """
-    if not referrer or referrer.role != 'user' or referred_user.role != 'user':
-        return Decimal('0.00')
+    from commission.service import pay_referral_commission
 
-    referral_rate = get_referral_rate(referrer)
-    if referral_rate <= 0:
-        return Decimal('0.00')
+    return pay_referral_commission(referrer, referred_user, product)
 
-    product_name = getattr(product, 'file', f'Product {product.id}')
 
-    # Idempotency
-    existing = Commission.objects.filter(
-        user=referrer,
-        product_name=product_name,
-        commission_type='referral',
-        triggered_by=referred_user
-    ).first()
+# -----------------------------
+# Total Commission
+# -----------------------------
+def get_total_commission(user):
+    """
+    Returns the total commission earned by the user (self + referral),
+    including commissions moved to the archive.
+    """
+    total = Commission.objects.filter(user=user).aggregate(total=Sum('amount'))['total']
+    return (total or Decimal('0.00')) + get_archived_commission_total(user.id)
 
-    if existing:
-        return existing.amount
 
-    referral_amount = (Decimal(product.price) * referral_rate / Decimal('100.00')).quantize(Decimal('0.01'))
+# -----------------------------
+# Daily Commission Rollups
+# -----------------------------
+def add_to_daily_rollup(user_id, day, commission_type, amount, count=1):
+    """
+    Adds amount to the user's rollup row for (day, commission_type),
+    creating the row on first use. Safe under concurrent writers: the
+    unique constraint turns a lost create race into a retried update.
+    """
+    rollups = DailyCommissionRollup.objects.filter(user_id=user_id, day=day, commission_type=commission_type)
+    if rollups.update(total=F('total') + amount, count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            DailyCommissionRollup.objects.create(
+                user_id=user_id, day=day, commission_type=commission_type, total=amount, count=count
+            )
+    except IntegrityError:
+        rollups.update(total=F('total') + amount, count=F('count') + count)
+
+
+def record_commission_rollup(commission):
+    """Adds a newly created Commission row to its daily rollup."""
+    add_to_daily_rollup(
+        commission.user_id,
+        timezone.localdate(commission.created_at),
+        commission.commission_type,
+        commission.amount,
+    )
 
-    wallet, _ = Wallet.objects.get_or_create(user=referrer)
-    wallet.referral_commission += referral_amount
-    wallet.cumulative_total += referral_amount
-    wallet.save(update_fields=['referral_commission', 'cumulative_total'])
 
-    Commission.objects.create(
-        user=referrer,
-        product_name=product_name,
-        commission_type='referral',
-        amount=referral_amount,
-        triggered_by=referred_user
+def get_today_commission(user):
+    """
+    Returns today's (product, referral) commission totals for the user
+    from the rollup table: one indexed lookup on (user, day).
+    """
+    totals = dict(
+        DailyCommissionRollup.objects.filter(user=user, day=timezone.localdate())
+        .values_list('commission_type', 'total')
     )
+    return totals.get('self', Decimal('0.00')), totals.get('referral', Decimal('0.00'))
 
-    return referral_amount
 
-
-# -----------------------------
-# Total Commission
-# -----------------------------
-def get_total_commission(user):
+def get_daily_commission_history(user, days=30):
     """
-    Returns the total commission earned by the user (self + referral).
+    Returns [{'day', 'self', 'referral', 'total'}, ...] for the last `days`
+    days (oldest first, missing days as zero) for daily commission charts.
     """
-    total = Commission.objects.filter(user=user).aggregate(total=Sum('amount'))['total']
-    return total if total else Decimal('0.00')
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    history = {
+        start + timedelta(days=offset): {'self': Decimal('0.00'), 'referral': Decimal('0.00')}
+        for offset in range(days)
+    }
+    rows = DailyCommissionRollup.objects.filter(user=user, day__gte=start, day__lte=today)
+    for day, ctype, total in rows.values_list('day', 'commission_type', 'total'):
+        history[day][ctype] = total
+    return [
+        {'day': day, 'self': v['self'], 'referral': v['referral'], 'total': v['self'] + v['referral']}
+        for day, v in history.items()
+    ]
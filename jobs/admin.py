@@ -0,0 +1,21 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.action(description="Retry selected jobs")
+def retry_jobs(modeladmin, request, queryset):
+    count = queryset.exclude(status='running').update(
+        status='queued', attempts=0, last_error='', finished_at=None, run_after=timezone.now()
+    )
+    messages.success(request, f"{count} jobs queued again.")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at')
+    actions = [retry_jobs]
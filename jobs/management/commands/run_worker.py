@@ -0,0 +1,52 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+
+from jobs.worker import claim_jobs, default_worker_id, requeue_stale_jobs, run_pooled_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs from the database with a thread or process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs run at the same time')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help='Pool type')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--stale-after', type=int, default=600, help='Seconds before a running job is re-queued')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due')
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        concurrency = max(1, options['concurrency'])
+        stale_after = timedelta(seconds=options['stale_after'])
+
+        if options['pool'] == 'process':
+            # Spawn, not fork: children set Django up and open their own
+            # DB connections instead of sharing the parent's sockets
+            executor = ProcessPoolExecutor(
+                max_workers=concurrency, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        self.stdout.write(f"Worker {worker_id}: {options['pool']} pool of {concurrency}")
+        totals = {'done': 0, 'retry': 0, 'failed': 0}
+        with executor:
+            while True:
+                requeue_stale_jobs(stale_after)
+                job_ids = claim_jobs(worker_id, concurrency)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                for outcome in executor.map(run_pooled_job, job_ids):
+                    totals[outcome] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Jobs done: {totals['done']}, retried: {totals['retry']}, failed: {totals['failed']}"
+        ))
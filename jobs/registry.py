@@ -0,0 +1,98 @@
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+_handlers = {}
+# Id of the job this thread/process is running (set by jobs.worker.run_job)
+current_job_id = ContextVar('current_job_id', default=None)
+
+
+# -----------------------------
+# Handler Registry
+# -----------------------------
+def job(name, max_attempts=3):
+    """
+    Registers a function as a job handler under `name`. Handlers receive
+    the payload as keyword arguments and must be safe to run again: a job
+    is retried after an error and re-queued if its worker dies mid-run.
+    Handlers run outside any transaction and commit their own work;
+    long-running ones call heartbeat() as they go.
+    """
+    def register(func):
+        _handlers[name] = func
+        func.job_name = name
+        func.max_attempts = max_attempts
+        return func
+    return register
+
+
+def get_handler(name):
+    return _handlers.get(name)
+
+
+def heartbeat(*args):
+    """
+    Tells the worker the current job is still alive: pushes its locked_at
+    forward so requeue_stale_jobs doesn't hand it to another worker.
+    Chunked handlers pass it as their per-chunk callback (arguments are
+    ignored). A no-op outside a worker.
+    """
+    job_id = current_job_id.get()
+    if job_id is not None:
+        Job.objects.filter(pk=job_id, status='running').update(locked_at=timezone.now())
+
+
+# -----------------------------
+# Enqueue
+# -----------------------------
+def enqueue(handler, payload=None, idempotency_key=None, delay=None, max_attempts=None):
+    """
+    Queues handler (a registered function or its name) with payload.
+    The row is written in the caller's transaction, so workers only see it
+    once the surrounding request commits. With an idempotency_key, a
+    second enqueue returns the first job instead of adding another.
+    """
+    name = getattr(handler, 'job_name', handler)
+    func = get_handler(name)
+    if func is None:
+        raise ValueError(f"Unknown job: {name}")
+
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'max_attempts': max_attempts or func.max_attempts,
+        'run_after': timezone.now() + (delay or timedelta(0)),
+    }
+    if idempotency_key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(idempotency_key=idempotency_key, **fields)
+    except IntegrityError:
+        return Job.objects.get(idempotency_key=idempotency_key)
+
+
+def enqueue_many(handler, payloads, idempotency_keys=None):
+    """
+    Queues one job per payload with a single bulk INSERT. Keys that are
+    already queued are skipped. Returns the number of payloads given.
+    """
+    name = getattr(handler, 'job_name', handler)
+    func = get_handler(name)
+    if func is None:
+        raise ValueError(f"Unknown job: {name}")
+
+    now = timezone.now()
+    keys = idempotency_keys or [None] * len(payloads)
+    Job.objects.bulk_create(
+        [
+            Job(name=name, payload=payload, idempotency_key=key, max_attempts=func.max_attempts, run_after=now)
+            for payload, key in zip(payloads, keys)
+        ],
+        ignore_conflicts=True,
+    )
+    return len(payloads)
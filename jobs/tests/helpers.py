@@ -0,0 +1,37 @@
+from unittest import mock
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.worker import claim_jobs, run_job
+
+
+class ResumableJobMixin:
+    """
+    Worker-level scenario for chunked job handlers (use with
+    TransactionTestCase, the worker commits per chunk):
+    - run_with_failing_chunk: one chunk raises, the job is retried
+    - resume: the retried job runs again and finishes
+    Each test then checks its own cursor and counters in between.
+    """
+
+    def run_with_failing_chunk(self, job, module, attribute, fail_on):
+        """Runs job with module.attribute raising on its fail_on-th call."""
+        real = getattr(module, attribute)
+        calls = []
+
+        def failing(*args):
+            calls.append(args)
+            if len(calls) == fail_on:
+                raise RuntimeError(f"chunk {fail_on} failed")
+            return real(*args)
+
+        claim_jobs('w1', 1)
+        with mock.patch.object(module, attribute, failing):
+            self.assertEqual(run_job(job.pk), 'retry')
+        self.assertIn(f"chunk {fail_on} failed", Job.objects.get(pk=job.pk).last_error)
+
+    def resume(self, job):
+        """Makes the retried job due now and runs it to completion."""
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        claim_jobs('w1', 1)
+        self.assertEqual(run_job(job.pk), 'done')
@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from balance.jobs import approve_voucher_job
+from balance.models import RechargeRequest, Voucher, Wallet
+from jobs.models import Job
+from jobs.registry import enqueue, heartbeat, job
+from jobs.worker import RETRY_BASE_SECONDS, claim_jobs, requeue_stale_jobs, run_job
+
+User = get_user_model()
+
+calls = []
+
+
+@job('tests.record')
+def record_job(value):
+    calls.append(value)
+
+
+@job('tests.flaky', max_attempts=2)
+def flaky_job():
+    raise RuntimeError("boom")
+
+
+@job('tests.partial', max_attempts=1)
+def partial_job(user_id):
+    """Commits one step, beats, then fails."""
+    Wallet.objects.filter(user_id=user_id).update(current_balance=Decimal('1.00'))
+    Job.objects.filter(name='tests.partial').update(locked_at=timezone.now() - timedelta(hours=1))
+    heartbeat()
+    calls.append(requeue_stale_jobs(timedelta(minutes=10)))
+    raise RuntimeError("second step failed")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_with_key_is_idempotent(self):
+        first = enqueue(record_job, {'value': 1}, idempotency_key='record:1')
+        second = enqueue('tests.record', {'value': 1}, idempotency_key='record:1')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('tests.missing')
+
+    def test_claim_is_exclusive_and_respects_run_after(self):
+        due = enqueue(record_job, {'value': 1})
+        enqueue(record_job, {'value': 2}, delay=timedelta(minutes=5))
+
+        self.assertEqual(claim_jobs('w1', 10), [due.pk])
+        self.assertEqual(claim_jobs('w2', 10), [])
+        due.refresh_from_db()
+        self.assertEqual((due.status, due.locked_by, due.attempts), ('running', 'w1', 1))
+
+    def test_run_job_marks_done(self):
+        queued = enqueue(record_job, {'value': 'x'})
+        claim_jobs('w1', 1)
+
+        self.assertEqual(run_job(queued.pk), 'done')
+        self.assertEqual(calls, ['x'])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'done')
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_errors_back_off_then_fail(self):
+        queued = enqueue(flaky_job)
+        claim_jobs('w1', 1)
+        self.assertEqual(run_job(queued.pk), 'retry')
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'queued')
+        self.assertIn('boom', queued.last_error)
+        self.assertGreater(queued.run_after, timezone.now() + timedelta(seconds=RETRY_BASE_SECONDS - 1))
+
+        Job.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        claim_jobs('w1', 1)
+        self.assertEqual(run_job(queued.pk), 'failed')
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_stale_running_jobs_are_requeued(self):
+        queued = enqueue(record_job, {'value': 1})
+        claim_jobs('w1', 1)
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        self.assertEqual(claim_jobs('w2', 1), [queued.pk])
+
+
+class RunWorkerTests(TransactionTestCase):
+    def test_failed_job_keeps_committed_steps_and_heartbeat_defers_requeue(self):
+        calls.clear()
+        user = User.objects.create(username='partial_user', phone='+8000002')
+        Wallet.objects.create(user=user, current_balance=Decimal('0.00'))
+        queued = enqueue(partial_job, {'user_id': user.id})
+        claim_jobs('w1', 1)
+
+        self.assertEqual(run_job(queued.pk), 'failed')
+        self.assertEqual(calls, [0])  # the heartbeat kept it from being re-queued
+        self.assertEqual(Wallet.objects.get(user=user).current_balance, Decimal('1.00'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'failed')
+        self.assertIn('second step failed', queued.last_error)
+        heartbeat()  # outside a worker: no-op
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create(username='job_user', phone='+8000001')
+        Wallet.objects.create(user=self.user, current_balance=Decimal('0.00'))
+
+    def test_worker_approves_voucher_and_deletes_file(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            recharge = RechargeRequest.objects.create(user=self.user, amount=Decimal('25.00'))
+            voucher = Voucher.objects.create(
+                recharge_request=recharge, file=SimpleUploadedFile('v.jpg', b'voucher-bytes')
+            )
+            storage, name = voucher.file.storage, voucher.file.name
+            self.assertTrue(storage.exists(name))
+
+            enqueue(approve_voucher_job, {'voucher_id': voucher.id}, idempotency_key=f'approve_voucher:{voucher.id}')
+            call_command('run_worker', '--once', '--concurrency', '2', stdout=StringIO())
+
+            self.assertFalse(storage.exists(name))
+
+        recharge.refresh_from_db()
+        self.assertEqual(recharge.status, 'approved')
+        self.assertFalse(Voucher.objects.filter(pk=voucher.pk).exists())
+        self.assertEqual(Wallet.objects.get(user=self.user).current_balance, Decimal('25.00'))
+        self.assertEqual(Job.objects.get().status, 'done')
@@ -0,0 +1,99 @@
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import current_job_id, get_handler
+
+RETRY_BASE_SECONDS = 5
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# -----------------------------
+# Claiming
+# -----------------------------
+def claim_jobs(worker_id, limit):
+    """
+    Claims up to `limit` due jobs for this worker. Each claim is a
+    conditional UPDATE (WHERE status='queued'), so concurrent workers
+    never get the same job. Returns the claimed job ids.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status='queued', run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in candidates:
+        if Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1
+        ):
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_jobs(stale_after):
+    """
+    Puts back jobs whose worker stopped reporting (crashed or killed):
+    locked_at is the claim time, pushed forward by each heartbeat().
+    """
+    cutoff = timezone.now() - stale_after
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(status='queued', locked_by='')
+
+
+# -----------------------------
+# Running
+# -----------------------------
+def run_job(job_id):
+    """
+    Runs one claimed job and records the outcome:
+    - success: done
+    - error with attempts left: queued again with exponential backoff
+    - error on the last attempt, or unknown handler: failed
+    The handler runs outside any transaction, so chunked handlers commit
+    (and save their cursor) per chunk and a failure keeps that progress;
+    the outcome is its own UPDATE.
+    """
+    job = Job.objects.get(pk=job_id)
+    handler = get_handler(job.name)
+    if handler is None:
+        _finish(job, 'failed', f"Unknown job: {job.name}")
+        return 'failed'
+    token = current_job_id.set(job.pk)
+    try:
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            _finish(job, 'failed', error)
+            return 'failed'
+        delay = timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+        Job.objects.filter(pk=job.pk).update(
+            status='queued', locked_by='', last_error=error, run_after=timezone.now() + delay
+        )
+        return 'retry'
+    finally:
+        current_job_id.reset(token)
+    _finish(job, 'done')
+    return 'done'
+
+
+def run_pooled_job(job_id):
+    """run_job for pool threads/processes, which each own a DB connection."""
+    try:
+        return run_job(job_id)
+    finally:
+        connection.close()
+
+
+def _finish(job, status, error=''):
+    Job.objects.filter(pk=job.pk).update(status=status, last_error=error, finished_at=timezone.now())
@@ -0,0 +1,90 @@
+import time
+from bisect import bisect_right
+
+from AmazonProject.cache_utils import DEFAULT_TIMEOUT, bump_version, cache_timeout, get_version, memoized
+
+from products.models import Product
+
+CATALOG_CACHE_NAMESPACE = 'catalog'
+CATALOG_IDENT = 'active'
+# Product fields kept in the snapshot: enough to hand out, price and render a product
+SNAPSHOT_FIELDS = ('id', 'name', 'price', 'commission_amount', 'file', 'image_width', 'image_height')
+
+# Per-process copy: (version, loaded_at, snapshot). Checked against the
+# shared version (request-memoized), and dropped after the catalog's cache
+# timeout: on a per-process cache, bumps made elsewhere never change the
+# version this process sees.
+_process_snapshot = (None, 0.0, None)
+
+
+# -----------------------------
+# Catalog Snapshot
+# -----------------------------
+class CatalogSnapshot:
+    """
+    The active products, loaded with one query and answered in memory:
+    - ids: sorted active product ids (bisect for the queue cursor)
+    - rows: id -> SNAPSHOT_FIELDS values
+    """
+    __slots__ = ('ids', 'rows')
+
+    def __init__(self, rows):
+        self.rows = {row[0]: row for row in rows}
+        self.ids = tuple(sorted(self.rows))
+
+    @classmethod
+    def load(cls):
+        return cls(Product.objects.filter(is_active=True).order_by('id').values_list(*SNAPSHOT_FIELDS))
+
+    def __contains__(self, product_id):
+        return product_id in self.rows
+
+    def __len__(self):
+        return len(self.ids)
+
+    def next_product_id(self, cursor):
+        """First active product id greater than cursor, or None."""
+        i = bisect_right(self.ids, cursor)
+        return self.ids[i] if i < len(self.ids) else None
+
+    def price(self, product_id):
+        """The active product's price, or None if it isn't active."""
+        row = self.rows.get(product_id)
+        return row[SNAPSHOT_FIELDS.index('price')] if row else None
+
+    def product(self, product_id):
+        """
+        A Product instance built from the snapshot (no query), or None.
+        It is what .only(*SNAPSHOT_FIELDS, 'is_active') would load: the
+        other fields are deferred (fetched on access), and save() writes
+        only the loaded ones.
+        """
+        row = self.rows.get(product_id)
+        if row is None:
+            return None
+        values = dict(zip(SNAPSHOT_FIELDS, row), is_active=True)
+        # from_db() takes the loaded fields in model field order
+        fields = [f.attname for f in Product._meta.concrete_fields if f.attname in values]
+        return Product.from_db('default', fields, [values[name] for name in fields])
+
+
+def get_catalog():
+    """
+    The active-product snapshot: from this process when its version is
+    current and it is younger than the cache timeout, else the shared
+    cache, else one query.
+    """
+    global _process_snapshot
+    version = get_version(CATALOG_CACHE_NAMESPACE, CATALOG_IDENT)
+    cached_version, loaded_at, snapshot = _process_snapshot
+    if cached_version == version and time.monotonic() - loaded_at < cache_timeout(DEFAULT_TIMEOUT):
+        return snapshot
+
+    snapshot = memoized(CATALOG_CACHE_NAMESPACE, CATALOG_IDENT, CatalogSnapshot.load)
+    _process_snapshot = (version, time.monotonic(), snapshot)
+    return snapshot
+
+
+def invalidate_catalog():
+    """Call after any write that changes active products (signals, bulk imports)."""
+    bump_version(CATALOG_CACHE_NAMESPACE, CATALOG_IDENT)
@@ -0,0 +1,113 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from products.catalog import invalidate_catalog
+from products.models import Product, ProductImageVariant
+
+# Widths generated for srcset; originals narrower than a width are not upscaled
+VARIANT_WIDTHS = (160, 320, 480, 640)
+# Variant format -> (Pillow format, extension, save options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 75, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 78, 'optimize': True, 'progressive': True}),
+}
+
+
+# -----------------------------
+# Variant Generation
+# -----------------------------
+def variant_widths(original_width):
+    """Target widths for an original: every smaller VARIANT_WIDTH plus the original's (capped)."""
+    widths = [w for w in VARIANT_WIDTHS if w < original_width]
+    largest = min(original_width, VARIANT_WIDTHS[-1])
+    if largest not in widths:
+        widths.append(largest)
+    return widths
+
+
+def generate_product_variants(product, force=False):
+    """
+    Renders product.file at each width in each format, saves the files
+    under content-hashed names and replaces the product's variant rows.
+    Skips products whose original hasn't changed since the last run
+    unless force. Returns the number of variants written (0 if skipped).
+    """
+    from PIL import Image, ImageOps
+
+    if not product.file:
+        return 0
+    with product.file.open('rb') as source:
+        original = source.read()
+    source_hash = hashlib.sha256(original).hexdigest()
+    if not force and source_hash == product.image_hash and product.image_variants.exists():
+        return 0
+
+    image = ImageOps.exif_transpose(Image.open(BytesIO(original)))
+    image = image.convert('RGB')
+    stem = os.path.splitext(os.path.basename(product.file.name))[0]
+
+    variants = []
+    for width in variant_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            variants.append(ProductImageVariant(
+                product=product, format=fmt, width=width, height=height,
+                file=_save_hashed(stem, width, extension, buffer.getvalue()),
+            ))
+
+    names = [v.file.name for v in variants]
+    with transaction.atomic():
+        stale = list(product.image_variants.exclude(file__in=names).values_list('file', flat=True))
+        product.image_variants.all().delete()
+        ProductImageVariant.objects.bulk_create(variants)
+        Product.objects.filter(pk=product.pk).update(
+            image_width=image.width, image_height=image.height, image_hash=source_hash
+        )
+        transaction.on_commit(lambda: _delete_variant_files(stale))
+        invalidate_catalog()  # the snapshot carries the image dimensions
+
+    product.image_width, product.image_height, product.image_hash = image.width, image.height, source_hash
+    return len(variants)
+
+
+def _save_hashed(stem, width, extension, content):
+    """
+    Stores content as products/variants/<stem>-<width>w.<hash>.<ext>.
+    Identical content maps to the same name, so it is written once.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    field = ProductImageVariant._meta.get_field('file')
+    name = field.generate_filename(None, f"{stem}-{width}w.{digest}.{extension}")
+    if not field.storage.exists(name):
+        name = field.storage.save(name, ContentFile(content))
+    return name
+
+
+def _delete_variant_files(names):
+    # Products with identical originals share variant files; keep those in use
+    in_use = set(ProductImageVariant.objects.filter(file__in=names).values_list('file', flat=True))
+    storage = ProductImageVariant._meta.get_field('file').storage
+    for name in names:
+        if name not in in_use:
+            storage.delete(name)
+
+
+# -----------------------------
+# srcset
+# -----------------------------
+def build_srcsets(product):
+    """
+    {format: "url 160w, url 320w, ..."} from the product's variants,
+    using prefetched image_variants when available.
+    """
+    srcsets = {}
+    for variant in product.image_variants.all():
+        srcsets.setdefault(variant.format, []).append(f"{variant.file.url} {variant.width}w")
+    return {fmt: ", ".join(entries) for fmt, entries in srcsets.items()}
@@ -0,0 +1,147 @@
+import csv
+import hashlib
+import json
+import os
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from products.models import Product
+
+
+class ManifestError(ValueError):
+    """The manifest can't be read (unknown format or missing columns)."""
+
+
+# -----------------------------
+# Manifest Parsing
+# -----------------------------
+def read_manifest(path):
+    """
+    Rows from a .csv (with a header) or .jsonl manifest, as dicts with
+    name, price, commission_amount and image (plus optional description).
+    Image paths are relative to the manifest's directory unless absolute.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as handle:
+        if extension == '.csv':
+            rows = list(csv.DictReader(handle))
+        elif extension in ('.jsonl', '.ndjson'):
+            rows = [json.loads(line) for line in handle if line.strip()]
+        else:
+            raise ManifestError(f"Unsupported manifest type: {extension} (use .csv or .jsonl)")
+
+    missing = [f for f in ('price', 'image') if rows and f not in rows[0]]
+    if missing:
+        raise ManifestError(f"Manifest is missing columns: {', '.join(missing)}")
+
+    base = os.path.dirname(os.path.abspath(path))
+    for row in rows:
+        image = str(row.get('image') or '')
+        row['image'] = image if os.path.isabs(image) else os.path.join(base, image)
+    return rows
+
+
+def clean_row(row):
+    """Validated Product field values for a manifest row; raises ValueError."""
+    try:
+        price = Decimal(str(row['price'])).quantize(Decimal('0.01'))
+        commission = Decimal(str(row.get('commission_amount') or '0')).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError):
+        raise ValueError("price and commission_amount must be numbers")
+    if price <= 0 or commission < 0:
+        raise ValueError("price must be positive and commission_amount not negative")
+    return {
+        'name': (row.get('name') or 'Product').strip()[:255],
+        'description': row.get('description') or '',
+        'price': price,
+        'commission_amount': commission,
+    }
+
+
+# -----------------------------
+# Image Inspection (process pool)
+# -----------------------------
+def inspect_image(path):
+    """
+    SHA-256 and dimensions of an image file. Runs in pool processes, so it
+    touches no Django state. Returns a dict with path, hash, width, height
+    and error (None on success).
+    """
+    from PIL import Image
+
+    result = {'path': path, 'hash': None, 'width': None, 'height': None, 'error': None}
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+                digest.update(chunk)
+        with Image.open(path) as image:
+            result['width'], result['height'] = image.size
+            image.verify()
+        result['hash'] = digest.hexdigest()
+    except Exception as exc:
+        result['error'] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+# -----------------------------
+# Import
+# -----------------------------
+def existing_products(hashes, names):
+    """
+    (hashes, file names) among those given that already have a product,
+    one query per 500 values. Names catch in-place media files imported
+    before image hashes were recorded.
+    """
+    return _existing('image_hash', hashes), _existing('file', names)
+
+
+def _existing(field, values):
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), 500):
+        found.update(
+            Product.objects.filter(**{f"{field}__in": values[start:start + 500]}).values_list(field, flat=True)
+        )
+    return found
+
+
+def stored_image_name(path):
+    """
+    Storage name for an image: files already under MEDIA_ROOT/products are
+    used in place, anything else is copied into products/.
+    Returns (name, needs_copy).
+    """
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    absolute = os.path.abspath(path)
+    if absolute.startswith(os.path.join(media_root, 'products') + os.sep):
+        return os.path.relpath(absolute, media_root).replace(os.sep, '/'), False
+    return f"products/{os.path.basename(path)}", True
+
+
+def build_product(fields, image):
+    """
+    An unsaved Product for a cleaned row and its inspected image, and the
+    file to copy into storage for it (None when it is used in place).
+    Nothing is written here: the copy happens with the product's insert
+    (see store_image).
+    """
+    name, needs_copy = stored_image_name(image['path'])
+    product = Product(
+        file=name,
+        image_hash=image['hash'],
+        image_width=image['width'],
+        image_height=image['height'],
+        **fields,
+    )
+    return product, image['path'] if needs_copy else None
+
+
+def store_image(product, source):
+    """Copies source into storage under the product's file name (or a free variant of it)."""
+    with open(source, 'rb') as handle:
+        product.file.name = default_storage.save(product.file.name, File(handle))
+    return product.file.name
@@ -0,0 +1,29 @@
+from datetime import date
+
+from jobs.registry import heartbeat, job
+from products.images import generate_product_variants
+from products.models import Product
+from products.rollover import ROLLOVER_CHUNK_SIZE, rollover_day
+
+
+# -----------------------------
+# Image Variant Job
+# -----------------------------
+@job('products.image_variants')
+def product_image_variants_job(product_id, force=False):
+    """Generates the srcset variants of a product's image (no-op if unchanged)."""
+    product = Product.objects.filter(pk=product_id).first()
+    if product is not None:
+        generate_product_variants(product, force=force)
+
+
+# -----------------------------
+# Daily Rollover Job
+# -----------------------------
+@job('products.rollover_day')
+def rollover_day_job(day, chunk_size=ROLLOVER_CHUNK_SIZE):
+    """
+    Queued form of manage.py rollover_day. Chunks commit one by one, so a
+    retry resumes after the last finished chunk.
+    """
+    rollover_day(date.fromisoformat(day), chunk_size=chunk_size, on_chunk=heartbeat)
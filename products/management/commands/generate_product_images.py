@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from products.images import generate_product_variants
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG srcset variants for product images (skips unchanged images)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate even if the image is unchanged')
+        parser.add_argument('--product', type=int, action='append', help='Only this product id (repeatable)')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(file='').order_by('id')
+        if options['product']:
+            products = products.filter(id__in=options['product'])
+
+        generated = skipped = failed = variants = 0
+        for product in products.iterator(chunk_size=200):
+            try:
+                written = generate_product_variants(product, force=options['force'])
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f"Product {product.id} ({product.file.name}): {exc}"))
+                continue
+            if written:
+                generated += 1
+                variants += written
+            else:
+                skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{generated} products processed ({variants} variants), {skipped} unchanged, {failed} failed"
+        ))
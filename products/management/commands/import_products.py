@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from jobs.registry import enqueue_many
+from products.catalog import invalidate_catalog
+from products.importer import (
+    ManifestError,
+    build_product,
+    clean_row,
+    existing_products,
+    inspect_image,
+    read_manifest,
+    store_image,
+    stored_image_name,
+)
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Import products from a CSV/JSONL manifest (name, price, commission_amount, image); safe to re-run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help='Path to a .csv or .jsonl manifest')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes hashing images')
+        parser.add_argument('--batch-size', type=int, default=500, help='Products per bulk INSERT')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be imported without writing')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            rows = read_manifest(options['manifest'])
+        except (OSError, ManifestError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        # 1. Validate rows (cheap, in-process)
+        cleaned, skipped = [], []
+        for number, row in enumerate(rows, start=1):
+            try:
+                cleaned.append((number, clean_row(row), row['image']))
+            except ValueError as exc:
+                skipped.append((number, str(exc)))
+
+        # 2. Hash and inspect images in a process pool
+        paths = [path for _, _, path in cleaned]
+        images = self.inspect(paths, options['workers'])
+        inspected_at = time.monotonic()
+
+        # 3. One set-based lookup for images that already have a product
+        existing_hashes, existing_names = existing_products(
+            {i['hash'] for i in images if i['hash']},
+            {name for name, needs_copy in map(stored_image_name, paths) if not needs_copy},
+        )
+
+        products, seen, duplicates = [], set(), 0
+        for (number, fields, _), image in zip(cleaned, images):
+            if image['error']:
+                skipped.append((number, image['error']))
+            elif (
+                image['hash'] in existing_hashes or image['hash'] in seen
+                or stored_image_name(image['path'])[0] in existing_names
+            ):
+                duplicates += 1
+            else:
+                seen.add(image['hash'])
+                products.append(build_product(fields, image))
+
+        # 4. Batched bulk inserts
+        created = 0 if options['dry_run'] else self.insert(products, options['batch_size'])
+        finished = time.monotonic()
+
+        for number, reason in skipped:
+            self.stderr.write(f"Row {number}: {reason}")
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(products) if options['dry_run'] else created} products; "
+            f"{duplicates} already present, {len(skipped)} skipped, {len(rows)} rows"
+        ))
+        inspect_seconds = max(inspected_at - started, 1e-6)
+        total_seconds = max(finished - started, 1e-6)
+        self.stdout.write(
+            f"Images: {len(images) / inspect_seconds:.1f}/s with {options['workers']} workers; "
+            f"total {total_seconds:.2f}s ({len(rows) / total_seconds:.1f} rows/s)"
+        )
+
+    def inspect(self, paths, workers):
+        if workers <= 1 or len(paths) < 2:
+            return [inspect_image(path) for path in paths]
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            return list(pool.map(inspect_image, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+    def insert(self, products, batch_size):
+        """
+        bulk_create in batches, one transaction each; queues the image
+        variants. Images are copied into storage with their batch and
+        deleted again if the batch's transaction rolls back.
+        """
+        created = 0
+        for start in range(0, len(products), batch_size):
+            batch = products[start:start + batch_size]
+            stored = []
+            try:
+                with transaction.atomic():
+                    for product, source in batch:
+                        if source:
+                            stored.append(store_image(product, source))
+                    Product.objects.bulk_create([product for product, _ in batch])
+                    # bulk_create skips post_save, so queue the variants here
+                    enqueue_many(
+                        'products.image_variants',
+                        [{'product_id': p.pk} for p, _ in batch],
+                        [f"product_variants:{p.pk}:{p.file.name}" for p, _ in batch],
+                    )
+            except Exception:
+                for name in stored:
+                    default_storage.delete(name)
+                raise
+            created += len(batch)
+        if created:
+            invalidate_catalog()  # bulk_create skips the post_save hook
+        return created
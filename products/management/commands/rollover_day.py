@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import current_business_day
+from products.rollover import ROLLOVER_CHUNK_SIZE, rollover_day
+
+
+class Command(BaseCommand):
+    help = 'Close a business day: summarize its tasks and reset per-user daily counters, in resumable chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--day', help='Day to close, YYYY-MM-DD (default: yesterday)')
+        parser.add_argument('--chunk-size', type=int, default=ROLLOVER_CHUNK_SIZE, help='Users per transaction')
+
+    def handle(self, *args, **options):
+        if options['day']:
+            try:
+                day = date.fromisoformat(options['day'])
+            except ValueError:
+                raise CommandError(f"Invalid --day: {options['day']}")
+        else:
+            day = current_business_day() - timedelta(days=1)
+        if day >= current_business_day():
+            raise CommandError("Only past business days can be closed.")
+
+        run = rollover_day(day, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled over {day}: {run.users_processed} users (status: {run.status})"
+        ))
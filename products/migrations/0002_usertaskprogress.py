@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:37
+
+import django.db.models.deletion
+import products.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_task_progress(apps, schema_editor):
+    UserProductTask = apps.get_model('products', 'UserProductTask')
+    UserTaskProgress = apps.get_model('products', 'UserTaskProgress')
+
+    rows = (
+        UserProductTask.objects.order_by()
+        .values('user_id')
+        .annotate(
+            assigned=Count('id'),
+            completed=Count('id', filter=Q(is_completed=True)),
+            last_number=Max('task_number'),
+        )
+    )
+    UserTaskProgress.objects.bulk_create(
+        [
+            UserTaskProgress(
+                user_id=row['user_id'],
+                assigned_count=row['assigned'],
+                completed_count=row['completed'],
+                last_task_number=row['last_number'] or row['assigned'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('last_task_number', models.PositiveIntegerField(default=0)),
+                ('current_day', models.DateField(default=products.models.current_business_day)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_task_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:38
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_queue_cursor(apps, schema_editor):
+    UserProductTask = apps.get_model('products', 'UserProductTask')
+    UserTaskProgress = apps.get_model('products', 'UserTaskProgress')
+
+    last_assigned = (
+        UserProductTask.objects.filter(user_id=OuterRef('user_id'))
+        .order_by()
+        .values('user_id')
+        .annotate(last=Max('product_id'))
+        .values('last')
+    )
+    UserTaskProgress.objects.update(last_product_id=Coalesce(Subquery(last_assigned), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_usertaskprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertaskprogress',
+            name='last_product_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'id'], name='product_active_id_idx'),
+        ),
+        migrations.RunPython(backfill_queue_cursor, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_queue_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userproducttask',
+            index=models.Index(fields=['user', 'is_completed'], name='task_user_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userproducttask',
+            index=models.Index(fields=['user', 'product'], name='task_user_product_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:06
+
+import django.db.models.deletion
+import products.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_business_day(apps, schema_editor):
+    """Existing tasks belong to the day they were created."""
+    UserProductTask = apps.get_model('products', 'UserProductTask')
+    UserProductTask.objects.update(business_day=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTaskSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['user', '-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskRollover',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done')], default='running', max_length=10)),
+                ('last_user_id', models.PositiveBigIntegerField(default=0)),
+                ('users_processed', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userproducttask',
+            name='business_day',
+            field=models.DateField(default=products.models.current_business_day),
+        ),
+        migrations.RunPython(backfill_business_day, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userproducttask',
+            index=models.Index(fields=['user', 'business_day', 'task_number'], name='task_user_day_number_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailytasksummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_task_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailytasksummary',
+            unique_together={('user', 'day')},
+        ),
+    ]
@@ -1,5 +1,12 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+def current_business_day():
+    """The day tasks and daily limits count against (site timezone)."""
+    return timezone.localdate()
+
 
 class Product(models.Model):
     name = models.CharField(max_length=255, default='Product')
@@ -9,10 +16,44 @@ class Product(models.Model):
     file = models.ImageField(upload_to='products/')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Filled in with the image variants (products.images)
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True, default='')  # SHA-256 of the original
+
+    class Meta:
+        indexes = [
+            # Next-product lookup: active products after a user's cursor, in id order
+            models.Index(fields=['is_active', 'id'], name='product_active_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} (#{self.id}) - Price: {self.price}"
 
+class ProductImageVariant(models.Model):
+    """
+    A resized copy of Product.file for srcset. File names carry a hash of
+    their content, so they can be cached forever.
+    """
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='image_variants')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to='products/variants/', max_length=255)
+
+    class Meta:
+        ordering = ['product', 'format', 'width']
+        unique_together = ('product', 'format', 'width')
+
+    def __str__(self):
+        return f"{self.product_id} {self.format} {self.width}w"
+
+
 class UserProductTask(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='user_tasks')
@@ -21,6 +62,78 @@ class UserProductTask(models.Model):
     commissioned = models.BooleanField(default=False) 
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # task_number counts within this day; rollover_day closes the day
+    business_day = models.DateField(default=current_business_day)
 
     class Meta:
         ordering = ['user', 'task_number']
+        indexes = [
+            # Today's tasks per user: pending task lookup, daily summaries
+            models.Index(fields=['user', 'business_day', 'task_number'], name='task_user_day_number_idx'),
+            # Pending/completed task lookups per user
+            models.Index(fields=['user', 'is_completed'], name='task_user_completed_idx'),
+            # "Has this user already been given this product" checks
+            models.Index(fields=['user', 'product'], name='task_user_product_idx'),
+        ]
+
+
+class UserTaskProgress(models.Model):
+    """
+    Denormalized per-user task counters, maintained atomically by task
+    assignment and completion so hot pages read one row instead of
+    counting the user's UserProductTask history.
+    The counters cover current_day only; rollover_day (or the first read
+    on a new day) resets them.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    assigned_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    last_task_number = models.PositiveIntegerField(default=0)
+    # Product queue cursor: products are handed out in id order, so the next
+    # product is the first active one with id > last_product_id.
+    last_product_id = models.PositiveBigIntegerField(default=0)
+    current_day = models.DateField(default=current_business_day)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def has_pending_task(self):
+        return self.assigned_count > self.completed_count
+
+    def __str__(self):
+        return f"{self.user} - {self.completed_count}/{self.assigned_count} tasks"
+
+
+class DailyTaskSummary(models.Model):
+    """One row per user per closed business day, written by rollover_day."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_task_summaries')
+    day = models.DateField()
+    assigned_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'day')
+        ordering = ['user', '-day']
+
+    def __str__(self):
+        return f"{self.user} {self.day}: {self.completed_count}/{self.assigned_count}"
+
+
+class TaskRollover(models.Model):
+    """
+    Progress of rollover_day for one business day. The user-id cursor is
+    saved after every chunk, so an interrupted rollover resumes there.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+
+    day = models.DateField(unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    last_user_id = models.PositiveBigIntegerField(default=0)
+    users_processed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Rollover {self.day} ({self.status})"
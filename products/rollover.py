@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from products.models import DailyTaskSummary, TaskRollover, UserProductTask, UserTaskProgress
+from products.utils import reset_progress_fields
+
+ROLLOVER_CHUNK_SIZE = 1000
+
+
+# -----------------------------
+# Daily Rollover
+# -----------------------------
+def rollover_day(day, chunk_size=ROLLOVER_CHUNK_SIZE, on_chunk=None):
+    """
+    Closes business day `day` for every user, chunk_size users at a time
+    in user-id order (one transaction per chunk):
+    - writes DailyTaskSummary rows from that day's tasks
+    - resets UserTaskProgress counters still on `day` (or earlier) to the
+      next day
+    The cursor is saved with each chunk, so a rerun resumes after the last
+    finished chunk; a finished day is a no-op. on_chunk(run) is called
+    after each committed chunk. Returns the TaskRollover.
+    """
+    run, _ = TaskRollover.objects.get_or_create(day=day)
+    if run.status == 'done':
+        return run
+
+    next_day = day + timedelta(days=1)
+    while True:
+        user_ids = list(
+            UserTaskProgress.objects.filter(user_id__gt=run.last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)[:chunk_size]
+        )
+        if not user_ids:
+            break
+        with transaction.atomic():
+            _summarize_chunk(day, user_ids)
+            UserTaskProgress.objects.filter(user_id__in=user_ids, current_day__lte=day).update(
+                **reset_progress_fields(next_day)
+            )
+            run.last_user_id = user_ids[-1]
+            run.users_processed += len(user_ids)
+            run.save(update_fields=['last_user_id', 'users_processed'])
+        if on_chunk:
+            on_chunk(run)
+
+    run.status = 'done'
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at'])
+    return run
+
+
+def _summarize_chunk(day, user_ids):
+    """One aggregate query and one upsert for the chunk's users."""
+    totals = (
+        UserProductTask.objects.filter(user_id__in=user_ids, business_day=day)
+        .values('user_id')
+        .annotate(assigned=Count('id'), completed=Count('id', filter=Q(is_completed=True)))
+        .order_by()
+    )
+    DailyTaskSummary.objects.bulk_create(
+        [
+            DailyTaskSummary(user_id=row['user_id'], day=day, assigned_count=row['assigned'], completed_count=row['completed'])
+            for row in totals
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'day'],
+        update_fields=['assigned_count', 'completed_count'],
+    )
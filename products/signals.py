@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.catalog import invalidate_catalog
+from products.models import Product
+
+
+# -----------------------------
+# Catalog Snapshot
+# -----------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_on_change(sender, **kwargs):
+    invalidate_catalog()
+
+
+# -----------------------------
+# Image Variants
+# -----------------------------
+@receiver(post_save, sender=Product)
+def queue_product_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    """New or changed product images get their variants from the job worker."""
+    if raw or not instance.file:
+        return
+    if update_fields is not None and 'file' not in update_fields:
+        return
+    from jobs.registry import enqueue
+
+    enqueue(
+        'products.image_variants',
+        {'product_id': instance.pk},
+        idempotency_key=f"product_variants:{instance.pk}:{instance.file.name}",
+    )
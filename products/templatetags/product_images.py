@@ -0,0 +1,23 @@
+from django import template
+
+from products.images import build_srcsets
+
+register = template.Library()
+
+
+@register.inclusion_tag('products/includes/product_picture.html')
+def product_picture(product, sizes='100vw', alt='Product Image', style=''):
+    """
+    <picture> for a product: WebP and JPEG srcsets from its variants, with
+    the original as fallback until the variants exist.
+    Usage: {% product_picture product sizes="(max-width: 500px) 100vw, 500px" %}
+    """
+    srcsets = build_srcsets(product)
+    return {
+        'product': product,
+        'webp_srcset': srcsets.get('webp', ''),
+        'jpeg_srcset': srcsets.get('jpeg', ''),
+        'sizes': sizes,
+        'alt': alt,
+        'style': style,
+    }
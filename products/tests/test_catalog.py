@@ -0,0 +1,98 @@
+import time
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from AmazonProject.cache_utils import get_version
+from balance.models import Wallet
+from products import catalog as catalog_module
+from products.catalog import CATALOG_CACHE_NAMESPACE, CATALOG_IDENT, get_catalog, invalidate_catalog
+from products.models import Product
+from products.utils import complete_product_task, get_next_product_for_user
+
+User = get_user_model()
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        self.products = [Product.objects.create(name=f'C{i}', price=Decimal(f'{i + 1}.50')) for i in range(4)]
+        self.products[2].is_active = False
+        self.products[2].save()
+
+    def test_snapshot_answers_cursor_and_price_lookups(self):
+        catalog = get_catalog()
+        ids = [p.id for p in self.products]
+
+        self.assertEqual(len(catalog), 3)
+        self.assertEqual(catalog.next_product_id(0), ids[0])
+        self.assertEqual(catalog.next_product_id(ids[1]), ids[3])
+        self.assertIsNone(catalog.next_product_id(ids[3]))
+        self.assertEqual(catalog.price(ids[1]), Decimal('2.50'))
+        self.assertIsNone(catalog.price(ids[2]))
+
+        product = catalog.product(ids[0])
+        self.assertEqual(product, self.products[0])
+        self.assertEqual(product.name, 'C0')
+        self.assertFalse(product._state.adding)
+
+    def test_saving_a_snapshot_product_keeps_unloaded_fields(self):
+        Product.objects.filter(pk=self.products[0].pk).update(description='kept', image_hash='abc')
+
+        product = get_catalog().product(self.products[0].id)
+        self.assertEqual(product.get_deferred_fields(), {'description', 'created_at', 'image_hash'})
+        product.name = 'renamed'
+        product.save()
+
+        saved = Product.objects.get(pk=product.pk)
+        self.assertEqual((saved.name, saved.description, saved.image_hash), ('renamed', 'kept', 'abc'))
+        self.assertEqual(saved.created_at, self.products[0].created_at)
+
+    def test_warm_snapshot_runs_no_queries(self):
+        get_catalog()
+        with CaptureQueriesContext(connection) as ctx:
+            get_catalog().next_product_id(0)
+        self.assertEqual(len(ctx), 0)
+
+    def test_save_and_delete_invalidate(self):
+        get_catalog()
+        self.products[0].price = Decimal('9.99')
+        self.products[0].save()
+        self.assertEqual(get_catalog().price(self.products[0].id), Decimal('9.99'))
+
+        self.products[1].delete()
+        self.assertNotIn(self.products[1].id, get_catalog())
+
+    def test_bulk_writes_need_explicit_invalidation(self):
+        get_catalog()
+        added = Product.objects.bulk_create([Product(name='bulk', price=Decimal('1.00'))])[0]
+        self.assertNotIn(added.id, get_catalog())
+
+        invalidate_catalog()
+        self.assertIn(added.id, get_catalog())
+
+    def test_process_snapshot_expires_on_a_local_cache(self):
+        get_catalog()
+        # A write from another process: its version bump never reaches this LocMemCache
+        added = Product.objects.bulk_create([Product(name='elsewhere', price=Decimal('1.00'))])[0]
+        self.assertNotIn(added.id, get_catalog())
+
+        later = time.monotonic() + settings.CACHE_LOCAL_TIMEOUT + 1
+        # The shared-cache copy expires after CACHE_LOCAL_TIMEOUT as well; the version stays put
+        cache.delete(f"{CATALOG_CACHE_NAMESPACE}:{CATALOG_IDENT}:v{get_version(CATALOG_CACHE_NAMESPACE, CATALOG_IDENT)}")
+        with mock.patch.object(catalog_module.time, 'monotonic', return_value=later):
+            self.assertIn(added.id, get_catalog())
+
+    def test_snapshot_products_complete_like_loaded_ones(self):
+        user = User.objects.create(username='catalog_user', phone='+9200001')
+        Wallet.objects.create(user=user, current_balance=Decimal('10.00'))
+
+        product = get_next_product_for_user(user)
+        result = complete_product_task(user, product)
+
+        self.assertIsNone(result['warning'])
+        self.assertEqual(Wallet.objects.get(user=user).current_balance, Decimal('8.50'))
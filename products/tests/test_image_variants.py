@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, RequestFactory, override_settings
+
+from jobs.models import Job
+from products.images import generate_product_variants, variant_widths
+from products.models import Product, ProductImageVariant
+from products.views import IMMUTABLE_CACHE_CONTROL, serve_image_variant
+
+
+def jpeg_upload(size=(600, 400), name='shoe.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', size, (10, 120, 200)).save(buffer, 'JPEG', quality=95)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ProductImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.product = Product.objects.create(name='Shoe', price=Decimal('10.00'), file=jpeg_upload())
+
+    def test_saving_an_image_queues_variant_job_once(self):
+        self.assertEqual(Job.objects.get().name, 'products.image_variants')
+        self.product.save(update_fields=['price'])
+        self.product.save()
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_generates_hashed_variants_and_dimensions(self):
+        written = generate_product_variants(self.product)
+
+        self.assertEqual(variant_widths(600), [160, 320, 480, 600])
+        self.assertEqual(variant_widths(2000), [160, 320, 480, 640])
+        self.assertEqual(written, 8)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.image_width, self.product.image_height), (600, 400))
+        variant = ProductImageVariant.objects.get(product=self.product, format='webp', width=320)
+        self.assertEqual(variant.height, 213)
+        self.assertRegex(variant.file.name, r'^products/variants/shoe-320w\.[0-9a-f]{12}\.webp$')
+        with variant.file.open('rb') as f:
+            self.assertEqual(Image.open(f).size, (320, 213))
+
+    def test_unchanged_image_is_skipped_and_force_reuses_names(self):
+        generate_product_variants(self.product)
+        names = set(ProductImageVariant.objects.values_list('file', flat=True))
+
+        self.assertEqual(generate_product_variants(self.product), 0)
+        self.assertEqual(generate_product_variants(self.product, force=True), 8)
+        self.assertEqual(set(ProductImageVariant.objects.values_list('file', flat=True)), names)
+
+    def test_new_image_replaces_old_variant_files(self):
+        generate_product_variants(self.product)
+        old = list(ProductImageVariant.objects.values_list('file', flat=True))
+        storage = ProductImageVariant._meta.get_field('file').storage
+
+        self.product.file = jpeg_upload(size=(300, 300), name='boot.jpg')
+        self.product.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_product_variants(self.product)
+
+        self.assertEqual(sorted(set(ProductImageVariant.objects.values_list('width', flat=True))), [160, 300])
+        self.assertFalse(any(storage.exists(name) for name in old))
+
+    def test_template_tag_emits_srcset(self):
+        template = Template('{% load product_images %}{% product_picture product sizes="50vw" %}')
+        before = template.render(Context({'product': self.product}))
+        self.assertNotIn('srcset', before)
+
+        generate_product_variants(self.product)
+        html = template.render(Context({'product': Product.objects.get(pk=self.product.pk)}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('320w', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('width="600" height="400"', html)
+
+    def test_command_processes_changed_products_only(self):
+        out = StringIO()
+        call_command('generate_product_images', stdout=out)
+        self.assertIn('1 products processed (8 variants), 0 unchanged', out.getvalue())
+
+        out = StringIO()
+        call_command('generate_product_images', stdout=out)
+        self.assertIn('0 products processed (0 variants), 1 unchanged', out.getvalue())
+
+    def test_variants_are_served_with_immutable_cache_headers(self):
+        generate_product_variants(self.product)
+        variant = ProductImageVariant.objects.first()
+
+        request = RequestFactory().get('/media/' + variant.file.name)
+        response = serve_image_variant(request, variant.file.name, document_root=self.media_root)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from PIL import Image
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from jobs.models import Job
+from products.management.commands import import_products
+from products.models import Product
+
+
+class ImportProductsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.source = tempfile.mkdtemp()
+        for path in (self.media_root, self.source):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def write_image(self, directory, name, color):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), color).save(buffer, 'JPEG')
+        with open(os.path.join(directory, name), 'wb') as handle:
+            handle.write(buffer.getvalue())
+
+    def write_csv(self, lines):
+        path = os.path.join(self.source, 'manifest.csv')
+        with open(path, 'w') as handle:
+            handle.write('name,price,commission_amount,image\n' + '\n'.join(lines) + '\n')
+        return path
+
+    def run_import(self, manifest, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_products', manifest, '--workers', '1', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_in_batches_and_is_idempotent(self):
+        for i in range(5):
+            self.write_image(self.source, f'item{i}.jpg', (i * 40, 10, 10))
+        manifest = self.write_csv([f'Item {i},{10 + i}.5,1.25,item{i}.jpg' for i in range(5)])
+
+        with CaptureQueriesContext(connection) as ctx:
+            out, _ = self.run_import(manifest, '--batch-size', '2')
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "products_product"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertIn('Imported 5 products; 0 already present', out)
+
+        product = Product.objects.get(name='Item 3')
+        self.assertEqual(str(product.price), '13.50')
+        self.assertEqual((product.image_width, product.image_height), (40, 30))
+        self.assertEqual(len(product.image_hash), 64)
+        self.assertTrue(product.file.storage.exists(product.file.name))
+        self.assertEqual(Job.objects.filter(name='products.image_variants').count(), 5)
+
+        out, _ = self.run_import(manifest)
+        self.assertIn('Imported 0 products; 5 already present', out)
+        self.assertEqual(Product.objects.count(), 5)
+
+    def test_failed_batch_leaves_no_stored_images(self):
+        for i in range(4):
+            self.write_image(self.source, f'b{i}.jpg', (i * 60, 20, 20))
+        manifest = self.write_csv([f'B{i},10,0,b{i}.jpg' for i in range(4)])
+
+        calls = []
+        def enqueue(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('queue down')
+
+        with mock.patch.object(import_products, 'enqueue_many', side_effect=enqueue):
+            with self.assertRaises(RuntimeError):
+                self.run_import(manifest, '--batch-size', '2')
+
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['B0', 'B1'])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, 'products'))), ['b0.jpg', 'b1.jpg'])
+
+        out, _ = self.run_import(manifest)
+        self.assertIn('Imported 2 products; 2 already present', out)
+        self.assertEqual(Product.objects.get(name='B3').file.name, 'products/b3.jpg')
+
+    def test_dry_run_writes_nothing(self):
+        self.write_image(self.source, 'a.jpg', (1, 2, 3))
+        out, _ = self.run_import(self.write_csv(['A,10,0,a.jpg']), '--dry-run')
+
+        self.assertIn('Would import 1 products', out)
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'products')))
+
+    def test_bad_rows_and_duplicate_images_are_reported(self):
+        self.write_image(self.source, 'a.jpg', (1, 2, 3))
+        shutil.copy(os.path.join(self.source, 'a.jpg'), os.path.join(self.source, 'a_copy.jpg'))
+        with open(os.path.join(self.source, 'broken.jpg'), 'w') as handle:
+            handle.write('not an image')
+        manifest = self.write_csv(['A,10,0,a.jpg', 'Copy,10,0,a_copy.jpg', 'Bad,abc,0,a.jpg', 'Broken,5,0,broken.jpg'])
+
+        out, err = self.run_import(manifest)
+
+        self.assertIn('Imported 1 products; 1 already present, 2 skipped', out)
+        self.assertIn('Row 3: price and commission_amount must be numbers', err)
+        self.assertIn('Row 4:', err)
+
+    def test_jsonl_manifest_and_legacy_media_files(self):
+        products_dir = os.path.join(self.media_root, 'products')
+        os.makedirs(products_dir)
+        self.write_image(products_dir, 'legacy.jpg', (9, 9, 9))
+        self.write_image(products_dir, 'fresh.jpg', (8, 8, 8))
+        Product.objects.create(price='10.00', file='products/legacy.jpg')  # imported before image hashes existed
+
+        manifest = os.path.join(self.source, 'manifest.jsonl')
+        with open(manifest, 'w') as handle:
+            for name in ('legacy', 'fresh'):
+                handle.write(json.dumps({'name': name, 'price': 12, 'image': os.path.join(products_dir, f'{name}.jpg')}) + '\n')
+
+        out, _ = self.run_import(manifest)
+
+        self.assertIn('Imported 1 products; 1 already present', out)
+        self.assertEqual(Product.objects.get(name='fresh').file.name, 'products/fresh.jpg')
+
+    def test_process_pool_matches_inline_results(self):
+        for i in range(4):
+            self.write_image(self.source, f'p{i}.jpg', (10, i * 50, 10))
+        manifest = self.write_csv([f'P{i},10,0,p{i}.jpg' for i in range(4)])
+
+        out = StringIO()
+        call_command('import_products', manifest, '--workers', '2', stdout=out, stderr=StringIO())
+
+        self.assertIn('Imported 4 products', out.getvalue())
+        self.assertEqual(Product.objects.exclude(image_hash='').count(), 4)
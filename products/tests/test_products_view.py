@@ -0,0 +1,35 @@
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from balance.models import Wallet
+from commission.models import Commission
+from products.models import Product
+
+User = get_user_model()
+
+
+class ProductsViewReadPathTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='view_user', phone='+3100001')
+        self.wallet = Wallet.objects.create(
+            user=self.user, current_balance=Decimal('40.00'), product_commission=Decimal('1.00'),
+            cumulative_total=Decimal('41.00'),
+        )
+        Commission.objects.create(user=self.user, product_name='Product 9', amount=Decimal('7.00'))
+        Product.objects.create(name='V1', price=Decimal('10.00'), file='products/v1.jpg')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_get_does_not_rewrite_wallet_from_commission_history(self):
+        self.client.get(reverse('products'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('products'))
+
+        self.assertEqual(response.context['product_commission'], Decimal('1.00'))
+        self.assertEqual(response.context['total_balance'], Decimal('41.00'))
+        wallet_writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "balance_wallet"')]
+        self.assertEqual(wallet_writes, [])
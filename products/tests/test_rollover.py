@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from balance.models import Wallet
+from commission.models import CommissionSetting
+from jobs.registry import enqueue
+from jobs.tests.helpers import ResumableJobMixin
+from products import rollover
+from products.jobs import rollover_day_job
+from products.models import DailyTaskSummary, Product, TaskRollover, UserProductTask, UserTaskProgress, current_business_day
+from products.rollover import rollover_day
+from products.utils import complete_product_task, get_next_product_for_user, get_task_progress
+
+User = get_user_model()
+
+
+class DailyRolloverTests(TestCase):
+    def setUp(self):
+        self.today = current_business_day()
+        self.yesterday = self.today - timedelta(days=1)
+        self.products = [Product.objects.create(name=f'R{i}', price=Decimal('1.00')) for i in range(6)]
+        self.users = []
+        for i in range(3):
+            user = User.objects.create(username=f'roll_user{i}', phone=f'+9300{i:02d}')
+            Wallet.objects.create(user=user, current_balance=Decimal('50.00'))
+            self.users.append(user)
+
+    def work_yesterday(self, user, assigned, completed):
+        for n in range(1, assigned + 1):
+            UserProductTask.objects.create(
+                user=user, product=self.products[n - 1], task_number=n,
+                is_completed=n <= completed, business_day=self.yesterday,
+            )
+        UserTaskProgress.objects.update_or_create(user=user, defaults={
+            'assigned_count': assigned, 'completed_count': completed, 'last_task_number': assigned,
+            'last_product_id': self.products[assigned - 1].id, 'current_day': self.yesterday,
+        })
+
+    def test_rollover_summarizes_and_resets_in_chunks(self):
+        self.work_yesterday(self.users[0], 3, 3)
+        self.work_yesterday(self.users[1], 2, 1)
+        UserTaskProgress.objects.create(user=self.users[2], current_day=self.today, assigned_count=1, last_task_number=1)
+
+        run = rollover_day(self.yesterday, chunk_size=1)
+
+        self.assertEqual((run.status, run.users_processed), ('done', 3))
+        summaries = {s.user_id: (s.assigned_count, s.completed_count) for s in DailyTaskSummary.objects.all()}
+        self.assertEqual(summaries, {self.users[0].id: (3, 3), self.users[1].id: (2, 1)})
+
+        progress = UserTaskProgress.objects.get(user=self.users[1])
+        self.assertEqual((progress.assigned_count, progress.completed_count, progress.current_day), (0, 0, self.today))
+        self.assertEqual(progress.last_product_id, self.products[1].id)  # queue cursor carries over
+        self.assertEqual(UserTaskProgress.objects.get(user=self.users[2]).assigned_count, 1)  # already on today
+
+    def test_interrupted_rollover_resumes_after_cursor(self):
+        for user in self.users:
+            self.work_yesterday(user, 1, 1)
+        TaskRollover.objects.create(day=self.yesterday, last_user_id=self.users[0].id, users_processed=1)
+
+        run = rollover_day(self.yesterday, chunk_size=1)
+
+        self.assertEqual(run.users_processed, 3)
+        self.assertEqual(
+            set(DailyTaskSummary.objects.values_list('user_id', flat=True)), {self.users[1].id, self.users[2].id}
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            rollover_day(self.yesterday)
+        self.assertEqual(len(ctx), 1)  # finished day: only the run lookup
+
+    def test_counters_reset_on_first_read_of_a_new_day(self):
+        CommissionSetting.objects.create(user=self.users[0], daily_task_limit=2)
+        self.work_yesterday(self.users[0], 2, 2)
+
+        progress = get_task_progress(self.users[0])
+        self.assertEqual((progress.assigned_count, progress.current_day), (0, self.today))
+
+        product = get_next_product_for_user(self.users[0])
+        self.assertEqual(product, self.products[2])
+        task = UserProductTask.objects.get(user=self.users[0], product=product)
+        self.assertEqual((task.task_number, task.business_day), (1, self.today))
+
+    def test_yesterdays_pending_task_is_not_carried_over(self):
+        self.work_yesterday(self.users[1], 2, 1)
+        stale = self.products[1]
+
+        result = complete_product_task(self.users[1], stale)
+        self.assertEqual(result['warning'], 'Task already completed or does not exist.')
+
+        product = get_next_product_for_user(self.users[1])
+        self.assertEqual(product, self.products[2])
+        complete_product_task(self.users[1], product)
+        self.assertEqual(get_task_progress(self.users[1]).completed_count, 1)
+
+    def test_task_lookups_are_scoped_to_the_day(self):
+        self.work_yesterday(self.users[0], 1, 0)
+        user = self.users[0]
+        get_next_product_for_user(user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            get_next_product_for_user(user)
+        task_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "products_userproducttask"' in q['sql']]
+        self.assertTrue(task_queries)
+        self.assertTrue(all('business_day' in sql for sql in task_queries))
+
+    def test_command_defaults_to_yesterday_and_rejects_open_days(self):
+        self.work_yesterday(self.users[0], 1, 1)
+        out = StringIO()
+        call_command('rollover_day', stdout=out)
+        self.assertIn(f'Rolled over {self.yesterday}', out.getvalue())
+        self.assertTrue(TaskRollover.objects.get(day=self.yesterday).status == 'done')
+
+        with self.assertRaises(CommandError):
+            call_command('rollover_day', '--day', self.today.isoformat())
+        with self.assertRaises(CommandError):
+            call_command('rollover_day', '--day', 'not-a-date')
+
+
+class RolloverJobTests(ResumableJobMixin, TransactionTestCase):
+    def setUp(self):
+        self.yesterday = current_business_day() - timedelta(days=1)
+        product = Product.objects.create(name='RJ', price=Decimal('1.00'))
+        self.users = [User.objects.create(username=f'roll_job{i}', phone=f'+9310{i:02d}') for i in range(3)]
+        for user in self.users:
+            UserProductTask.objects.create(user=user, product=product, task_number=1, is_completed=True, business_day=self.yesterday)
+            UserTaskProgress.objects.create(user=user, assigned_count=1, completed_count=1, current_day=self.yesterday)
+
+    def test_worker_keeps_finished_chunks_and_resumes(self):
+        job = enqueue(rollover_day_job, {'day': self.yesterday.isoformat(), 'chunk_size': 1})
+        self.run_with_failing_chunk(job, rollover, '_summarize_chunk', fail_on=2)
+
+        run = TaskRollover.objects.get(day=self.yesterday)
+        self.assertEqual((run.status, run.last_user_id, run.users_processed), ('running', self.users[0].id, 1))
+        self.assertEqual(list(DailyTaskSummary.objects.values_list('user_id', flat=True)), [self.users[0].id])
+
+        self.resume(job)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.users_processed), ('done', 3))
+        self.assertEqual(DailyTaskSummary.objects.count(), 3)
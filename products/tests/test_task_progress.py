@@ -0,0 +1,112 @@
+from decimal import Decimal
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from balance.models import Wallet
+from commission.models import CommissionSetting
+from products.catalog import invalidate_catalog
+from products.models import Product, UserProductTask, UserTaskProgress
+from products.utils import complete_product_task, get_next_product_for_user, get_task_progress
+
+User = get_user_model()
+
+
+class TaskProgressCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='progress_user', phone='+3000001')
+        Wallet.objects.create(user=self.user, current_balance=Decimal('100.00'))
+        self.products = [
+            Product.objects.create(name=f'P{i}', price=Decimal('10.00'), file=f'products/p{i}.jpg') for i in range(3)
+        ]
+
+    def test_assignment_is_counted_once_while_pending(self):
+        first = get_next_product_for_user(self.user)
+        again = get_next_product_for_user(self.user)
+
+        self.assertEqual(first, again)
+        self.assertEqual(UserProductTask.objects.filter(user=self.user).count(), 1)
+        progress = get_task_progress(self.user)
+        self.assertEqual((progress.assigned_count, progress.completed_count, progress.last_task_number), (1, 0, 1))
+
+    def test_completion_advances_counters(self):
+        product = get_next_product_for_user(self.user)
+        complete_product_task(self.user, product)
+
+        progress = get_task_progress(self.user)
+        self.assertEqual(progress.completed_count, 1)
+        self.assertFalse(progress.has_pending_task)
+
+        next_product = get_next_product_for_user(self.user)
+        self.assertNotEqual(next_product, product)
+        task = UserProductTask.objects.get(user=self.user, product=next_product)
+        self.assertEqual(task.task_number, 2)
+        self.assertIsNotNone(UserProductTask.objects.get(user=self.user, product=product).completed_at)
+
+    def test_daily_limit_reads_counters(self):
+        CommissionSetting.objects.create(user=self.user, daily_task_limit=1)
+        complete_product_task(self.user, get_next_product_for_user(self.user))
+
+        self.assertIsNone(get_next_product_for_user(self.user))
+
+    def test_products_page_does_not_count_task_history(self):
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('products'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('products'))
+
+        self.assertEqual(response.status_code, 200)
+        task_counts = [
+            q['sql'] for q in ctx.captured_queries
+            if 'COUNT(' in q['sql'] and 'products_userproducttask' in q['sql']
+        ]
+        self.assertEqual(task_counts, [])
+        self.assertEqual(UserTaskProgress.objects.get(user=self.user).assigned_count, 1)
+
+
+class ProductQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='queue_user', phone='+3000002')
+        Wallet.objects.create(user=self.user, current_balance=Decimal('100.00'))
+        self.products = [Product.objects.create(name=f'Q{i}', price=Decimal('5.00')) for i in range(4)]
+
+    def assign_and_complete(self):
+        product = get_next_product_for_user(self.user)
+        if product:
+            complete_product_task(self.user, product)
+        return product
+
+    def test_products_are_handed_out_in_queue_order(self):
+        handed = [self.assign_and_complete() for _ in range(4)]
+        self.assertEqual(handed, self.products)
+        self.assertIsNone(get_next_product_for_user(self.user))
+
+    def test_deactivated_products_are_skipped_and_new_products_join_queue(self):
+        self.products[1].is_active = False
+        self.products[1].save()
+        self.assertEqual(self.assign_and_complete(), self.products[0])
+        self.assertEqual(self.assign_and_complete(), self.products[2])
+
+        added = Product.objects.create(name='Q-new', price=Decimal('5.00'))
+        self.assertEqual(self.assign_and_complete(), self.products[3])
+        self.assertEqual(self.assign_and_complete(), added)
+        self.assertEqual(get_task_progress(self.user).last_product_id, added.id)
+
+    def test_lookup_does_not_scan_task_history(self):
+        self.assign_and_complete()
+        invalidate_catalog()
+        with CaptureQueriesContext(connection) as ctx:
+            get_next_product_for_user(self.user)
+        product_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "products_product"' in q['sql']]
+        self.assertEqual(len(product_queries), 1)
+        self.assertNotIn('products_userproducttask', product_queries[0])
+
+        # Warm catalog: the next assignment reads no product rows at all
+        self.assign_and_complete()
+        with CaptureQueriesContext(connection) as ctx:
+            get_next_product_for_user(self.user)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "products_product"' in q['sql']])
@@ -1,9 +1,9 @@
-from decimal import Decimal
 from django.db import transaction
-from django.db.models import Sum
-from balance.models import Wallet
-from .models import UserProductTask, Product
-from commission.models import Commission, CommissionSetting
+from django.db.models import F
+from .catalog import get_catalog
+from .models import UserProductTask, UserTaskProgress, current_business_day
+from commission.utils import get_commission_setting
+from commission.service import complete_task
 from stoppoints.utils import is_task_allowed, get_next_pending_stoppoint
 
 
@@ -15,43 +15,119 @@ def get_daily_task_limit(user):
     Returns the daily task limit for a user.
     Falls back to CommissionSetting.daily_task_limit or 60.
     """
-    try:
-        setting = CommissionSetting.objects.filter(user=user).order_by('-updated_at').first()
-        if setting and getattr(setting, 'daily_task_limit', None) is not None:
-            return int(setting.daily_task_limit)
-    except Exception:
-        pass
-    return 60
+    return int(get_commission_setting(user)['daily_task_limit'])
+
+
+# -----------------------------
+# Task Progress
+# -----------------------------
+def get_task_progress(user):
+    """
+    Returns the user's precomputed task counters (one indexed row) for
+    the current business day. If rollover_day hasn't reset them yet on a
+    new day, they are reset here.
+    """
+    progress, _ = UserTaskProgress.objects.get_or_create(user=user)
+    today = current_business_day()
+    if progress.current_day < today:
+        UserTaskProgress.objects.filter(pk=progress.pk, current_day__lt=today).update(
+            **reset_progress_fields(today)
+        )
+        progress.refresh_from_db()
+    return progress
+
+
+def reset_progress_fields(day):
+    """Counter values for a fresh business day; the product cursor carries over."""
+    return {'assigned_count': 0, 'completed_count': 0, 'last_task_number': 0, 'current_day': day}
+
+
+def get_pending_task(user, progress):
+    """
+    Returns the assigned-but-not-completed task for the user, if any.
+    """
+    if not progress.has_pending_task:
+        return None
+    return (
+        UserProductTask.objects
+        .filter(
+            user=user, business_day=progress.current_day, task_number=progress.last_task_number, is_completed=False
+        )
+        .select_related('product')
+        .first()
+    )
+
+
+# -----------------------------
+# Product Queue
+# -----------------------------
+def get_next_queued_product(cursor):
+    """
+    Returns the first active product after the user's queue cursor.
+    Answered from the cached catalog snapshot (products.catalog), so a warm
+    lookup runs no query; cost does not depend on the catalog size or on
+    how many tasks the user already has. New products always get higher
+    ids, so they join every user's queue; deactivated products are skipped.
+    A product reactivated behind a user's cursor is not handed to that
+    user again.
+    """
+    catalog = get_catalog()
+    return catalog.product(catalog.next_product_id(cursor))
 
 
 # -----------------------------
 # Get Next Product for User
 # -----------------------------
-def get_next_product_for_user(user):
+def get_next_product_for_user(user, progress=None):
     """
-    Assigns the next available product for the user.
+    Returns the product for the user's current task, assigning the next
+    available product when nothing is pending.
     Respects daily limit, StopPoints, and already assigned products.
     """
-    tasks_done = UserProductTask.objects.filter(user=user).count()
+    if progress is None:
+        progress = get_task_progress(user)
+
+    pending = get_pending_task(user, progress)
+    if pending:
+        return pending.product
+
+    tasks_done = progress.assigned_count
     daily_limit = get_daily_task_limit(user)
     if tasks_done >= daily_limit:
         return None
 
-    next_task_number = tasks_done + 1
+    next_task_number = progress.last_task_number + 1
 
     # StopPoint check
     allowed, reason = is_task_allowed(user, next_task_number)
     if not allowed:
         return None  # StopPoint blocks next task
 
-    # Find next unassigned product
-    assigned_ids = UserProductTask.objects.filter(user=user).values_list('product_id', flat=True)
-    next_product = Product.objects.filter(is_active=True).exclude(id__in=assigned_ids).first()
+    next_product = get_next_queued_product(progress.last_product_id)
     if not next_product:
         return None
 
-    # Assign task
-    UserProductTask.objects.create(user=user, product=next_product, task_number=next_task_number)
+    # Assign task; the conditional update makes concurrent assignments of
+    # the same task number lose instead of double-assigning.
+    with transaction.atomic():
+        claimed = UserTaskProgress.objects.filter(
+            pk=progress.pk, current_day=progress.current_day, last_task_number=progress.last_task_number
+        ).update(
+            assigned_count=F('assigned_count') + 1,
+            last_task_number=next_task_number,
+            last_product_id=next_product.id,
+        )
+        if not claimed:
+            progress.refresh_from_db()
+            pending = get_pending_task(user, progress)
+            return pending.product if pending else None
+        UserProductTask.objects.create(
+            user=user, product=next_product, task_number=next_task_number, business_day=progress.current_day
+        )
+
+    progress.assigned_count += 1
+    progress.last_task_number = next_task_number
+    progress.last_product_id = next_product.id
     return next_product
 
 
@@ -61,9 +137,12 @@ def get_next_product_for_user(user):
 def complete_product_task(user, product):
     """
     Complete a product task for the user.
-    Applies product and referral commissions.
+    Checks the task and stop points, then hands off to the commission
+    ledger service which applies product and referral commissions.
     """
-    task = UserProductTask.objects.filter(user=user, product=product, is_completed=False).first()
+    task = UserProductTask.objects.filter(
+        user=user, product=product, business_day=current_business_day(), is_completed=False
+    ).first()
     if not task:
         return {"warning": "Task already completed or does not exist."}
 
@@ -72,72 +151,4 @@ def complete_product_task(user, product):
     if not allowed:
         return {"warning": reason}
 
-    wallet, _ = Wallet.objects.get_or_create(user=user)
-    if wallet.current_balance < product.price:
-        return {"warning": "Insufficient balance."}
-
-    user_commission_setting, _ = CommissionSetting.objects.get_or_create(user=user)
-
-    # Referrer info
-    referrer = getattr(user, "referred_by", None)
-    referrer_wallet = None
-    referrer_commission_setting = None
-    referral_amount = Decimal("0.00")
-
-    if referrer and referrer.role == 'user':
-        referrer_wallet, _ = Wallet.objects.get_or_create(user=referrer)
-        referrer_commission_setting, _ = CommissionSetting.objects.get_or_create(user=referrer)
-
-    with transaction.atomic():
-        # Deduct product price
-        wallet.current_balance -= product.price
-
-        # Product commission
-        product_commission = (product.price * user_commission_setting.product_rate / 100).quantize(Decimal("0.01"))
-        wallet.product_commission += product_commission
-        wallet.cumulative_total += product_commission
-        wallet.save(update_fields=['current_balance', 'product_commission', 'cumulative_total'])
-
-        # Record product commission
-        Commission.objects.create(
-            user=user,
-            product_name=f"Product {product.id}",
-            commission_type='self',
-            amount=product_commission,
-            triggered_by=user
-        )
-
-        # Mark task completed
-        task.is_completed = True
-        task.save(update_fields=['is_completed'])
-
-        # Referral commission
-        if referrer_wallet and referrer_commission_setting:
-            existing = Commission.objects.filter(
-                user=referrer,
-                product_name=f"Product {product.id}",
-                commission_type='referral',
-                triggered_by=user
-            ).first()
-
-            if existing:
-                referral_amount = existing.amount
-            else:
-                referral_amount = (product.price * referrer_commission_setting.referral_rate / 100).quantize(Decimal("0.01"))
-                referrer_wallet.referral_commission += referral_amount
-                referrer_wallet.cumulative_total += referral_amount
-                referrer_wallet.save(update_fields=['referral_commission', 'cumulative_total'])
-
-                Commission.objects.create(
-                    user=referrer,
-                    product_name=f"Product {product.id}",
-                    commission_type='referral',
-                    amount=referral_amount,
-                    triggered_by=user
-                )
-
-    return {
-        "warning": None,
-        "product_commission": product_commission,
-        "referral_commission": referral_amount
-    }
+    return complete_task(user, product, task=task)
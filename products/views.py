@@ -1,14 +1,11 @@
-from decimal import Decimal
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
-from django.db.models import Sum
+from django.views.static import serve
 
 from balance.models import Wallet
-from .models import Product, UserProductTask
-from .utils import complete_product_task, get_next_product_for_user
-from commission.models import Commission, CommissionSetting
+from .utils import complete_product_task, get_next_product_for_user, get_task_progress
+from commission.utils import get_today_commission
 
 @login_required
 def products_view(request):
@@ -18,8 +15,9 @@ def products_view(request):
     # -----------------------------
     # Assign next product
     # -----------------------------
-    next_product = get_next_product_for_user(user)
-    tasks_done = UserProductTask.objects.filter(user=user, is_completed=True).count()
+    progress = get_task_progress(user)
+    next_product = get_next_product_for_user(user, progress)
+    tasks_done = progress.completed_count
     next_task_number = tasks_done + 1
 
     next_task_allowed = True
@@ -57,31 +55,10 @@ def products_view(request):
             return redirect("products")
         return redirect("products")
 
-    # -----------------------------
-    # Update wallet totals
-    # -----------------------------
-    wallet.product_commission = Commission.objects.filter(
-        user=user, commission_type='self'
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    wallet.referral_commission = Commission.objects.filter(
-        user=user, commission_type='referral'
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    wallet.cumulative_total = wallet.product_commission + wallet.referral_commission
-    wallet.save(update_fields=['product_commission', 'referral_commission', 'cumulative_total'])
-
     # -----------------------------
     # Today's commissions
     # -----------------------------
-    today = timezone.now().date()
-    today_product_commission = Commission.objects.filter(
-        user=user, commission_type='self', created_at__date=today
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    today_referral_commission = Commission.objects.filter(
-        user=user, commission_type='referral', created_at__date=today
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    today_product_commission, today_referral_commission = get_today_commission(user)
 
     # -----------------------------
     # Context
@@ -108,3 +85,19 @@ def products_view(request):
     }
 
     return render(request, "products/products.html", context)
+
+
+# -----------------------------
+# Image Variants (DEBUG media serving)
+# -----------------------------
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def serve_image_variant(request, path, document_root=None):
+    """
+    Serves products/variants/ like django.views.static.serve, with
+    far-future caching: variant names change whenever their content does.
+    Production servers should send the same header for that directory.
+    """
+    response = serve(request, path, document_root=document_root)
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -1,27 +1,26 @@
 # stoppoints/admin.py
+from django import forms
 from django.contrib import admin, messages
-from .models import StopPoint, StopPointProgress
+from .models import (
+    StopPoint,
+    StopPointProgress,
+    StopPointTemplate,
+    StopPointTemplateApplication,
+    StopPointTemplateItem,
+)
+from jobs.registry import enqueue
+from .jobs import apply_template_job
+from .utils import bulk_approve_stop_points, bulk_reject_stop_points, cohort_queryset
 
 @admin.action(description="Approve selected stop points")
 def approve_stop_points(modeladmin, request, queryset):
-    for sp in queryset:
-        sp.status = 'approved'
-        sp.save()
-        progress, _ = StopPointProgress.objects.get_or_create(user=sp.user)
-        progress.is_stopped = False
-        progress.last_cleared = sp
-        progress.save()
-    messages.success(request, "Selected stop points approved. Users can continue tasks.")
+    count = bulk_approve_stop_points(queryset)
+    messages.success(request, f"{count} stop points approved. Users can continue tasks.")
 
 @admin.action(description="Reject selected stop points")
 def reject_stop_points(modeladmin, request, queryset):
-    for sp in queryset:
-        sp.status = 'rejected'
-        sp.save()
-        progress, _ = StopPointProgress.objects.get_or_create(user=sp.user)
-        progress.is_stopped = True
-        progress.save()
-    messages.warning(request, "Selected stop points rejected. Users remain stopped.")
+    count = bulk_reject_stop_points(queryset)
+    messages.warning(request, f"{count} stop points rejected. Users remain stopped.")
 
 @admin.register(StopPoint)
 class StopPointAdmin(admin.ModelAdmin):
@@ -37,3 +36,52 @@ class StopPointProgressAdmin(admin.ModelAdmin):
     list_display = ('user', 'last_cleared', 'is_stopped')
     search_fields = ('user__username',)
     raw_id_fields = ('user', 'last_cleared')
+
+
+class StopPointTemplateItemInline(admin.TabularInline):
+    model = StopPointTemplateItem
+    extra = 3
+
+@admin.register(StopPointTemplate)
+class StopPointTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+    inlines = (StopPointTemplateItemInline,)
+
+class StopPointTemplateApplicationForm(forms.ModelForm):
+    class Meta:
+        model = StopPointTemplateApplication
+        fields = ('template', 'filters')
+
+    def clean_filters(self):
+        filters = self.cleaned_data['filters'] or {}
+        if not isinstance(filters, dict):
+            raise forms.ValidationError("Filters must be a JSON object.")
+        try:
+            cohort_queryset(filters).exists()
+        except (TypeError, ValueError) as exc:
+            raise forms.ValidationError(str(exc))
+        return filters
+
+@admin.register(StopPointTemplateApplication)
+class StopPointTemplateApplicationAdmin(admin.ModelAdmin):
+    """
+    Adding an application queues it for the job worker (run_worker);
+    apply_stop_point_templates can also apply it.
+    filters example: {"referred_by": 12} or {"daily_task_limit": 60}
+    """
+    list_display = ('template', 'filters', 'status', 'processed_users', 'total_users', 'created_points', 'created_at')
+    list_filter = ('status',)
+    form = StopPointTemplateApplicationForm
+    readonly_fields = (
+        'status', 'total_users', 'processed_users', 'created_points', 'last_user_id',
+        'error', 'requested_by', 'finished_at',
+    )
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.total_users = cohort_queryset(obj.filters).count()
+            obj.requested_by = request.user
+        super().save_model(request, obj, form, change)
+        if not change:
+            enqueue(apply_template_job, {'application_id': obj.id}, idempotency_key=f'stop_point_template:{obj.id}')
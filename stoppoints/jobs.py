@@ -0,0 +1,27 @@
+from jobs.registry import heartbeat, job
+from stoppoints.models import StopPointTemplateApplication
+from stoppoints.utils import claim_template_application, process_template_application
+
+
+# -----------------------------
+# Template Application Job
+# -----------------------------
+@job('stoppoints.apply_template')
+def apply_template_job(application_id, chunk_size=500):
+    """
+    Applies a queued template to its cohort. A failed run hands the
+    application back as 'pending' (cursor and error kept) so the retry
+    claims it and resumes; a re-queued job whose worker died takes over
+    once the application has gone stale.
+    """
+    if not claim_template_application(application_id):
+        return  # done, failed, or being processed elsewhere
+
+    application = StopPointTemplateApplication.objects.select_related('template').get(pk=application_id)
+    try:
+        process_template_application(application, chunk_size=chunk_size, on_chunk=heartbeat)
+    except Exception as exc:
+        StopPointTemplateApplication.objects.filter(pk=application_id, status='running').update(
+            status='pending', claimed_at=None, error=str(exc)
+        )
+        raise
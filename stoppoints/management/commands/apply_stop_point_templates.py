@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from stoppoints.models import StopPointTemplateApplication
+from stoppoints.utils import claim_template_application, process_template_application
+
+
+class Command(BaseCommand):
+    help = 'Apply queued stop-point templates to their user cohorts in bulk, reporting progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Users per bulk insert')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Also continue applications left running by a crash (untouched for 10 minutes)'
+        )
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'running'] if options['resume'] else ['pending']
+        for application in StopPointTemplateApplication.objects.filter(status__in=statuses).order_by('id'):
+            # Claim it, so the job worker and other runs never process the same application
+            if not claim_template_application(application.pk, resume=options['resume']):
+                continue
+            application.refresh_from_db()
+
+            self.stdout.write(f"Applying {application}: {application.total_users} users")
+            try:
+                application = process_template_application(application, chunk_size=options['chunk_size'])
+            except Exception as exc:
+                StopPointTemplateApplication.objects.filter(pk=application.pk).update(status='failed', error=str(exc))
+                self.stderr.write(self.style.ERROR(f"Application {application.pk} failed: {exc}"))
+                continue
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Application {application.pk}: {application.processed_users} users, "
+                f"{application.created_points} stop points created"
+            ))
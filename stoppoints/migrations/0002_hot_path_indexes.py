@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_orphan_stoppoints(apps, schema_editor):
+    # 0001 allowed user to be NULL; the model never has. Such rows can't
+    # block anyone, so drop them before the column becomes NOT NULL.
+    StopPoint = apps.get_model('stoppoints', 'StopPoint')
+    StopPoint.objects.filter(user__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stoppoints', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_orphan_stoppoints, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='stoppoint',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='stoppointprogress',
+            options={},
+        ),
+        migrations.AlterUniqueTogether(
+            name='stoppoint',
+            unique_together={('user', 'point')},
+        ),
+        migrations.AlterField(
+            model_name='stoppoint',
+            name='order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='stoppoint',
+            name='point',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='stoppoint',
+            name='required_balance',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='stoppoint',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='stoppoint',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='stoppointprogress',
+            name='is_stopped',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='stoppointprogress',
+            name='last_cleared',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stoppoints.stoppoint'),
+        ),
+        migrations.AlterField(
+            model_name='stoppointprogress',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='stoppoint',
+            index=models.Index(fields=['user', 'status', 'point'], name='stoppoint_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stoppoint',
+            index=models.Index(fields=['user', 'order'], name='stoppoint_user_order_idx'),
+        ),
+    ]
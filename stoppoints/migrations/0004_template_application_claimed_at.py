@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stoppoints', '0003_stop_point_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stoppointtemplateapplication',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
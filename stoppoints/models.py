@@ -9,6 +9,15 @@ class StopPoint(models.Model):
     status = models.CharField(max_length=10, choices=[('pending','Pending'),('approved','Approved'),('rejected','Rejected')], default='pending')
     order = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        unique_together = [('user', 'point')]
+        indexes = [
+            # Next pending stop point at or after a task number
+            models.Index(fields=['user', 'status', 'point'], name='stoppoint_user_status_idx'),
+            # Next stop point after the last cleared one
+            models.Index(fields=['user', 'order'], name='stoppoint_user_order_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} StopPoint {self.point}"
 
@@ -20,3 +29,72 @@ class StopPointProgress(models.Model):
 
     def __str__(self):
         return f"{self.user.username} Progress"
+
+
+# -----------------------------
+# Stop-Point Templates
+# -----------------------------
+class StopPointTemplate(models.Model):
+    """A reusable set of stop points that admins apply to user cohorts."""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    def as_points_list(self):
+        """[(point, required_balance), ...] in point order, for bulk_add_stop_points."""
+        return [(item.point, item.required_balance) for item in self.items.order_by('point')]
+
+
+class StopPointTemplateItem(models.Model):
+    template = models.ForeignKey(StopPointTemplate, on_delete=models.CASCADE, related_name='items')
+    point = models.PositiveIntegerField()
+    required_balance = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = [('template', 'point')]
+
+    def __str__(self):
+        return f"{self.template.name} StopPoint {self.point}"
+
+
+class StopPointTemplateApplication(models.Model):
+    """
+    One application of a template to a cohort, processed in chunks by the
+    apply_stop_point_templates command. Counters and the user-id cursor are
+    saved after every chunk, so progress is visible and a crash resumes.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    template = models.ForeignKey(StopPointTemplate, on_delete=models.CASCADE, related_name='applications')
+    # Cohort filters, e.g. {"referred_by": 12} or {"daily_task_limit": 60}; see stoppoints.utils.COHORT_FILTERS
+    filters = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total_users = models.PositiveIntegerField(default=0)
+    processed_users = models.PositiveIntegerField(default=0)
+    created_points = models.PositiveIntegerField(default=0)
+    last_user_id = models.PositiveBigIntegerField(default=0)
+    # Set on claim and after every chunk; a 'running' application not touched
+    # for APPLICATION_STALE_AFTER is taken to be abandoned and can be resumed
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.template.name} -> {self.filters or 'all users'} ({self.status})"
+
+    @property
+    def percent_done(self):
+        if not self.total_users:
+            return 100 if self.status == 'done' else 0
+        return round(100 * self.processed_users / self.total_users)
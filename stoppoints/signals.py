@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
-from .models import StopPointProgress
+from .models import StopPoint, StopPointProgress
+from .utils import invalidate_stop_point_schedule
 
 User = settings.AUTH_USER_MODEL
 
@@ -10,3 +11,16 @@ def create_user_stoppoint_progress(sender, instance, created, **kwargs):
     """Create a StopPointProgress for new users."""
     if created:
         StopPointProgress.objects.create(user=instance)
+
+
+@receiver(post_save, sender=StopPoint)
+@receiver(post_delete, sender=StopPoint)
+@receiver(post_save, sender=StopPointProgress)
+@receiver(post_delete, sender=StopPointProgress)
+def invalidate_cached_schedule(sender, instance, **kwargs):
+    """
+    add_stop_points_for_user, update_stop_point, reset_stop_points_for_user,
+    the admin approve/reject actions and list edits all save or delete
+    these models, so the cached schedule is dropped for each of them.
+    """
+    invalidate_stop_point_schedule(instance.user_id)
@@ -0,0 +1,91 @@
+from decimal import Decimal
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+
+from commission.models import CommissionSetting
+from stoppoints.admin import approve_stop_points, reject_stop_points
+from stoppoints.models import StopPoint, StopPointProgress
+from stoppoints.utils import add_stop_points_for_user, bulk_add_stop_points, is_task_allowed
+
+User = get_user_model()
+
+
+class BulkStopPointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create(username=f'bulk_sp{i}', phone=f'+92000{i:02d}') for i in range(5)]
+
+    def admin_request(self):
+        request = RequestFactory().post('/')
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        return request
+
+    def test_add_for_one_user_validates_the_batch(self):
+        CommissionSetting.objects.create(user=self.users[0], daily_task_limit=10)
+        StopPoint.objects.create(user=self.users[0], point=2, required_balance=Decimal('1.00'), order=1)
+
+        added, skipped = add_stop_points_for_user(
+            self.users[0], [('5', '20.50'), ('2', '1'), ('11', '1'), ('x', '1'), ('3', '-4'), ('4', '')]
+        )
+
+        self.assertEqual(added, [4, 5])
+        self.assertEqual(skipped, [('x', '1'), ('3', '-4'), ('2', '1'), ('11', '1')])
+        rows = StopPoint.objects.filter(user=self.users[0]).order_by('order')
+        self.assertEqual(
+            [(sp.point, sp.required_balance, sp.order) for sp in rows],
+            [(2, Decimal('1.00'), 1), (4, Decimal('0.00'), 2), (5, Decimal('20.50'), 3)],
+        )
+
+    def test_bulk_add_query_count_does_not_grow_with_users(self):
+        def run(users, points):
+            with CaptureQueriesContext(connection) as ctx:
+                bulk_add_stop_points([u.id for u in users], points)
+            return len(ctx)
+
+        few = run(self.users[:1], [3, 6])
+        many = run(self.users[1:], [3, 6])
+
+        self.assertEqual(few, many)
+        self.assertEqual(StopPoint.objects.filter(point=6).count(), 5)
+
+    def test_add_view_saves_required_balances(self):
+        admin = User.objects.create_user(username='bulk_sp_admin', password='pass', role='admin')
+        client = Client()
+        client.force_login(admin)
+
+        client.post(
+            reverse('stoppoints:add_stop_points', args=[self.users[0].id]),
+            {'stop_point[]': ['3', '7'], 'required_balance[]': ['25.00', '40']},
+        )
+
+        self.assertEqual(
+            list(StopPoint.objects.filter(user=self.users[0]).order_by('point').values_list('point', 'required_balance')),
+            [(3, Decimal('25.00')), (7, Decimal('40.00'))],
+        )
+
+    def test_approve_and_reject_are_set_based(self):
+        bulk_add_stop_points([u.id for u in self.users], [3, 6])
+        StopPointProgress.objects.filter(user=self.users[0]).delete()
+        self.assertFalse(is_task_allowed(self.users[1], 3)[0])
+
+        with CaptureQueriesContext(connection) as ctx:
+            approve_stop_points(site._registry[StopPoint], self.admin_request(), StopPoint.objects.filter(point__in=[3, 6]))
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith(('UPDATE', 'INSERT'))]
+        self.assertEqual(len(writes), 3)
+
+        progress = StopPointProgress.objects.get(user=self.users[0])
+        self.assertFalse(progress.is_stopped)
+        self.assertEqual(progress.last_cleared.point, 6)
+        self.assertTrue(is_task_allowed(self.users[1], 3)[0])
+
+        reject_stop_points(site._registry[StopPoint], self.admin_request(), StopPoint.objects.filter(user=self.users[2]))
+        self.assertTrue(StopPointProgress.objects.get(user=self.users[2]).is_stopped)
+        self.assertFalse(is_task_allowed(self.users[2], 1)[0])
+        self.assertEqual(StopPoint.objects.filter(status='rejected').count(), 2)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from stoppoints.models import StopPoint, StopPointProgress
+from stoppoints.utils import (
+    StopPointSchedule,
+    is_task_allowed,
+    reset_stop_points_for_user,
+    update_stop_point,
+)
+
+User = get_user_model()
+
+
+class StopPointScheduleTests(TestCase):
+    def test_bisect_lookups(self):
+        schedule = StopPointSchedule([
+            (10, Decimal('50.00'), 'pending', 2),
+            (4, Decimal('20.00'), 'pending', 1),
+            (7, Decimal('30.00'), 'approved', 3),
+        ])
+        self.assertEqual(schedule.next_pending_point(1), 4)
+        self.assertEqual(schedule.next_pending_point(5), 10)
+        self.assertIsNone(schedule.next_pending_point(11))
+        self.assertEqual(schedule.is_task_allowed(4), (False, 'StopPoint at task 4 requires approval or recharge.'))
+        self.assertEqual(schedule.is_task_allowed(7), (True, None))
+        self.assertEqual(schedule.is_task_allowed(None), (True, None))
+
+    def test_stopped_user_is_blocked_at_next_point_by_order(self):
+        schedule = StopPointSchedule(
+            [(4, Decimal('20.00'), 'approved', 1), (9, Decimal('45.00'), 'pending', 2)],
+            is_stopped=True,
+            last_cleared_order=1,
+        )
+        self.assertEqual(schedule.is_task_allowed(5), (False, 'User is stopped at task 9. Recharge of 45.00 required.'))
+
+
+class StopPointEvaluationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='sp_user', phone='+9100001')
+        StopPoint.objects.create(user=self.user, point=3, required_balance=Decimal('10.00'), order=1)
+
+    def test_warm_schedule_needs_no_queries(self):
+        is_task_allowed(self.user, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(is_task_allowed(self.user, 3)[0], False)
+            self.assertEqual(is_task_allowed(self.user, 4)[0], True)
+
+    def test_changes_invalidate_the_schedule(self):
+        self.assertFalse(is_task_allowed(self.user, 3)[0])
+
+        sp = StopPoint.objects.get(user=self.user)
+        update_stop_point(self.user, sp.id, new_point=5)
+        self.assertTrue(is_task_allowed(self.user, 3)[0])
+        self.assertFalse(is_task_allowed(self.user, 5)[0])
+
+        sp.refresh_from_db()
+        sp.status = 'approved'
+        sp.save()
+        self.assertTrue(is_task_allowed(self.user, 5)[0])
+
+        StopPoint.objects.create(user=self.user, point=8, required_balance=Decimal('1.00'), order=2)
+        self.assertFalse(is_task_allowed(self.user, 8)[0])
+
+        reset_stop_points_for_user(self.user)
+        self.assertTrue(is_task_allowed(self.user, 8)[0])
+
+    def test_progress_changes_invalidate_the_schedule(self):
+        self.assertTrue(is_task_allowed(self.user, 1)[0])
+        progress = StopPointProgress.objects.get(user=self.user)
+        progress.is_stopped = True
+        progress.save()
+
+        self.assertEqual(
+            is_task_allowed(self.user, 1),
+            (False, 'User is stopped at task 3. Recharge of 10.00 required.'),
+        )
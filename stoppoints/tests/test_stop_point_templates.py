@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from commission.models import CommissionSetting
+from jobs.models import Job
+from jobs.tests.helpers import ResumableJobMixin
+from stoppoints import utils as stoppoint_utils
+from stoppoints.models import StopPoint, StopPointTemplate, StopPointTemplateApplication
+from stoppoints.utils import apply_template_to_cohort, claim_template_application, cohort_queryset
+
+User = get_user_model()
+
+
+class StopPointTemplateTests(TestCase):
+    def setUp(self):
+        self.referrer = User.objects.create(username='tpl_referrer', phone='+9300000')
+        self.referred = [
+            User.objects.create(username=f'tpl_user{i}', phone=f'+93000{i:02d}', referred_by=self.referrer)
+            for i in range(1, 6)
+        ]
+        self.template = StopPointTemplate.objects.create(name='Starter')
+        self.template.items.create(point=5, required_balance=Decimal('50.00'))
+        self.template.items.create(point=2, required_balance=Decimal('20.00'))
+
+    def test_cohort_filters(self):
+        CommissionSetting.objects.create(user=self.referred[0], daily_task_limit=40)
+
+        self.assertEqual(set(cohort_queryset({'referred_by': self.referrer.id})), set(self.referred))
+        self.assertNotIn(self.referred[0], cohort_queryset({'daily_task_limit': 60}))
+        self.assertIn(self.referrer, cohort_queryset({'daily_task_limit': 60}))
+        self.assertEqual(list(cohort_queryset({'daily_task_limit': 40})), [self.referred[0]])
+        with self.assertRaises(ValueError):
+            cohort_queryset({'nope': 1})
+
+    def test_command_applies_template_in_chunks_and_reports_progress(self):
+        StopPoint.objects.create(user=self.referred[0], point=2, required_balance=Decimal('1.00'), order=1)
+        application = apply_template_to_cohort(self.template, {'referred_by': self.referrer.id})
+        self.assertEqual(application.total_users, 5)
+
+        out = StringIO()
+        call_command('apply_stop_point_templates', '--chunk-size', '2', stdout=out)
+
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'done')
+        self.assertEqual((application.processed_users, application.created_points), (5, 9))
+        self.assertEqual(application.percent_done, 100)
+        self.assertIn('5 users, 9 stop points created', out.getvalue())
+        self.assertEqual(
+            list(StopPoint.objects.filter(user=self.referred[1]).order_by('order').values_list('point', 'required_balance')),
+            [(2, Decimal('20.00')), (5, Decimal('50.00'))],
+        )
+        self.assertFalse(StopPoint.objects.filter(user=self.referrer).exists())
+
+    def test_resume_continues_after_cursor(self):
+        application = apply_template_to_cohort(self.template, {'referred_by': self.referrer.id})
+        StopPointTemplateApplication.objects.filter(pk=application.pk).update(
+            status='running', last_user_id=self.referred[2].id, processed_users=3
+        )
+
+        call_command('apply_stop_point_templates', stdout=StringIO())
+        self.assertFalse(StopPoint.objects.exists())
+
+        call_command('apply_stop_point_templates', '--resume', stdout=StringIO())
+        application.refresh_from_db()
+        self.assertEqual(application.processed_users, 5)
+        self.assertEqual(
+            set(StopPoint.objects.values_list('user_id', flat=True)), {self.referred[3].id, self.referred[4].id}
+        )
+
+    def test_claim_refuses_an_application_another_run_holds(self):
+        application = apply_template_to_cohort(self.template, {'referred_by': self.referrer.id})
+        self.assertTrue(claim_template_application(application.pk))
+        self.assertFalse(claim_template_application(application.pk))
+
+        call_command('apply_stop_point_templates', '--resume', stdout=StringIO())
+        self.assertFalse(StopPoint.objects.exists())  # still held: not stale yet
+
+        StopPointTemplateApplication.objects.filter(pk=application.pk).update(
+            claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertTrue(claim_template_application(application.pk))
+        self.assertFalse(claim_template_application(application.pk, resume=False))
+
+
+class StopPointTemplateJobTests(ResumableJobMixin, TransactionTestCase):
+    def setUp(self):
+        self.referrer = User.objects.create(username='tpl_job_referrer', phone='+9310000')
+        self.referred = [
+            User.objects.create(username=f'tpl_job_user{i}', phone=f'+93100{i:02d}', referred_by=self.referrer)
+            for i in range(1, 6)
+        ]
+        self.template = StopPointTemplate.objects.create(name='Worker')
+        self.template.items.create(point=3, required_balance=Decimal('30.00'))
+
+    def test_worker_keeps_chunks_before_a_failure_and_resumes(self):
+        application = apply_template_to_cohort(self.template, {'referred_by': self.referrer.id})
+        job = Job.objects.get()
+        Job.objects.filter(pk=job.pk).update(payload={'application_id': application.id, 'chunk_size': 2})
+
+        self.run_with_failing_chunk(job, stoppoint_utils, 'bulk_add_stop_points', fail_on=3)
+
+        application.refresh_from_db()
+        self.assertEqual(
+            (application.status, application.processed_users, application.last_user_id, application.error),
+            ('pending', 4, self.referred[3].id, 'chunk 3 failed'),
+        )
+        self.assertEqual(StopPoint.objects.count(), 4)
+
+        self.resume(job)
+        application.refresh_from_db()
+        self.assertEqual((application.status, application.processed_users, application.created_points), ('done', 5, 5))
+        self.assertEqual(StopPoint.objects.count(), 5)
@@ -1,5 +1,17 @@
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from .models import StopPoint
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+from AmazonProject.cache_utils import bump_version, memoized
+from commission.models import CommissionSetting
+from .models import StopPoint, StopPointProgress, StopPointTemplateApplication
+
+SCHEDULE_CACHE_NAMESPACE = 'stoppoint_schedule'
+# A running template application silent for this long has lost its worker
+APPLICATION_STALE_AFTER = timedelta(minutes=10)
 
 # -----------------------------
 # Helper: Daily Task Limit
@@ -9,34 +21,87 @@ def get_daily_task_limit(user):
     Returns the daily task limit for a user.
     Falls back to 60 if no setting exists.
     """
-    try:
-        # Avoid importing from products.utils to prevent circular import
-        setting = getattr(user, 'commission_setting', None)
-        if setting and getattr(setting, 'daily_task_limit', None):
-            return int(setting.daily_task_limit)
-    except Exception:
-        pass
-    return 60
+    # Avoid importing from products.utils to prevent circular import
+    from commission.utils import get_commission_setting
+
+    return int(get_commission_setting(user)['daily_task_limit']) or 60
 
 # -----------------------------
 # StopPoints logic
 # -----------------------------
+def _parse_stop_point(entry):
+    """
+    Accepts a point number or a (point, required_balance) pair.
+    Returns (point, required_balance); raises ValueError when invalid.
+    """
+    point, balance = entry if isinstance(entry, (tuple, list)) else (entry, None)
+    try:
+        point = int(point)
+        balance = Decimal(str(balance)) if balance not in (None, "") else Decimal('0.00')
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError(entry)
+    if balance < 0:
+        raise ValueError(entry)
+    return point, balance.quantize(Decimal('0.01'))
+
+
 def add_stop_points_for_user(user, points_list):
-    added, skipped = [], []
-    daily_limit = get_daily_task_limit(user)
-    for point in points_list:
+    """
+    Adds stop points (numbers or (point, required_balance) pairs) for one user.
+    Returns (added points, skipped entries).
+    """
+    added, skipped = bulk_add_stop_points([user.pk], points_list)
+    return added.get(user.pk, []), skipped.get(user.pk, [])
+
+
+def bulk_add_stop_points(user_ids, points_list, batch_size=1000):
+    """
+    Adds the same stop points to many users at once:
+    - 1 query for daily limits, 1 for existing points and orders
+    - bulk_create(ignore_conflicts=True) on the (user, point) unique key,
+      so a concurrent insert of the same point is skipped, not an error
+    New points get orders after the user's existing ones, in point order.
+    Returns ({user_id: [added points]}, {user_id: [skipped entries]}).
+    """
+    user_ids = list(user_ids)
+    limits = dict(
+        CommissionSetting.objects.filter(user_id__in=user_ids).values_list('user_id', 'daily_task_limit')
+    )
+    existing_points, max_order = {}, {}
+    for user_id, point, order in StopPoint.objects.filter(user_id__in=user_ids).values_list('user_id', 'point', 'order'):
+        existing_points.setdefault(user_id, set()).add(point)
+        max_order[user_id] = max(max_order.get(user_id, 0), order)
+
+    parsed, invalid = [], []
+    for entry in points_list:
         try:
-            point_int = int(point)
-            if not (1 <= point_int <= daily_limit):
-                skipped.append(point)
-                continue
-            if StopPoint.objects.filter(user=user, point=point_int).exists():
-                skipped.append(point)
+            parsed.append((_parse_stop_point(entry), entry))
+        except ValueError:
+            invalid.append(entry)
+    parsed.sort(key=lambda item: item[0][0])
+
+    rows, added, skipped = [], {}, {}
+    for user_id in user_ids:
+        daily_limit = limits.get(user_id) or 60
+        seen = existing_points.get(user_id, set())
+        order = max_order.get(user_id, 0)
+        user_skipped = list(invalid)
+        for (point, balance), entry in parsed:
+            if not (1 <= point <= daily_limit) or point in seen:
+                user_skipped.append(entry)
                 continue
-            StopPoint.objects.create(user=user, point=point_int)
-            added.append(point_int)
-        except (ValueError, TypeError):
-            skipped.append(point)
+            seen.add(point)
+            order += 1
+            rows.append(StopPoint(user_id=user_id, point=point, required_balance=balance, order=order))
+            added.setdefault(user_id, []).append(point)
+        if user_skipped:
+            skipped[user_id] = user_skipped
+
+    with transaction.atomic():
+        StopPoint.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        # bulk_create skips post_save, so invalidate schedules here
+        for user_id in added:
+            invalidate_stop_point_schedule(user_id)
     return added, skipped
 
 def update_stop_point(user, sp_id, new_point=None, new_required_balance=None):
@@ -63,20 +128,230 @@ def update_stop_point(user, sp_id, new_point=None, new_required_balance=None):
 def reset_stop_points_for_user(user):
     StopPoint.objects.filter(user=user).delete()
 
-def get_next_pending_stoppoint(user, next_task_number):
-    return StopPoint.objects.filter(user=user, point__gte=next_task_number, status='pending').order_by('point').first()
+# -----------------------------
+# Bulk Approve / Reject
+# -----------------------------
+def bulk_approve_stop_points(stop_points):
+    """
+    Approves the given stop points and lets their users continue, set-based:
+    one UPDATE for the stop points, one INSERT for missing progress rows and
+    one UPDATE pointing each user's last_cleared at their highest-order
+    approved point. Returns the number of stop points approved.
+    """
+    pks, user_ids = _selected(stop_points)
+    with transaction.atomic():
+        StopPoint.objects.filter(pk__in=pks).update(status='approved')
+        _ensure_progress(user_ids)
+        last_cleared = (
+            StopPoint.objects.filter(pk__in=pks, user_id=OuterRef('user_id')).order_by('-order').values('pk')[:1]
+        )
+        StopPointProgress.objects.filter(user_id__in=user_ids).update(
+            is_stopped=False, last_cleared=Subquery(last_cleared)
+        )
+        _invalidate_schedules(user_ids)
+    return len(pks)
 
-def is_task_allowed(user, next_task_number):
-    if hasattr(user, 'stoppoint_progress') and user.stoppoint_progress.is_stopped:
-        last_cleared_order = user.stoppoint_progress.last_cleared.order if user.stoppoint_progress.last_cleared else 0
-        blocking_point = StopPoint.objects.filter(user=user, order__gt=last_cleared_order).order_by('order').first()
-        if blocking_point:
-            return False, f"User is stopped at task {blocking_point.point}. Recharge of {blocking_point.required_balance} required."
-        else:
+
+def bulk_reject_stop_points(stop_points):
+    """Rejects the given stop points and keeps their users stopped, set-based."""
+    pks, user_ids = _selected(stop_points)
+    with transaction.atomic():
+        StopPoint.objects.filter(pk__in=pks).update(status='rejected')
+        _ensure_progress(user_ids)
+        StopPointProgress.objects.filter(user_id__in=user_ids).update(is_stopped=True)
+        _invalidate_schedules(user_ids)
+    return len(pks)
+
+
+def _selected(stop_points):
+    """
+    (pks, user ids) of a queryset, read up front: updating status can change
+    which rows a filtered admin queryset matches.
+    """
+    rows = list(stop_points.values_list('pk', 'user_id'))
+    return [pk for pk, _ in rows], sorted({user_id for _, user_id in rows})
+
+
+def _ensure_progress(user_ids):
+    StopPointProgress.objects.bulk_create(
+        [StopPointProgress(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+    )
+
+
+def _invalidate_schedules(user_ids):
+    # update() and bulk_create() skip the model signals
+    for user_id in user_ids:
+        invalidate_stop_point_schedule(user_id)
+
+# -----------------------------
+# Template Application
+# -----------------------------
+def _daily_limit_filter(value):
+    value = int(value)
+    q = Q(commission_setting__daily_task_limit=value)
+    # Users without a CommissionSetting run on the default limit
+    return q | Q(commission_setting__isnull=True) if value == 60 else q
+
+# Cohort filter name -> Q builder over regular users
+COHORT_FILTERS = {
+    'referred_by': lambda value: Q(referred_by_id=int(value)),
+    'daily_task_limit': _daily_limit_filter,
+    'username_prefix': lambda value: Q(username__istartswith=value),
+}
+
+
+def cohort_queryset(filters):
+    """Regular users matching every filter in `filters` (see COHORT_FILTERS)."""
+    unknown = set(filters) - set(COHORT_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown cohort filters: {', '.join(sorted(unknown))}")
+    users = get_user_model().objects.filter(role='user')
+    for name, value in filters.items():
+        users = users.filter(COHORT_FILTERS[name](value))
+    return users
+
+
+def apply_template_to_cohort(template, filters, requested_by=None):
+    """
+    Queues a template for a cohort; the job worker (or the
+    apply_stop_point_templates command) does the work. Validates the
+    filters and records the cohort size for progress reporting.
+    """
+    from jobs.registry import enqueue
+    from stoppoints.jobs import apply_template_job
+
+    total = cohort_queryset(filters).count()
+    application = StopPointTemplateApplication.objects.create(
+        template=template, filters=filters, requested_by=requested_by, total_users=total
+    )
+    enqueue(apply_template_job, {'application_id': application.id}, idempotency_key=f'stop_point_template:{application.id}')
+    return application
+
+
+def claim_template_application(application_id, resume=True):
+    """
+    Marks an application 'running' for the caller with one conditional
+    UPDATE: from 'pending', or (resume=True) from a 'running' one whose
+    claimed_at is older than APPLICATION_STALE_AFTER. Returns True only
+    for the one caller whose UPDATE matched, so the job worker and the
+    apply_stop_point_templates command never process it at the same time.
+    """
+    now = timezone.now()
+    claimable = Q(status='pending')
+    if resume:
+        claimable |= Q(status='running') & (Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - APPLICATION_STALE_AFTER))
+    return StopPointTemplateApplication.objects.filter(claimable, pk=application_id).update(
+        status='running', claimed_at=now
+    ) == 1
+
+
+def process_template_application(application, chunk_size=500, on_chunk=None):
+    """
+    Applies a claimed application's template to the cohort in user-id
+    order, chunk_size users per bulk insert. Each chunk's stop points,
+    counters and cursor commit together (claimed_at is touched too), so a
+    rerun resumes where it stopped. on_chunk(application) is called after
+    each chunk. Returns the application.
+    """
+    points = application.template.as_points_list()
+    users = cohort_queryset(application.filters).order_by('id')
+
+    while True:
+        user_ids = list(users.filter(id__gt=application.last_user_id).values_list('id', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        with transaction.atomic():
+            added, _ = bulk_add_stop_points(user_ids, points)
+            created = sum(len(v) for v in added.values())
+            StopPointTemplateApplication.objects.filter(pk=application.pk).update(
+                processed_users=F('processed_users') + len(user_ids),
+                created_points=F('created_points') + created,
+                last_user_id=user_ids[-1],
+                claimed_at=timezone.now(),
+            )
+        application.last_user_id = user_ids[-1]
+        if on_chunk:
+            on_chunk(application)
+
+    StopPointTemplateApplication.objects.filter(pk=application.pk).update(status='done', finished_at=timezone.now())
+    application.refresh_from_db()
+    return application
+
+
+# -----------------------------
+# Stop-Point Schedule
+# -----------------------------
+class StopPointSchedule:
+    """
+    A user's stop points and progress, loaded once and answered in memory:
+    - pending_points: sorted pending stop point numbers (bisect by task number)
+    - by_order: (order, point, required_balance) sorted by order
+    """
+    __slots__ = ('pending_points', 'orders', 'by_order', 'is_stopped', 'last_cleared_order')
+
+    def __init__(self, stop_points, is_stopped=False, last_cleared_order=0):
+        self.pending_points = tuple(sorted(point for point, _, status, _ in stop_points if status == 'pending'))
+        self.by_order = tuple(sorted((order, point, balance) for point, balance, _, order in stop_points))
+        self.orders = tuple(order for order, _, _ in self.by_order)
+        self.is_stopped = is_stopped
+        self.last_cleared_order = last_cleared_order
+
+    @classmethod
+    def load(cls, user_id):
+        """Two queries: the user's stop points and their progress row."""
+        stop_points = list(
+            StopPoint.objects.filter(user_id=user_id).values_list('point', 'required_balance', 'status', 'order')
+        )
+        progress = (
+            StopPointProgress.objects.filter(user_id=user_id)
+            .values_list('is_stopped', 'last_cleared__order')
+            .first()
+        )
+        is_stopped, last_cleared_order = progress if progress else (False, None)
+        return cls(stop_points, is_stopped, last_cleared_order or 0)
+
+    def next_pending_point(self, task_number):
+        """Smallest pending stop point >= task_number, or None."""
+        i = bisect_left(self.pending_points, task_number)
+        return self.pending_points[i] if i < len(self.pending_points) else None
+
+    def blocking_point(self):
+        """First (order, point, required_balance) after the last cleared one, or None."""
+        i = bisect_right(self.orders, self.last_cleared_order)
+        return self.by_order[i] if i < len(self.by_order) else None
+
+    def is_task_allowed(self, task_number):
+        if self.is_stopped:
+            blocking = self.blocking_point()
+            if blocking:
+                _, point, required_balance = blocking
+                return False, f"User is stopped at task {point}. Recharge of {required_balance} required."
             return False, "User is stopped, but no specific rule found. Please contact support."
 
-    pending_sp = get_next_pending_stoppoint(user, next_task_number)
-    if pending_sp and pending_sp.point == next_task_number:
-        return False, f"StopPoint at task {pending_sp.point} requires approval or recharge."
+        # Legacy tasks may have no number; only the stopped flag applies to them
+        if task_number is not None and self.next_pending_point(task_number) == task_number:
+            return False, f"StopPoint at task {task_number} requires approval or recharge."
+
+        return True, None
+
+
+def get_stop_point_schedule(user):
+    """The user's StopPointSchedule, memoized per request and cached."""
+    user_id = getattr(user, 'pk', user)
+    return memoized(SCHEDULE_CACHE_NAMESPACE, user_id, lambda: StopPointSchedule.load(user_id))
 
-    return True, None
+
+def invalidate_stop_point_schedule(user):
+    """Drops the cached schedule; StopPoint/StopPointProgress signals call this."""
+    bump_version(SCHEDULE_CACHE_NAMESPACE, getattr(user, 'pk', user))
+
+
+def get_next_pending_stoppoint(user, next_task_number):
+    return StopPoint.objects.filter(user=user, point__gte=next_task_number, status='pending').order_by('point').first()
+
+def is_task_allowed(user, next_task_number):
+    """
+    Whether the user may take task next_task_number; returns (allowed, reason).
+    Answered from the cached schedule, without database access when warm.
+    """
+    return get_stop_point_schedule(user).is_task_allowed(next_task_number)
@@ -27,26 +27,12 @@ def add_stop_points_view(request, user_id):
             messages.error(request, "Stop Points and Required Balances must match and not be empty.")
             return redirect("accounts:admin_dashboard")
 
-        stop_data = []
-        skipped = []
-        added = []
-        for p, b in zip(points, balances):
-            try:
-                point_int = int(p)
-                balance_float = float(b)
-                stop_data.append((point_int, balance_float))
-            except ValueError:
-                skipped.append(f"{p}:{b}")
-
-        if stop_data:
-            added, skipped_util = add_stop_points_for_user(user, stop_data)
-            added.extend(added)
-            skipped.extend(skipped_util)
+        added, skipped = add_stop_points_for_user(user, list(zip(points, balances)))
 
         if added:
-            messages.success(request, f"Added stop points: {', '.join([str(a[0]) for a in added])}")
+            messages.success(request, f"Added stop points: {', '.join(map(str, added))}")
         if skipped:
-            messages.info(request, f"Skipped invalid entries: {', '.join(map(str, skipped))}")
+            messages.info(request, f"Skipped invalid entries: {', '.join(f'{p}:{b}' for p, b in skipped)}")
 
     return redirect("accounts:admin_dashboard")
 
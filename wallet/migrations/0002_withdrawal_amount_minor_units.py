@@ -0,0 +1,64 @@
+import AmazonProject.money
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def to_minor_units(apps, schema_editor):
+    """Copies each Decimal amount into the integer column (8 places, exact)."""
+    UserWithdrawal = apps.get_model('wallet', 'UserWithdrawal')
+    batch = []
+    for withdrawal in UserWithdrawal.objects.only('id', 'amount').order_by('id').iterator():
+        withdrawal.amount_minor = withdrawal.amount
+        batch.append(withdrawal)
+        if len(batch) >= 500:
+            UserWithdrawal.objects.bulk_update(batch, ['amount_minor'])
+            batch = []
+    UserWithdrawal.objects.bulk_update(batch, ['amount_minor'])
+
+
+def to_decimal(apps, schema_editor):
+    UserWithdrawal = apps.get_model('wallet', 'UserWithdrawal')
+    batch = []
+    for withdrawal in UserWithdrawal.objects.only('id', 'amount_minor').order_by('id').iterator():
+        withdrawal.amount = withdrawal.amount_minor.to_decimal()
+        batch.append(withdrawal)
+        if len(batch) >= 500:
+            UserWithdrawal.objects.bulk_update(batch, ['amount'])
+            batch = []
+    UserWithdrawal.objects.bulk_update(batch, ['amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userwithdrawal',
+            name='amount_minor',
+            field=AmazonProject.money.MoneyField(default=0, places=8),
+        ),
+        migrations.RunPython(to_minor_units, to_decimal),
+        # A default so unapplying can re-add the Decimal column over existing rows
+        migrations.AlterField(
+            model_name='userwithdrawal',
+            name='amount',
+            field=models.DecimalField(decimal_places=8, default=Decimal('0'), max_digits=18),
+        ),
+        migrations.RemoveField(
+            model_name='userwithdrawal',
+            name='amount',
+        ),
+        migrations.RenameField(
+            model_name='userwithdrawal',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.AlterField(
+            model_name='userwithdrawal',
+            name='amount',
+            field=AmazonProject.money.MoneyField(places=8),
+        ),
+    ]
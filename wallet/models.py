@@ -3,6 +3,7 @@ from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from AmazonProject.money import CRYPTO_PLACES, MoneyField
 
 User = settings.AUTH_USER_MODEL
 
@@ -60,7 +61,7 @@ class UserWithdrawal(models.Model):
     ]
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    amount = models.DecimalField(max_digits=18, decimal_places=8)  # safe for crypto
+    amount = MoneyField(places=CRYPTO_PLACES)  # integer minor units, 8 places for crypto
     network = models.CharField(max_length=20, choices=CRYPTO_NETWORK_CHOICES)
     balance = models.DecimalField(max_digits=18, decimal_places=8, default=Decimal("0.0")) 
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
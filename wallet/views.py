@@ -2,8 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from wallet.models import UserWalletAddress, CRYPTO_NETWORK_CHOICES
-from products.models import UserProductTask
-from products.utils import get_daily_task_limit
+from products.utils import get_daily_task_limit, get_task_progress
 
 @login_required
 def bind_user_wallet_view(request):
@@ -11,7 +10,7 @@ def bind_user_wallet_view(request):
     wallet = UserWalletAddress.objects.filter(user=user).first()
 
     # 1️⃣ Check if all tasks are completed
-    completed_tasks_count = UserProductTask.objects.filter(user=user, is_completed=True).count()
+    completed_tasks_count = get_task_progress(user).completed_count
     if completed_tasks_count < get_daily_task_limit(user):
         messages.error(
             request,
@@ -67,7 +66,6 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from wallet.models import UserWalletAddress, CRYPTO_NETWORK_CHOICES
 from balance.models import Wallet  # assuming you track user balance here
-from decimal import Decimal
 
 
 
@@ -79,13 +77,12 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
 from wallet.models import UserWalletAddress, WalletHistory
-from products.models import UserProductTask
-from products.utils import get_daily_task_limit
+from products.utils import get_daily_task_limit, get_task_progress
 
 def bind_user_wallet_view(request):
     user = request.user
     wallet = UserWalletAddress.objects.filter(user=user).first()
-    completed_tasks_count = UserProductTask.objects.filter(user=user, is_completed=True).count()
+    completed_tasks_count = get_task_progress(user).completed_count
 
     # Determine if user can bind wallet
     can_bind_wallet = (completed_tasks_count >= get_daily_task_limit(user)) and (wallet is None)
@@ -131,9 +128,7 @@ from django.contrib import messages
 from django.shortcuts import render, redirect
 from wallet.models import UserWalletAddress, UserWithdrawal
 from balance.utils import get_wallet_balance, update_wallet_balance
-from products.models import UserProductTask
 
-MIN_LEFTOVER_CENTS = 0.05  # Minimum balance to leave after withdrawal
 
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -141,7 +136,6 @@ from django.shortcuts import render, redirect
 
 from wallet.models import UserWalletAddress, UserWithdrawal
 from balance.utils import get_wallet_balance, update_wallet_balance
-from products.models import UserProductTask
 
 
 from django.shortcuts import render, redirect
@@ -156,16 +150,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import render, redirect
 from wallet.models import UserWalletAddress, UserWithdrawal
-from balance.utils import get_wallet_balance, update_wallet_balance
-from products.models import UserProductTask  # if you reset tasks after withdraw
+from balance.utils import get_wallet_balance
+from django.db import transaction
+from AmazonProject.money import CRYPTO_PLACES, Money
+from balance.services import debit_withdrawal
 
-MIN_LEFTOVER_CENTS = 0.05  # leave at least 5 cents
+MIN_LEFTOVER = Money(5)  # leave at least 5 cents
 
 @login_required
 def withdraw_view(request):
     user = request.user
     wallet = UserWalletAddress.objects.filter(user=user).first()
-    balance = get_wallet_balance(user)
+    balance = Money.from_decimal(get_wallet_balance(user))
 
     # 1️⃣ Wallet must be bound
     if not wallet:
@@ -187,28 +183,33 @@ def withdraw_view(request):
             return redirect("wallet:withdraw")
 
         # 2c️⃣ Check balance is sufficient
-        if balance <= MIN_LEFTOVER_CENTS:
+        if balance <= MIN_LEFTOVER:
             messages.error(
                 request,
-                f"Insufficient balance. Minimum {MIN_LEFTOVER_CENTS} must remain."
+                f"Insufficient balance. Minimum {MIN_LEFTOVER} must remain."
             )
             return redirect("wallet:withdraw")
 
         # 2d️⃣ Calculate withdrawable amount
-        withdraw_amount = round(balance - MIN_LEFTOVER_CENTS, 8)
-
-        # 2e️⃣ Deduct balance immediately
-        update_wallet_balance(user, withdraw_amount, action="subtract")
-
-        # 2f️⃣ Log withdrawal as PENDING
-        UserWithdrawal.objects.create(
-            user=user,
-            amount=withdraw_amount,
-            network=network,
-            status="PENDING"
-        )
+        withdraw_amount = balance - MIN_LEFTOVER
+
+        # 2e️⃣ Log withdrawal as PENDING and deduct balance immediately (one transaction)
+        with transaction.atomic():
+            withdrawal = UserWithdrawal.objects.create(
+                user=user,
+                amount=withdraw_amount.to_places(CRYPTO_PLACES),
+                network=network,
+                status="PENDING"
+            )
+            # Drains commission buckets then current_balance, like get_wallet_balance adds them
+            debited = debit_withdrawal(user, withdraw_amount.to_decimal(), reference=f"withdrawal:{withdrawal.pk}")
+            if not debited:
+                transaction.set_rollback(True)
+        if not debited:
+            messages.error(request, "Insufficient balance.")
+            return redirect("wallet:withdraw")
 
-        # 2g️⃣ Notify user
+        # 2f️⃣ Notify user
         messages.success(
             request,
             f"Withdrawal request of {withdraw_amount} {network} submitted successfully. Admin will approve shortly."
@@ -224,13 +225,15 @@ def withdraw_view(request):
         "wallet": wallet,
         "balance": balance,
         "networks": networks,
-        "min_leftover": MIN_LEFTOVER_CENTS
+        "min_leftover": MIN_LEFTOVER.minor,  # template shows it in cents
     })
 
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from decimal import Decimal
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import transaction
+from balance.services import adjust_wallet
+from AmazonProject.money import FIAT_PLACES
 from .models import UserWithdrawal, UserWalletAddress
 
 # Only admin can approve/reject
@@ -250,12 +253,16 @@ def approve_withdrawal(request, withdrawal_id):
 @user_passes_test(is_admin)
 def reject_withdrawal(request, withdrawal_id):
     withdrawal = get_object_or_404(UserWithdrawal, id=withdrawal_id, status="PENDING")
-    wallet = getattr(withdrawal.user, 'userwalletaddress', None)
-    if wallet:
-        wallet.balance += Decimal(withdrawal.amount)
-        wallet.save()
-    withdrawal.status = "REJECTED"
-    withdrawal.save()
+    with transaction.atomic():
+        # Claim first so a double submit can't refund twice
+        if not UserWithdrawal.objects.filter(pk=withdrawal.pk, status="PENDING").update(status="REJECTED"):
+            messages.error(request, "Withdrawal already processed.")
+            return redirect('accounts:admin_dashboard')
+        # The withdrawal may have drained commission too; the refund goes to current_balance
+        adjust_wallet(
+            withdrawal.user, entry_type="refund", reference=f"withdrawal:{withdrawal.pk}",
+            current_balance=withdrawal.amount.to_places(FIAT_PLACES, rounded=True).to_decimal(),
+        )
     messages.success(request, f"Withdrawal of {withdrawal.amount} rejected and refunded.")
     return redirect('accounts:admin_dashboard')
 